@@ -2,6 +2,9 @@
 ASGI config for bandaskapp project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP requests go to Django; WebSocket connections to /ws/ carry live status
+and control commands (see core.websocket). Serve with e.g.
+``uvicorn bandaskapp.asgi:application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -13,4 +16,21 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bandaskapp.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up (uses models)
+from core.websocket import websocket_application  # noqa: E402
+
+
+async def application(scope, receive, send):
+    """Route WebSocket connections on /ws/ to the live channel, the rest to Django"""
+    if scope['type'] == 'websocket':
+        if scope['path'] == '/ws/':
+            await websocket_application(scope, receive, send)
+        else:
+            # Reject the handshake
+            await receive()
+            await send({'type': 'websocket.close', 'code': 1000})
+        return
+
+    await django_application(scope, receive, send)
@@ -168,8 +168,61 @@ BANDASKAPP_CONFIG = {
     'PUMP_RELAY_ID': '1_02',  # Pump relay circuit ID
     'HEATING_CONTROL_UNIT_ID': '1_01',  # Heating control unit digital input circuit ID
 
+    'HARDWARE_TRANSPORT': 'evok',  # 'evok' (REST API), 'modbus' (Modbus TCP relays/DI) or 'memory' (in-process simulator, no sockets)
     'EVOK_BASE_URL': 'http://127.0.0.1:8080',  # EVOK API base URL
     'UPDATE_INTERVAL': 5,  # Monitoring loop interval in seconds
+    'SNAPSHOT_MAX_AGE': 5,  # Seconds a bulk EVOK read is reused within a monitoring cycle
+    'EVOK_POOL_SIZE': 4,  # Keep-alive connections per EVOK host in the shared client
+    'EVOK_MAX_CONCURRENCY': 4,  # Concurrent EVOK reads when the bulk read is unavailable
+    'EVOK_READ_CACHE_TTL': 1.0,  # Seconds EVOK reads are cached and shared (0 disables caching)
+    'EVOK_RESILIENCE': {
+        'failure_threshold': 3,  # Consecutive failures before the circuit breaker opens
+        'reset_timeout': 30,  # Seconds the breaker stays open before a probe request
+        'min_timeout': 0.5,  # Lower bound for adaptive request timeouts (seconds)
+        'max_timeout': 5.0,  # Upper bound / initial request timeout (seconds)
+        'timeout_percentile': 99,  # Latency percentile the adaptive timeout is based on
+        'timeout_multiplier': 3,  # Timeout = percentile latency x multiplier
+        'health_window': 60,  # Seconds of request outcomes the passive health model keeps
+        'min_success_rate': 0.5,  # Success rate below which EVOK counts as unhealthy
+        'probe_after': 30,  # Seconds without requests after which a connectivity probe is sent
+    },
+    'MODBUS': {
+        'host': '127.0.0.1',  # Unipi Modbus TCP server (hardware/modbus_simulator.py listens on 5020)
+        'port': 502,  # Modbus TCP port
+        'unit_id': 0,  # Modbus unit identifier
+        'timeout': 1.0,  # Socket timeout in seconds
+        'input_register': 0,  # Holding register with the digital input bitmap
+        'relay_register': 1,  # Holding register with the relay output bitmap
+        'relay_coil_base': 0,  # Coil address of relay x_01
+        'relays': {},  # Circuit ID -> bit/coil offset overrides (default: '1_02' -> 1)
+        'inputs': {},  # Circuit ID -> input bit overrides (default: '1_01' -> 0)
+        'health_window': 60,  # Seconds of request outcomes used to judge health
+        'min_success_rate': 0.5,  # Success rate below which the Modbus server counts as unhealthy
+        'probe_after': 30,  # Seconds without requests before a health check probes actively
+    },
+    'TEMPERATURE_SOURCE': 'evok',  # 'evok' or 'onewire' (read DS18B20s from sysfs, relays/DI still via transport)
+    'ONEWIRE': {
+        'base_path': '/sys/bus/w1/devices',  # w1 sysfs directory (point at a fake tree for testing)
+        'retries': 2,  # Extra reads after a CRC error or power-on reset value
+        'max_workers': 8,  # Sensors read in parallel
+    },
+    'STATUS_SNAPSHOT_PATH': None,  # mmap'd status file shared by monitor and web (None: /dev/shm/bandaskapp_status)
+    'STATUS_SNAPSHOT_MAX_AGE': 30,  # Seconds after which the web falls back to reading status directly
+    'STATUS_LONG_POLL_TIMEOUT': 25,  # Seconds /api/status/?since=<version> waits for a newer status
+    'STATUS_STREAM_POLL_INTERVAL': 0.5,  # Seconds between status snapshot checks of each SSE status stream
+    'STATUS_STREAM_KEEPALIVE': 15,  # Seconds of silence after which a stream sends a keepalive comment
+    'STATUS_STREAM_FALLBACK_INTERVAL': 10,  # Seconds between full status events while the monitor is not running
+    'STATUS_STREAM_MAX_DURATION': 300,  # Seconds after which a stream ends (the browser reconnects and resumes)
+    'HISTORY_DEFAULT_WINDOW': 3600,  # Seconds of temperature history /api/history/ returns without ?window= or ?start=
+    'HISTORY_DEFAULT_POINTS': 300,  # Points per sensor /api/history/ returns without ?points=
+    'HISTORY_MAX_POINTS': 2000,  # Upper limit for ?points= (about the widest graph in pixels)
+    'COMMAND_POLL_INTERVAL': 0.5,  # Seconds between checks for relay commands queued by the web interface
+    'COMMAND_TIMEOUT': 30,  # Seconds after which an unexecuted relay command expires
+    'MONITOR_TASKS': {  # Monitor task periods and deadlines in seconds (control runs every --interval, relay sync every --sync-interval)
+        'control': {'deadline': 5},
+        'heating_control': {'period': 1, 'deadline': 0.5},  # Heating control unit input
+        'aux_sensors': {'period': 60, 'deadline': 10},  # Sensors not used for control
+    },
     'COOLDOWN_TIMES': {
         'furnace': 30,  # Furnace relay cooldown in seconds
         'pump': 5,  # Pump relay cooldown in seconds
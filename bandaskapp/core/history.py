@@ -0,0 +1,86 @@
+"""
+Temperature history served by /api/history/
+
+Series are read from TemperatureLog over the (sensor, -timestamp) index and
+downsampled with Largest-Triangle-Three-Buckets (LTTB) to about one point
+per pixel of the graph that draws them, so the shape of the curve (peaks
+and valleys included) survives while the response stays small.
+"""
+from datetime import datetime
+from typing import Tuple
+import numpy as np
+
+from core.models import TemperatureSensor, TemperatureLog
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling
+    
+    The first and last points are kept; the points in between are split into
+    threshold - 2 buckets and from each bucket the point forming the largest
+    triangle with the previously selected point and the average of the next
+    bucket is kept.
+    
+    Args:
+        x: Ascending x values (e.g. seconds)
+        y: Values
+        threshold: Number of points to keep
+        
+    Returns:
+        Indices of the selected points, ascending
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+        
+    # Bucket boundaries over the interior points 1 .. n-2
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    avg_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+    # The bucket after the last one is the last point
+    avg_x = np.append(avg_x[1:], x[-1])
+    avg_y = np.append(avg_y[1:], y[-1])
+    
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        # Twice the triangle area (the constant factor does not change the argmax)
+        areas = np.abs((x[a] - avg_x[i]) * (bucket_y - y[a]) - (x[a] - bucket_x) * (avg_y[i] - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+        
+    return selected
+
+def get_sensor_history(sensor: TemperatureSensor, start: datetime, end: datetime,
+                       points: int) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Downsampled temperature history of a sensor
+    
+    Args:
+        sensor: Sensor to read
+        start: Window start (inclusive)
+        end: Window end (inclusive)
+        points: Maximum number of points to return
+        
+    Returns:
+        (Unix timestamps in seconds, values, number of logged readings in the window)
+    """
+    # Newest first, matching the (sensor, -timestamp) index
+    rows = list(
+        TemperatureLog.objects
+        .filter(sensor=sensor, timestamp__gte=start, timestamp__lte=end)
+        .order_by('-timestamp')
+        .values_list('timestamp', 'value')
+    )
+    count = len(rows)
+    times = np.fromiter((row[0].timestamp() for row in reversed(rows)), dtype=np.float64, count=count)
+    values = np.fromiter((row[1] for row in reversed(rows)), dtype=np.float64, count=count)
+    
+    selected = lttb(times, values, points)
+    return times[selected], values[selected], count
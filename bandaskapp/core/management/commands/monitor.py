@@ -5,7 +5,13 @@ import sys
 from django.core.management.base import BaseCommand
 from django.conf import settings
 
+from hardware.client import EVOKClient, get_shared_pool_stats
 from hardware.controller import HardwareController
+from hardware.subscription import EVOKSubscription
+from hardware.status_snapshot import get_status_snapshot
+from hardware.changes import ChangeMonitor
+from hardware.adaptive import AdaptiveInterval
+from hardware.scheduler import TaskScheduler
 from core.models import SystemLog
 
 # Configure logging
@@ -27,6 +33,12 @@ class Command(BaseCommand):
         super().__init__()
         self.running = True
         self.controller = None
+        self.subscription = None
+        self.status_snapshot = get_status_snapshot()
+        self.changes = ChangeMonitor()
+        self.adaptive = None
+        self.scheduler = None
+        self.heating_control_state = None
         
         # Setup signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -45,6 +57,29 @@ class Command(BaseCommand):
             default=300,  # 5 minutes
             help='Relay state sync interval in seconds (default: 300)'
         )
+        parser.add_argument(
+            '--subscribe',
+            action='store_true',
+            help='Use EVOK WebSocket push updates and react to threshold crossings immediately'
+        )
+        parser.add_argument(
+            '--adaptive',
+            action='store_true',
+            help='Adapt the interval to how close control temperatures are to their thresholds'
+        )
+        parser.add_argument(
+            '--min-interval',
+            type=int,
+            default=2,
+            help='Shortest adaptive monitoring interval in seconds (default: 2)'
+        )
+        parser.add_argument(
+            '--max-interval',
+            type=int,
+            default=15,
+            help='Longest adaptive monitoring interval in seconds, kept below half of '
+                 'STATUS_SNAPSHOT_MAX_AGE (default: 15)'
+        )
     
     def handle(self, *args, **options):
         self.interval = options['interval']
@@ -54,9 +89,37 @@ class Command(BaseCommand):
             self.style.SUCCESS(f'Starting BandaskApp monitoring (interval: {self.interval}s)...')
         )
         
+        if options['adaptive']:
+            # Cycles publish the status snapshot - idle backoff must not let it
+            # go stale, or the web falls back to reading hardware directly
+            max_interval = options['max_interval']
+            snapshot_max_age = settings.BANDASKAPP_CONFIG.get('STATUS_SNAPSHOT_MAX_AGE', 30)
+            if max_interval > snapshot_max_age / 2:
+                max_interval = max(options['min_interval'], snapshot_max_age / 2)
+                self.stdout.write(self.style.WARNING(
+                    f"--max-interval limited to {max_interval:g}s (STATUS_SNAPSHOT_MAX_AGE is {snapshot_max_age}s)"
+                ))
+            
+            self.adaptive = AdaptiveInterval(
+                options['min_interval'], max_interval,
+                default_interval=self.interval, band_interval=self.interval
+            )
+            self.stdout.write(f"Adaptive interval enabled ({options['min_interval']}-{max_interval:g}s)")
+        
         # Initialize hardware controller
         self.controller = HardwareController()
         
+        # Optional push subscription - feeds the controller snapshot and wakes the loop
+        if options['subscribe'] and not isinstance(self.controller.client, EVOKClient):
+            self.stdout.write(self.style.WARNING('--subscribe needs the EVOK transport, polling instead'))
+        elif options['subscribe']:
+            self.subscription = EVOKSubscription(client=self.controller.client)
+            if self.subscription.start():
+                self.controller.subscription = self.subscription
+                self.stdout.write('EVOK WebSocket subscription enabled')
+            else:
+                self.subscription = None
+        
         # Log startup
         SystemLog.objects.create(
             level='info',
@@ -68,63 +131,108 @@ class Command(BaseCommand):
         self.stdout.write('Synchronizing relay states on startup...')
         self.controller.sync_relay_states()
         
-        # Main monitoring loop
-        last_sync_time = time.time()
+        # Main monitoring loop - every task runs at its own rate
+        self.scheduler = self._create_scheduler()
         
         try:
             while self.running:
-                loop_start = time.time()
+                self.scheduler.run_pending()
                 
-                try:
-                    # Main control logic
-                    self._monitoring_cycle()
-                    
-                    # Periodic relay state sync
-                    if (time.time() - last_sync_time) >= self.sync_interval:
-                        self.stdout.write('Performing periodic relay state sync...')
-                        self.controller.sync_relay_states()
-                        last_sync_time = time.time()
-                    
-                except Exception as e:
-                    error_msg = f"Error in monitoring cycle: {e}"
-                    logger.error(error_msg)
-                    SystemLog.objects.create(
-                        level='error',
-                        message=error_msg,
-                        component='monitor'
-                    )
+                # Deferred relay commands whose cooldown has expired
+                if self.controller.run_due_actuations():
+                    self._publish_status()
                 
-                # Sleep for the remaining interval time
-                loop_duration = time.time() - loop_start
-                sleep_time = max(0, self.interval - loop_duration)
+                # Sleep until the next task or deferred relay command is due
+                timeout = self.scheduler.next_due_in()
+                due_in = self.controller.actuations_due_in()
+                if due_in is not None:
+                    timeout = min(timeout, due_in)
                 
-                if sleep_time > 0:
-                    time.sleep(sleep_time)
+                if timeout > 0 and self._wait(timeout):
+                    self.scheduler.run_now('control')
                 
         except KeyboardInterrupt:
             self.stdout.write(self.style.WARNING('Received interrupt signal'))
         
         self._shutdown()
     
+    def _create_scheduler(self):
+        """Register the monitor tasks with their periods and deadlines"""
+        tasks = settings.BANDASKAPP_CONFIG.get('MONITOR_TASKS', {})
+        heating_control = tasks.get('heating_control', {'period': 1, 'deadline': 0.5})
+        aux_sensors = tasks.get('aux_sensors', {'period': 60, 'deadline': 10})
+        
+        scheduler = TaskScheduler()
+        scheduler.add(
+            'control',
+            self.adaptive.interval if self.adaptive is not None else self.interval,
+            self._control_task,
+            deadline=tasks.get('control', {}).get('deadline')
+        )
+        scheduler.add(
+            'heating_control',
+            heating_control['period'],
+            self._check_heating_control,
+            deadline=heating_control.get('deadline')
+        )
+        scheduler.add(
+            'aux_sensors',
+            aux_sensors['period'],
+            self._update_aux_sensors,
+            deadline=aux_sensors.get('deadline')
+        )
+        scheduler.add('relay_sync', self.sync_interval, self._sync_relays, delay=self.sync_interval)
+        scheduler.add(
+            'commands',
+            settings.BANDASKAPP_CONFIG.get('COMMAND_POLL_INTERVAL', 0.5),
+            self._process_changes
+        )
+        return scheduler
+    
+    def _control_task(self):
+        """Control cycle task, recording failures as system events"""
+        try:
+            self._monitoring_cycle()
+        except Exception as e:
+            error_msg = f"Error in monitoring cycle: {e}"
+            logger.error(error_msg)
+            SystemLog.objects.create(
+                level='error',
+                message=error_msg,
+                component='monitor'
+            )
+    
     def _monitoring_cycle(self):
-        """Execute one monitoring cycle"""
+        """Execute one control cycle: control sensors, control logic and status"""
         
         # Import configuration
         from django.conf import settings
         config = settings.BANDASKAPP_CONFIG
         
-        # Check API connectivity
+        # Check API connectivity (passively, from the outcome of recent requests)
         if not self.controller.check_api_connectivity():
-            logger.warning("EVOK API connectivity issues detected")
+            logger.warning("Hardware connectivity issues detected")
             return
         
-        # Update all temperature sensors from hardware
-        update_results = self.controller.update_all_sensors()
+        # One bulk read of all devices (or the live subscription map) serves
+        # every read of the cycle; per-circuit reads only happen if it fails.
+        # System state, sensors, relays and the heating control input are
+        # loaded once; system state is only reloaded when another process
+        # changed it.
+        self.changes.poll()
+        ctx = self.controller.load_cycle_context(
+            refresh=True,
+            reload_state=self.changes.consume_state_change()
+        )
+        
+        # Update the control temperature sensors from hardware
+        control_sensor_ids = self.controller.control_sensor_ids()
+        update_results = self.controller.update_all_sensors(ctx, circuit_ids=control_sensor_ids)
         
         # Log the results
         for i, thermometer in enumerate(config['THERMOMETERS']):
-            if thermometer['label'] == 'NONE':
-                continue  # Skip disabled sensors
+            if thermometer['label'] == 'NONE' or thermometer['id'] not in control_sensor_ids:
+                continue  # Skip disabled and auxiliary sensors
                 
             temp_key = f'temp_{i+1}'
             if update_results.get(temp_key) is not None:
@@ -132,30 +240,39 @@ class Command(BaseCommand):
             else:
                 logger.debug(f"{thermometer['label']} sensor is unavailable")
         
-        # Get updated status after sensor updates
-        status = self.controller.get_system_status()
-        
         # Execute furnace control logic (using the configured control sensor)
         control_sensor_id = config.get('CONTROL_DHW_ID')
+        control_action = False
         if control_sensor_id and control_sensor_id != 'NONE':
-            # Find the control sensor in the thermometers list
-            control_sensor_temp = None
-            for i, thermometer in enumerate(config['THERMOMETERS']):
-                if thermometer['id'] == control_sensor_id:
-                    control_sensor_temp = status.get(f'temp_{i+1}')
-                    break
+            control_sensor_temp = ctx.temperature(control_sensor_id)
             
             if control_sensor_temp is not None:
-                control_action = self.controller.control_furnace()
-                if control_action:
-                    status = self.controller.get_system_status()
-                    furnace_state = "ON" if status.get('furnace_running') else "OFF"
-                    logger.info(f"Furnace control action: {furnace_state}")
+                control_action = self.controller.control_furnace(ctx)
             else:
                 logger.debug(f"Skipping furnace control - Control sensor {control_sensor_id} is unavailable")
         else:
             logger.debug("Skipping furnace control - No control sensor configured")
         
+        # Single status for the cycle, built from the context after control,
+        # published for the web processes
+        status = self.controller.get_system_status(ctx)
+        self._publish_status(status)
+        
+        # Poll faster while a control temperature approaches a switching point
+        if self.adaptive is not None:
+            bands = self._control_bands(ctx)
+            interval = self.adaptive.update(
+                {circuit_id: ctx.temperature(circuit_id) for circuit_id in bands}, bands
+            )
+            if self.controller.relay_write_failed:
+                # Retry a failed relay write soon, not after an idle backoff
+                interval = self.adaptive.min_interval
+            self.scheduler.set_period('control', interval)
+            logger.debug(f"Next monitoring cycle in {interval:.1f}s")
+        if control_action:
+            furnace_state = "ON" if status.get('furnace_running') else "OFF"
+            logger.info(f"Furnace control action: {furnace_state}")
+        
         # Log system status periodically (every 10 cycles)
         if hasattr(self, '_cycle_count'):
             self._cycle_count += 1
@@ -163,7 +280,6 @@ class Command(BaseCommand):
             self._cycle_count = 1
         
         if self._cycle_count % 10 == 0:
-            status = self.controller.get_system_status()
             enabled_sensors = []
             
             # Build sensor status from generic temperature keys
@@ -181,6 +297,152 @@ class Command(BaseCommand):
                        f"Furnace={status.get('furnace_running')}, "
                        f"Pump={status.get('pump_running')}, "
                        f"Sensors: {sensor_status}")
+            
+            for host, pool_stats in get_shared_pool_stats().items():
+                logger.info(f"EVOK connection pool {host}: {pool_stats['requests']} requests over "
+                           f"{pool_stats['connections_opened']} connections "
+                           f"({pool_stats['keep_alive_reuses']} keep-alive reuses)")
+            
+            if isinstance(self.controller.client, EVOKClient):
+                health = self.controller.client.health.stats()
+                if health['requests']:
+                    latency = health['median_latency']
+                    logger.info(f"EVOK health: {health['requests']} requests in the last "
+                               f"{self.controller.client.health.window}s, "
+                               f"{health['success_rate']:.0%} successful"
+                               + (f", median latency {latency * 1000:.0f} ms" if latency is not None else ""))
+            
+            for name, task_stats in self.scheduler.stats().items():
+                if task_stats['overruns'] or task_stats['skipped']:
+                    logger.info(f"Task {name}: {task_stats['runs']} runs, {task_stats['overruns']} overruns, "
+                               f"{task_stats['skipped']} skipped periods, "
+                               f"max duration {task_stats['max_duration']:.2f}s")
+    
+    def _control_bands(self, ctx):
+        """Hysteresis bands (low, high) of the sensors driving control in the current regime"""
+        config = settings.BANDASKAPP_CONFIG
+        system_state = ctx.system_state
+        bands = {}
+        
+        if config.get('CONTROL_DHW_ID', 'NONE') != 'NONE':
+            bands[config['CONTROL_DHW_ID']] = (system_state.dhw_temp_low, system_state.dhw_temp_high)
+        
+        # HHW only matters in the winter regime
+        if system_state.winter_regime_state != 'off' and config.get('CONTROL_HHW_ID', 'NONE') != 'NONE':
+            bands[config['CONTROL_HHW_ID']] = (system_state.hhw_temp_low, system_state.hhw_temp_high)
+        
+        return bands
+    
+    def _check_heating_control(self):
+        """Start a control cycle as soon as the heating control unit input changes"""
+        if self.subscription is not None and self.subscription.connected:
+            return  # Pushed input changes already wake the loop
+        
+        state = self.controller.read_heating_control_input()
+        if state is None:
+            return
+        
+        if self.heating_control_state is not None and state != self.heating_control_state:
+            logger.info(f"Heating control unit input changed to {'ON' if state else 'OFF'}, starting control cycle")
+            self.scheduler.run_now('control')
+        self.heating_control_state = state
+    
+    def _update_aux_sensors(self):
+        """Update the sensors not used for control from the bulk read of all devices"""
+        control_sensor_ids = self.controller.control_sensor_ids()
+        circuit_ids = [
+            thermometer['id'] for thermometer in settings.BANDASKAPP_CONFIG['THERMOMETERS']
+            if thermometer['label'] != 'NONE' and thermometer['id'] not in control_sensor_ids
+        ]
+        if not circuit_ids:
+            return
+        
+        # Reuse the control cycle's bulk read while it is fresh
+        if not self.controller.snapshot_fresh():
+            self.controller.refresh_snapshot()
+        self.controller.update_sensors(circuit_ids)
+    
+    def _sync_relays(self):
+        """Periodic relay state reconciliation"""
+        self.stdout.write('Performing periodic relay state sync...')
+        self.controller.sync_relay_states()
+    
+    def _process_changes(self):
+        """Execute relay commands queued by the web and react to settings changes"""
+        # Nothing to look at unless another process committed something
+        self.changes.poll()
+        changed = self.changes.consume_database_change() and self.controller.process_relay_commands() > 0
+        
+        # Settings changed from the web (mode, regime, thresholds)
+        if self.changes.consume_state_change():
+            self._evaluate_control()
+        elif changed:
+            # Keep the published status current between cycles
+            self._publish_status()
+    
+    def _evaluate_control(self):
+        """
+        Out-of-band control evaluation after a settings change from the web,
+        using the sensor values of the last cycle
+        """
+        logger.info("System state changed, evaluating control")
+        ctx = self.controller.load_cycle_context()
+        
+        if ctx.temperature(settings.BANDASKAPP_CONFIG.get('CONTROL_DHW_ID')) is not None:
+            self.controller.control_furnace(ctx)
+        
+        self._publish_status(self.controller.get_system_status(ctx))
+    
+    def _publish_status(self, status=None):
+        """Publish the system status snapshot read by the web processes"""
+        if status is None:
+            status = self.controller.get_system_status()
+        if 'error' not in status:
+            self.status_snapshot.publish(status)
+    
+    def _wait(self, timeout):
+        """
+        Sleep up to timeout, waking early on significant pushed changes
+        
+        Returns:
+            True if woken early by a change that needs a control cycle
+        """
+        if self.subscription is None or not self.subscription.connected:
+            time.sleep(timeout)
+            return False
+        
+        deadline = time.time() + timeout
+        while self.running:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            
+            changes = self.subscription.wait_for_change(remaining)
+            if any(self._is_significant_change(*change) for change in changes):
+                logger.info("Pushed change requires control evaluation, starting cycle early")
+                return True
+        return False
+    
+    def _is_significant_change(self, key, old_value, new_value):
+        """Check if a pushed change can alter a control decision"""
+        config = settings.BANDASKAPP_CONFIG
+        dev, circuit = key
+        
+        # Heating control unit request changed
+        if dev == 'di' and circuit == config['HEATING_CONTROL_UNIT_ID']:
+            return True
+        
+        if dev != 'temp' or old_value is None or new_value is None:
+            return False
+        
+        # Control temperature crossed one of the hysteresis thresholds
+        thresholds = []
+        if circuit == config['CONTROL_DHW_ID']:
+            thresholds += [self.controller.dhw_temp_low, self.controller.dhw_temp_high]
+        if circuit == config['CONTROL_HHW_ID']:
+            thresholds += [self.controller.hhw_temp_low, self.controller.hhw_temp_high]
+        
+        return any((old_value < threshold) != (new_value < threshold) for threshold in thresholds)
     
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals"""
@@ -192,6 +454,9 @@ class Command(BaseCommand):
         """Perform graceful shutdown"""
         self.stdout.write(self.style.SUCCESS('Shutting down BandaskApp monitoring...'))
         
+        if self.subscription is not None:
+            self.subscription.stop()
+        
         # Log shutdown
         SystemLog.objects.create(
             level='info',
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_systemstate_hhw_temp_high_systemstate_hhw_temp_low_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelayCommand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('manual_furnace_on', 'Furnace ON'), ('manual_furnace_off', 'Furnace OFF'), ('pump_on', 'Pump ON'), ('pump_off', 'Pump OFF'), ('sync_relays', 'Relay state sync')], help_text='Requested action', max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed'), ('expired', 'Expired')], default='pending', help_text='Execution status', max_length=10)),
+                ('message', models.TextField(blank=True, help_text='Result or error message')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, help_text='When the monitor finished the command', null=True)),
+            ],
+            options={
+                'db_table': 'relay_commands',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='relay_comma_status_b85023_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_relaycommand'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='systemstate',
+            name='version',
+            field=models.PositiveIntegerField(default=0, help_text='Incremented on every save (change detection)'),
+        ),
+    ]
@@ -82,6 +82,7 @@ class SystemState(models.Model):
         default='automatic',
         help_text="Winter regime state"
     )
+    version = models.PositiveIntegerField(default=0, help_text="Incremented on every save (change detection)")
     last_update = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -94,7 +95,21 @@ class SystemState(models.Model):
     def save(self, *args, **kwargs):
         # Ensure only one instance exists (singleton pattern)
         self.pk = 1
+        
+        if self._state.adding and not SystemState.objects.filter(pk=1).exists():
+            self.version = 1
+            super().save(*args, **kwargs)
+            return
+            
+        # Lets the monitor see settings changes without reloading the row;
+        # incremented in the database rather than from this (possibly stale)
+        # copy, so concurrent saves never end up with the same version
+        self.version = models.F('version') + 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'version', 'last_update'}
         super().save(*args, **kwargs)
+        self.refresh_from_db(fields=['version'])
     
     def delete(self, *args, **kwargs):
         # Prevent deletion of singleton
@@ -143,4 +158,37 @@ class SystemLog(models.Model):
         ]
     
     def __str__(self):
-        return f"[{self.level.upper()}] {self.message[:50]}..."
\ No newline at end of file
+        return f"[{self.level.upper()}] {self.message[:50]}..."
+
+class RelayCommand(models.Model):
+    """Relay command queued by the web interface and executed by the monitor process"""
+    ACTIONS = [
+        ('manual_furnace_on', 'Furnace ON'),
+        ('manual_furnace_off', 'Furnace OFF'),
+        ('pump_on', 'Pump ON'),
+        ('pump_off', 'Pump OFF'),
+        ('sync_relays', 'Relay state sync'),
+    ]
+    
+    STATUSES = [
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+        ('expired', 'Expired'),
+    ]
+    
+    action = models.CharField(max_length=20, choices=ACTIONS, help_text="Requested action")
+    status = models.CharField(max_length=10, choices=STATUSES, default='pending', help_text="Execution status")
+    message = models.TextField(blank=True, help_text="Result or error message")
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True, help_text="When the monitor finished the command")
+    
+    class Meta:
+        db_table = 'relay_commands'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_action_display()} ({self.status})"
\ No newline at end of file
@@ -0,0 +1,162 @@
+"""
+Compact v2 status representation served by /api/v2/status/
+
+{
+    "version": 53,
+    "system": {"control_mode": "automatic", "furnace_running": true, ...},
+    "thresholds": {"dhw": {"low": 45.0, "high": 60.0}, "hhw": {...}},
+    "sensors": [{"id": "28AA8C7F481401C8", "label": "DHW Top", "value": 38.9, "online": true}, ...]
+}
+
+The sensor layout is computed once from THERMOMETERS; payloads are built
+once per snapshot version and kept for a few versions so delta responses
+can be computed against what a client already has.
+"""
+import threading
+from collections import OrderedDict
+from typing import Optional, Iterable
+from django.conf import settings
+
+SYSTEM_FIELDS = (
+    'control_mode', 'winter_regime_state', 'furnace_running', 'pump_running',
+    'heating_controller_state', 'api_connected',
+)
+TOP_LEVEL_FIELDS = ('version', 'system', 'thresholds', 'sensors')
+SENSOR_FIELDS = ('id', 'label', 'value', 'online')
+
+# Payloads of recent versions kept for delta responses
+PAYLOAD_HISTORY = 32
+
+class StatusV2Schema:
+    """Sensor layout of the v2 status, precomputed from THERMOMETERS"""
+    
+    def __init__(self, thermometers: Iterable[dict]):
+        # (circuit ID, label, status temperature key, status online key)
+        self.sensors = tuple(
+            (thermometer['id'], thermometer['label'], f'temp_{i+1}', f'sensor_{i+1}_online')
+            for i, thermometer in enumerate(thermometers)
+            if thermometer['label'] != 'NONE'
+        )
+    
+    def build(self, status: dict) -> dict:
+        """
+        Build the v2 payload from a system status
+        
+        Args:
+            status: Status from get_current_status()
+            
+        Returns:
+            JSON-serializable v2 status
+        """
+        system = {field: status.get(field) for field in SYSTEM_FIELDS}
+        last_reading = status.get('last_reading')
+        system['last_reading'] = last_reading.isoformat() if last_reading else None
+        
+        return {
+            'version': status.get('snapshot_version'),
+            'system': system,
+            'thresholds': {
+                'dhw': status.get('dhw_temp_thresholds'),
+                'hhw': status.get('hhw_temp_thresholds'),
+            },
+            'sensors': [
+                {'id': circuit_id, 'label': label, 'value': status.get(temp_key), 'online': status.get(online_key, False)}
+                for circuit_id, label, temp_key, online_key in self.sensors
+            ],
+        }
+
+def delta(old: dict, new: dict) -> dict:
+    """
+    Parts of a v2 payload that changed since an older one
+    
+    Returns:
+        Payload with the version, the changed system / thresholds keys and
+        the sensors whose entry changed
+    """
+    result = {'version': new['version']}
+    for section in ('system', 'thresholds'):
+        changed = {key: value for key, value in new[section].items() if old[section].get(key) != value}
+        if changed:
+            result[section] = changed
+            
+    sensors = [sensor for sensor, old_sensor in zip(new['sensors'], old['sensors']) if sensor != old_sensor]
+    if sensors:
+        result['sensors'] = sensors
+    return result
+
+def parse_fields(fields: Optional[str]):
+    """
+    Parse a ?fields= selection such as 'system,sensors.value'
+    
+    Returns:
+        (top-level fields, sensor attributes) - None for no restriction
+        
+    Raises:
+        ValueError: for unknown fields
+    """
+    if not fields:
+        return None, None
+        
+    top_level = set()
+    sensor_fields = set()
+    for field in fields.split(','):
+        field = field.strip()
+        if field.startswith('sensors.') and field[len('sensors.'):] in SENSOR_FIELDS:
+            top_level.add('sensors')
+            sensor_fields.add(field[len('sensors.'):])
+        elif field in TOP_LEVEL_FIELDS:
+            top_level.add(field)
+        else:
+            valid = ', '.join(TOP_LEVEL_FIELDS + tuple(f'sensors.{name}' for name in SENSOR_FIELDS))
+            raise ValueError(f"Unknown field '{field}' (valid: {valid})")
+            
+    return top_level, sensor_fields or None
+
+def select_fields(payload: dict, top_level, sensor_fields) -> dict:
+    """Restrict a payload to the fields from parse_fields() (the version is always kept)"""
+    if top_level is None:
+        return payload
+        
+    result = {key: value for key, value in payload.items() if key in top_level or key not in TOP_LEVEL_FIELDS}
+    result['version'] = payload['version']
+    if sensor_fields and 'sensors' in result:
+        keep = ('id',) + tuple(name for name in SENSOR_FIELDS if name in sensor_fields and name != 'id')
+        result['sensors'] = [{key: sensor[key] for key in keep} for sensor in result['sensors']]
+    return result
+
+# Process-wide schema and recent payloads
+_schema = None
+_payloads = OrderedDict()
+_lock = threading.Lock()
+
+def get_schema() -> StatusV2Schema:
+    """Return the process-wide schema, built from settings on first use"""
+    global _schema
+    
+    with _lock:
+        if _schema is None:
+            _schema = StatusV2Schema(settings.BANDASKAPP_CONFIG['THERMOMETERS'])
+        return _schema
+
+def get_payload(status: dict) -> dict:
+    """Build (or reuse) the v2 payload of a status, remembering it by version"""
+    version = status.get('snapshot_version')
+    if version is None:
+        return get_schema().build(status)
+        
+    with _lock:
+        payload = _payloads.get(version)
+    if payload is not None:
+        return payload
+        
+    payload = get_schema().build(status)
+    with _lock:
+        _payloads[version] = payload
+        while len(_payloads) > PAYLOAD_HISTORY:
+            _payloads.popitem(last=False)
+    return payload
+
+def get_cached_payload(version: int) -> Optional[dict]:
+    """Payload of a recent version or None if it is not (or no longer) known"""
+    with _lock:
+        return _payloads.get(version)
@@ -1,3 +1,318 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+
+from django.conf import settings
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import status_v2
+from core.history import get_sensor_history, lttb
+from core.models import SystemState, TemperatureLog, TemperatureSensor
+from core.views import get_current_status
+from core.websocket import websocket_application
+
+class SystemStateVersionTests(TestCase):
+    """Change-detection version of the SystemState singleton"""
+    
+    def test_version_starts_at_one(self):
+        self.assertEqual(SystemState.load().version, 1)
+    
+    def test_saves_from_stale_copies_get_distinct_versions(self):
+        SystemState.load()
+        web = SystemState.load()
+        monitor = SystemState.load()
+        
+        web.dhw_temp_low = 40.0
+        web.save()
+        monitor.save(update_fields=['winter_regime_state'])
+        
+        self.assertEqual(web.version, 2)
+        self.assertEqual(monitor.version, 3)
+        self.assertEqual(SystemState.load().version, 3)
+    
+    def test_update_fields_keeps_newer_settings(self):
+        stale = SystemState.load()
+        fresh = SystemState.load()
+        fresh.dhw_temp_high = 70.0
+        fresh.save()
+        
+        stale.winter_regime_state = 'on'
+        stale.save(update_fields=['winter_regime_state'])
+        
+        state = SystemState.load()
+        self.assertEqual(state.dhw_temp_high, 70.0)
+        self.assertEqual(state.winter_regime_state, 'on')
+
+@override_settings(DEBUG=False, ALLOWED_HOSTS=['bandaskapp.local', '127.0.0.1'])
+class WebSocketOriginTests(TestCase):
+    """Cross-site WebSocket handshakes to /ws/ are refused"""
+    
+    async def handshake(self, origin):
+        headers = [(b'host', b'bandaskapp.local:8000')]
+        if origin is not None:
+            headers.append((b'origin', origin.encode()))
+        incoming = [{'type': 'websocket.connect'}, {'type': 'websocket.disconnect', 'code': 1000}]
+        sent = []
+        
+        async def receive():
+            return incoming.pop(0)
+        
+        async def send(message):
+            sent.append(message)
+            
+        await websocket_application({'type': 'websocket', 'path': '/ws/', 'headers': headers}, receive, send)
+        return sent[0]['type']
+    
+    async def test_allowed_origin_is_accepted(self):
+        self.assertEqual(await self.handshake('http://bandaskapp.local:8000'), 'websocket.accept')
+        self.assertEqual(await self.handshake('http://127.0.0.1:8000'), 'websocket.accept')
+    
+    async def test_foreign_origin_is_rejected(self):
+        self.assertEqual(await self.handshake('http://evil.example'), 'websocket.close')
+    
+    async def test_missing_origin_is_rejected(self):
+        self.assertEqual(await self.handshake(None), 'websocket.close')
+
+class CurrentStatusTests(TestCase):
+    """Web status comes from the monitor's snapshot, direct reads only without one"""
+    
+    @mock.patch('core.views.HardwareController')
+    @mock.patch('core.views.get_status_snapshot')
+    def test_snapshot_is_served(self, get_status_snapshot, controller):
+        get_status_snapshot.return_value.read.return_value = {'furnace_running': True, 'snapshot_version': 7}
+        self.assertEqual(get_current_status()['snapshot_version'], 7)
+        controller.assert_not_called()
+    
+    @mock.patch('core.views.HardwareController')
+    @mock.patch('core.views.get_status_snapshot')
+    def test_missing_or_stale_snapshot_falls_back_to_direct_reads(self, get_status_snapshot, controller):
+        get_status_snapshot.return_value.read.return_value = None
+        controller.return_value.get_system_status.return_value = {'furnace_running': False}
+        self.assertEqual(get_current_status(), {'furnace_running': False})
+
+class FakeSnapshot:
+    """Stand-in for the monitor's StatusSnapshot, returning the given versions in turn"""
+    
+    def __init__(self, *versions):
+        self.versions = list(versions)
+        self.version = self.versions.pop(0)
+    
+    def current_version(self, max_age=None):
+        if self.versions:
+            self.version = self.versions.pop(0)
+        return self.version
+    
+    def read(self, max_age=None):
+        if self.version is None:
+            return None
+        return {'furnace_running': self.version % 2 == 0, 'control_mode': 'automatic', 'snapshot_version': self.version}
+
+@mock.patch.dict(settings.BANDASKAPP_CONFIG, {'STATUS_LONG_POLL_TIMEOUT': 0.05, 'STATUS_STREAM_POLL_INTERVAL': 0.01})
+class StatusApiTests(TestCase):
+    """/api/status/ ETag, 304 and ?since= long-polling"""
+    
+    def get(self, snapshot, **kwargs):
+        with mock.patch('core.views.get_status_snapshot', return_value=snapshot):
+            return self.client.get(reverse('core:api_status'), **kwargs)
+    
+    def test_etag_and_not_modified(self):
+        response = self.get(FakeSnapshot(42))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['version'], 42)
+        self.assertEqual(response['ETag'], '"42"')
+        
+        response = self.get(FakeSnapshot(42), HTTP_IF_NONE_MATCH='"42"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.get(FakeSnapshot(43), HTTP_IF_NONE_MATCH='"42"').status_code, 200)
+    
+    def test_since_current_version_times_out_with_304(self):
+        response = self.get(FakeSnapshot(42), data={'since': 42})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], '"42"')
+    
+    def test_since_returns_when_a_new_version_is_published(self):
+        response = self.get(FakeSnapshot(42, 42, 43), data={'since': 42})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['version'], 43)
+    
+    def test_since_older_or_from_another_epoch_returns_at_once(self):
+        for since in (41, 10 ** 13):
+            with self.subTest(since=since):
+                response = self.get(FakeSnapshot(42), data={'since': since})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()['version'], 42)
+    
+    def test_invalid_since(self):
+        self.assertEqual(self.get(FakeSnapshot(42), data={'since': 'abc'}).status_code, 400)
+    
+    @mock.patch('core.views.HardwareController')
+    def test_without_snapshot_no_etag(self, controller):
+        controller.return_value.get_system_status.return_value = {'furnace_running': False}
+        response = self.get(FakeSnapshot(None), data={'since': 42})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()['version'])
+        self.assertFalse(response.has_header('ETag'))
+
+class StatusV2ApiTests(TestCase):
+    """/api/v2/status/ field selection and deltas"""
+    
+    def setUp(self):
+        status_v2._payloads.clear()
+    
+    def get(self, snapshot, **params):
+        with mock.patch('core.views.get_status_snapshot', return_value=snapshot):
+            return self.client.get(reverse('core:api_status_v2'), params)
+    
+    def test_full_payload(self):
+        payload = self.get(FakeSnapshot(42)).json()
+        self.assertEqual(payload['version'], 42)
+        self.assertTrue(payload['system']['furnace_running'])
+        self.assertEqual(set(payload), {'version', 'system', 'thresholds', 'sensors'})
+        self.assertEqual(
+            [sensor['id'] for sensor in payload['sensors']],
+            [thermometer['id'] for thermometer in settings.BANDASKAPP_CONFIG['THERMOMETERS']
+             if thermometer['label'] != 'NONE']
+        )
+    
+    def test_fields(self):
+        payload = self.get(FakeSnapshot(42), fields='system,sensors.value').json()
+        self.assertEqual(set(payload), {'version', 'system', 'sensors'})
+        self.assertEqual(set(payload['sensors'][0]), {'id', 'value'})
+        
+        response = self.get(FakeSnapshot(42), fields='bogus')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_delta_against_known_version(self):
+        self.get(FakeSnapshot(42))
+        payload = self.get(FakeSnapshot(43), delta=42).json()
+        self.assertTrue(payload['delta'])
+        self.assertEqual(payload['base'], 42)
+        self.assertEqual(payload['system'], {'furnace_running': False})
+        self.assertNotIn('thresholds', payload)
+        self.assertNotIn('sensors', payload)
+    
+    def test_delta_against_unknown_version_is_full(self):
+        payload = self.get(FakeSnapshot(43), delta=7).json()
+        self.assertFalse(payload['delta'])
+        self.assertIn('sensors', payload)
+    
+    def test_not_modified(self):
+        with mock.patch('core.views.get_status_snapshot', return_value=FakeSnapshot(42)):
+            response = self.client.get(reverse('core:api_status_v2'), HTTP_IF_NONE_MATCH='"42"')
+        self.assertEqual(response.status_code, 304)
+
+@mock.patch.dict(settings.BANDASKAPP_CONFIG, {'STATUS_STREAM_MAX_DURATION': 0.1, 'STATUS_STREAM_POLL_INTERVAL': 0.01})
+class StatusStreamTests(TestCase):
+    """Server-Sent Events status stream under WSGI and ASGI"""
+    
+    def test_wsgi_streams_synchronously(self):
+        with mock.patch('core.views.get_status_snapshot', return_value=FakeSnapshot(42, 42, 43)):
+            response = self.client.get(reverse('core:api_status_stream'))
+            self.assertFalse(response.is_async)
+            content = b''.join(response.streaming_content).decode()
+            
+        self.assertTrue(content.startswith('retry: '))
+        events = [block for block in content.split('\n\n') if block.startswith('id: ')]
+        self.assertTrue(events[0].startswith('id: 42\nevent: status\n'))
+        self.assertTrue(events[1].startswith('id: 43\nevent: delta\ndata: {"furnace_running": false, "timestamp": '))
+        self.assertEqual(len(events), 2)
+    
+    def test_resume_with_last_event_id_skips_the_full_status(self):
+        with mock.patch('core.views.get_status_snapshot', return_value=FakeSnapshot(42, 42, 43)):
+            response = self.client.get(reverse('core:api_status_stream'), HTTP_LAST_EVENT_ID='42')
+            content = b''.join(response.streaming_content).decode()
+            
+        events = [block for block in content.split('\n\n') if block.startswith('id: ')]
+        self.assertEqual(len(events), 1)
+        self.assertTrue(events[0].startswith('id: 43\nevent: status\n'))
+    
+    async def test_asgi_streams_asynchronously(self):
+        with mock.patch('core.views.get_status_snapshot', return_value=FakeSnapshot(42)):
+            response = await AsyncClient().get(reverse('core:api_status_stream'))
+            self.assertTrue(response.is_async)
+            content = ''.join([chunk.decode() async for chunk in response.streaming_content])
+            
+        self.assertIn('id: 42\nevent: status\n', content)
+
+class LttbTests(TestCase):
+    """Largest-Triangle-Three-Buckets downsampling"""
+    
+    def test_keeps_endpoints_and_point_count(self):
+        x = np.arange(1000, dtype=np.float64)
+        y = np.sin(x / 50)
+        selected = lttb(x, y, 100)
+        
+        self.assertEqual(len(selected), 100)
+        self.assertEqual(selected[0], 0)
+        self.assertEqual(selected[-1], 999)
+        self.assertTrue(np.all(np.diff(selected) > 0))
+    
+    def test_keeps_peaks_and_valleys(self):
+        x = np.arange(500, dtype=np.float64)
+        y = np.full(500, 40.0)
+        y[123] = 75.0
+        y[321] = 5.0
+        selected = lttb(x, y, 20)
+        
+        self.assertIn(123, selected)
+        self.assertIn(321, selected)
+    
+    def test_short_series_is_returned_whole(self):
+        x = np.arange(10, dtype=np.float64)
+        self.assertEqual(list(lttb(x, x, 10)), list(range(10)))
+        self.assertEqual(list(lttb(x, x, 50)), list(range(10)))
+        self.assertEqual(list(lttb(x, x, 2)), list(range(10)))
+
+class HistoryTests(TestCase):
+    """Temperature history windows and /api/history/"""
+    
+    def setUp(self):
+        self.sensor = TemperatureSensor.objects.create(name='DHW Top', circuit_id='28AA8C7F481401C8')
+        self.end = timezone.now().replace(microsecond=0)
+        # One reading a minute for the last 10 minutes (value = minutes ago)
+        for minutes in range(10, -1, -1):
+            log = TemperatureLog.objects.create(sensor=self.sensor, value=float(minutes))
+            TemperatureLog.objects.filter(pk=log.pk).update(timestamp=self.end - timedelta(minutes=minutes))
+    
+    def test_window_bounds_are_inclusive(self):
+        times, values, count = get_sensor_history(
+            self.sensor, self.end - timedelta(minutes=5), self.end - timedelta(minutes=2), 100
+        )
+        self.assertEqual(count, 4)
+        self.assertEqual(list(values), [5.0, 4.0, 3.0, 2.0])
+        self.assertEqual(times[0], (self.end - timedelta(minutes=5)).timestamp())
+        self.assertTrue(np.all(np.diff(times) > 0))
+    
+    def test_api_downsamples_to_points(self):
+        response = self.client.get(reverse('core:api_history'), {
+            'start': (self.end - timedelta(minutes=10)).isoformat(),
+            'end': self.end.isoformat(),
+            'points': 5,
+            'sensors': self.sensor.circuit_id,
+        })
+        series = response.json()['sensors'][self.sensor.circuit_id]
+        self.assertEqual(series['count'], 11)
+        self.assertEqual(len(series['t']), 5)
+        self.assertEqual(series['v'][0], 10.0)
+        self.assertEqual(series['v'][-1], 0.0)
+        self.assertEqual(series['t'][-1], int(self.end.timestamp() * 1000))
+    
+    def test_api_window_ending_now(self):
+        response = self.client.get(reverse('core:api_history'), {'window': 150, 'points': 100})
+        series = response.json()['sensors'][self.sensor.circuit_id]
+        self.assertEqual(series['v'], [2.0, 1.0, 0.0])
+    
+    def test_api_clamps_points(self):
+        response = self.client.get(reverse('core:api_history'), {'window': 3600, 'points': 1})
+        data = response.json()
+        self.assertEqual(data['points'], 3)
+        self.assertEqual(len(data['sensors'][self.sensor.circuit_id]['t']), 3)
+    
+    def test_api_rejects_invalid_windows(self):
+        for params in ({'window': 'abc'}, {'start': 'yesterday'},
+                       {'start': self.end.isoformat(), 'end': (self.end - timedelta(minutes=1)).isoformat()}):
+            with self.subTest(params):
+                self.assertEqual(self.client.get(reverse('core:api_history'), params).status_code, 400)
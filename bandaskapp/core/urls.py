@@ -9,6 +9,10 @@ urlpatterns = [
     path('settings/', views.settings_view, name='settings'),
     path('api/settings/', views.settings_api, name='settings_api'),
     path('api/status/', views.api_status, name='api_status'),
+    path('api/status/stream/', views.api_status_stream, name='api_status_stream'),
+    path('api/v2/status/', views.api_status_v2, name='api_status_v2'),
+    path('api/history/', views.api_history, name='api_history'),
+    path('api/commands/<int:command_id>/', views.api_command_status, name='api_command_status'),
     path('control/', views.ControlView.as_view(), name='control'),
 ]
 
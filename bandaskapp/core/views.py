@@ -1,25 +1,42 @@
 from django.shortcuts import render, redirect
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse, HttpResponseNotModified
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.contrib import messages
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from datetime import timedelta
+import asyncio
 import json
+import time
+from asgiref.sync import sync_to_async
 
-from core.models import TemperatureSensor, Relay, SystemState, SystemLog, TemperatureLog
+from core.models import TemperatureSensor, Relay, SystemState, SystemLog, TemperatureLog, RelayCommand
 from hardware.controller import HardwareController
+from hardware.status_snapshot import get_status_snapshot
+from core import status_v2
+from core.history import get_sensor_history
+
+def get_current_status():
+    """
+    Current system status, preferably from the snapshot published by the monitor
+    
+    Falls back to querying the database and hardware directly when the monitor
+    is not running or its snapshot is stale.
+    """
+    status = get_status_snapshot().read()
+    if status is None:
+        status = HardwareController().get_system_status()
+    return status
 
 def dashboard(request):
     """Main dashboard view"""
     try:
-        # Get hardware controller
-        controller = HardwareController()
-        
-        # Get system status
-        status = controller.get_system_status()
+        # Get system status (monitor snapshot when available)
+        status = get_current_status()
         
         # Get recent system logs
         recent_logs = SystemLog.objects.order_by('-timestamp')[:10]
@@ -27,9 +44,6 @@ def dashboard(request):
         # Get configuration to check which sensors are enabled
         config = settings.BANDASKAPP_CONFIG
         
-        # Get system state for winter regime and thresholds
-        system_state = SystemState.load()
-        
         # Process thermometer configuration generically
         thermometers = []
         for i, thermometer in enumerate(config['THERMOMETERS']):
@@ -51,12 +65,12 @@ def dashboard(request):
         context = {
             'dhw_temp_low': status.get('dhw_temp_thresholds', {}).get('low', 45),
             'dhw_temp_high': status.get('dhw_temp_thresholds', {}).get('high', 60),
-            'hhw_temp_low': system_state.hhw_temp_low,
-            'hhw_temp_high': system_state.hhw_temp_high,
+            'hhw_temp_low': status.get('hhw_temp_thresholds', {}).get('low', 45),
+            'hhw_temp_high': status.get('hhw_temp_thresholds', {}).get('high', 60),
             'furnace_running': status.get('furnace_running', False),
             'pump_running': status.get('pump_running', False),
             'control_mode': status.get('control_mode', 'automatic'),
-            'winter_regime_state': system_state.winter_regime_state,
+            'winter_regime_state': status.get('winter_regime_state', 'automatic'),
             'heating_controller_state': status.get('heating_controller_state'),
             'api_connected': status.get('api_connected', False),
             'last_reading': status.get('last_reading'),
@@ -93,60 +107,131 @@ def dashboard(request):
             'control_mode': 'unknown',
         })
 
-def api_status(request):
-    """API endpoint for status updates"""
-    try:
-        controller = HardwareController()
-        status = controller.get_system_status()
-        
-        # Get configuration to check which sensors are enabled
-        config = settings.BANDASKAPP_CONFIG
-        
-        # Get system state for winter regime and thresholds
-        system_state = SystemState.load()
-        
-        # Format response with generic temperature keys
-        response_data = {
-            'dhw_temp_low': status.get('dhw_temp_thresholds', {}).get('low', 45),
-            'dhw_temp_high': status.get('dhw_temp_thresholds', {}).get('high', 60),
-            'hhw_temp_low': system_state.hhw_temp_low,
-            'hhw_temp_high': system_state.hhw_temp_high,
-            'furnace_running': status.get('furnace_running', False),
-            'pump_running': status.get('pump_running', False),
-            'control_mode': status.get('control_mode', 'automatic'),
-            'winter_regime_state': system_state.winter_regime_state,
-            'heating_controller_state': status.get('heating_controller_state'),
-            'api_connected': status.get('api_connected', False),
-            'timestamp': timezone.now().isoformat(),
-            'success': True,
-        }
+def build_status_payload(status):
+    """
+    Format a system status for the status API and stream
+    
+    Args:
+        status: Status from get_current_status()
         
-        # Add all temperature data generically
-        for i, thermometer in enumerate(config['THERMOMETERS']):
-            if thermometer['label'] == 'NONE':
-                continue
-                
-            temp_key = f'temp_{i+1}'
-            online_key = f'sensor_{i+1}_online'
+    Returns:
+        JSON-serializable dictionary with generic temperature keys
+    """
+    # Get configuration to check which sensors are enabled
+    config = settings.BANDASKAPP_CONFIG
+    
+    # Format response with generic temperature keys
+    response_data = {
+        'dhw_temp_low': status.get('dhw_temp_thresholds', {}).get('low', 45),
+        'dhw_temp_high': status.get('dhw_temp_thresholds', {}).get('high', 60),
+        'hhw_temp_low': status.get('hhw_temp_thresholds', {}).get('low', 45),
+        'hhw_temp_high': status.get('hhw_temp_thresholds', {}).get('high', 60),
+        'furnace_running': status.get('furnace_running', False),
+        'pump_running': status.get('pump_running', False),
+        'control_mode': status.get('control_mode', 'automatic'),
+        'winter_regime_state': status.get('winter_regime_state', 'automatic'),
+        'heating_controller_state': status.get('heating_controller_state'),
+        'api_connected': status.get('api_connected', False),
+        'timestamp': timezone.now().isoformat(),
+        'success': True,
+    }
+    
+    # Add all temperature data generically
+    for i, thermometer in enumerate(config['THERMOMETERS']):
+        if thermometer['label'] == 'NONE':
+            continue
             
-            response_data[temp_key] = status.get(temp_key, 0)
-            response_data[online_key] = status.get(online_key, False)
+        temp_key = f'temp_{i+1}'
+        online_key = f'sensor_{i+1}_online'
         
-        # Keep backward compatibility for existing code
-        if 'temp_1' in response_data:
-            response_data['dhw_temp'] = response_data['temp_1']
-            response_data['dhw_sensor_online'] = response_data['sensor_1_online']
-        if 'temp_2' in response_data:
-            response_data['dhw_temp_2'] = response_data['temp_2']
-            response_data['dhw_sensor_2_online'] = response_data['sensor_2_online']
-        if 'temp_3' in response_data:
-            response_data['dhw_temp_3'] = response_data['temp_3']
-            response_data['dhw_sensor_3_online'] = response_data['sensor_3_online']
+        response_data[temp_key] = status.get(temp_key, 0)
+        response_data[online_key] = status.get(online_key, False)
+    
+    # Keep backward compatibility for existing code
+    if 'temp_1' in response_data:
+        response_data['dhw_temp'] = response_data['temp_1']
+        response_data['dhw_sensor_online'] = response_data['sensor_1_online']
+    if 'temp_2' in response_data:
+        response_data['dhw_temp_2'] = response_data['temp_2']
+        response_data['dhw_sensor_2_online'] = response_data['sensor_2_online']
+    if 'temp_3' in response_data:
+        response_data['dhw_temp_3'] = response_data['temp_3']
+        response_data['dhw_sensor_3_online'] = response_data['sensor_3_online']
+    
+    if status.get('last_reading'):
+        response_data['last_reading'] = status['last_reading'].isoformat()
+    
+    return response_data
+
+async def _wait_for_status_version(snapshot, since, timeout):
+    """
+    Wait until the snapshot version differs from since or the timeout passes
+    
+    A since newer than the current version (e.g. kept by a client across a
+    clock change) is stale and returns at once, like any other difference.
+    
+    Returns:
+        Current snapshot version or None if there is no current snapshot
+    """
+    poll_interval = settings.BANDASKAPP_CONFIG.get('STATUS_STREAM_POLL_INTERVAL', 0.5)
+    deadline = time.monotonic() + timeout
+    
+    version = snapshot.current_version()
+    while version is not None and version == since and time.monotonic() < deadline:
+        await asyncio.sleep(poll_interval)
+        version = snapshot.current_version()
+    return version
+
+async def api_status(request):
+    """
+    API endpoint for status updates
+    
+    Responses carry the monitor's status snapshot version as 'version' and as
+    ETag; a request whose If-None-Match matches gets 304 Not Modified.
+    ?since=<version> long-polls until the version changes or
+    STATUS_LONG_POLL_TIMEOUT passes (then 304); versions embed the snapshot's
+    epoch, so one from before a reboot is answered at once. The view is
+    asynchronous so waiting clients do not hold the thread shared by
+    synchronous views.
+    """
+    try:
+        snapshot = get_status_snapshot()
+        since = request.GET.get('since')
         
-        if status.get('last_reading'):
-            response_data['last_reading'] = status['last_reading'].isoformat()
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                return JsonResponse({
+                    'error': 'since must be an integer status version',
+                    'success': False,
+                    'timestamp': timezone.now().isoformat(),
+                }, status=400)
+            timeout = settings.BANDASKAPP_CONFIG.get('STATUS_LONG_POLL_TIMEOUT', 25)
+            version = await _wait_for_status_version(snapshot, since, timeout)
+            if version is not None and version == since:
+                response = HttpResponseNotModified()
+                response['ETag'] = f'"{version}"'
+                return response
+        else:
+            version = snapshot.current_version()
+            
+        # Unchanged since the client's copy - nothing to build or send
+        if version is not None and f'"{version}"' in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+            response['ETag'] = f'"{version}"'
+            return response
+            
+        # Monitor snapshot when available - no database or EVOK access
+        status = await sync_to_async(get_current_status)()
+        response_data = build_status_payload(status)
+        response_data['version'] = status.get('snapshot_version')
         
-        return JsonResponse(response_data)
+        response = JsonResponse(response_data)
+        if response_data['version'] is not None:
+            response['ETag'] = f'"{response_data["version"]}"'
+        response['Cache-Control'] = 'no-cache'
+        return response
         
     except Exception as e:
         return JsonResponse({
@@ -155,193 +240,417 @@ def api_status(request):
             'timestamp': timezone.now().isoformat(),
         }, status=500)
 
-@method_decorator(csrf_exempt, name='dispatch')
-class ControlView(View):
-    """Handle control actions"""
+def api_status_v2(request):
+    """
+    Compact status API with a sensors array keyed by circuit ID (see core.status_v2)
     
-    def post(self, request):
-        try:
-            action = request.POST.get('action')
-            controller = HardwareController()
+    ?fields=system,sensors.value selects fields; ?delta=<version> returns only
+    what changed since that version ('delta': true) when it is still known,
+    otherwise the full status ('delta': false). Versions are also sent as ETag.
+    """
+    try:
+        top_level, sensor_fields = status_v2.parse_fields(request.GET.get('fields'))
+        base = request.GET.get('delta')
+        base = int(base) if base is not None else None
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+        
+    try:
+        version = get_status_snapshot().current_version()
+        if version is not None and f'"{version}"' in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+            response['ETag'] = f'"{version}"'
+            return response
             
-            if action == 'toggle_mode':
-                # Toggle between automatic and manual mode
-                system_state = SystemState.load()
-                new_mode = 'manual' if system_state.control_mode == 'automatic' else 'automatic'
-                system_state.control_mode = new_mode
-                system_state.save()
+        # Payloads are built once per snapshot version
+        payload = status_v2.get_cached_payload(version) if version is not None else None
+        if payload is None:
+            payload = status_v2.get_payload(get_current_status())
+            
+        if base is not None:
+            old = status_v2.get_cached_payload(base)
+            if old is not None and payload['version'] is not None:
+                payload = dict(status_v2.delta(old, payload), delta=True, base=base)
+            else:
+                payload = dict(payload, delta=False)
                 
-                # Log the change
-                SystemLog.objects.create(
-                    level='info',
-                    message=f'Control mode changed to {new_mode}',
-                    component='web_interface'
-                )
+        response = JsonResponse(status_v2.select_fields(payload, top_level, sensor_fields))
+        if payload['version'] is not None:
+            response['ETag'] = f'"{payload["version"]}"'
+        response['Cache-Control'] = 'no-cache'
+        return response
+        
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+def _sse_event(event, data, event_id=None):
+    """Format one Server-Sent Event"""
+    message = f'id: {event_id}\n' if event_id is not None else ''
+    return message + f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+class StatusFeed:
+    """
+    Status updates for one connected client (status stream or WebSocket)
+    
+    Watches the monitor's snapshot version and produces a full 'status' event
+    first, then 'delta' events with only the changed keys. Versions are
+    snapshot versions; a client resuming with the current version is not sent
+    the full status again. Without a current snapshot (monitor not running)
+    full status events are produced periodically.
+    """
+    
+    def __init__(self, last_version=None):
+        self.snapshot = get_status_snapshot()
+        self.fallback_interval = settings.BANDASKAPP_CONFIG.get('STATUS_STREAM_FALLBACK_INTERVAL', 10)
+        self.sent = None  # Payload the client currently has
+        self.sent_version = str(last_version) if last_version else None
+        self.next_fallback = time.monotonic()
+    
+    def poll(self):
+        """
+        Check for a newer status
+        
+        Returns:
+            (event type, data, version) or None if the client is up to date;
+            version is None for statuses not read from the snapshot
+        """
+        version = self.snapshot.current_version()
+        
+        if version is not None and str(version) != self.sent_version:
+            status = self.snapshot.read()
+            if status is None:
+                return None
                 
-                return JsonResponse({
-                    'success': True,
-                    'message': f'Control mode changed to {new_mode}',
-                    'new_mode': new_mode
-                })
+            payload = build_status_payload(status)
+            version = status['snapshot_version']
+            event = None
+            if self.sent is not None:
+                delta = {key: value for key, value in payload.items() if self.sent.get(key) != value}
+                event = ('delta', delta, version)
+            elif str(version) != self.sent_version:
+                event = ('status', payload, version)
+            self.sent = payload
+            self.sent_version = str(version)
+            return event
+            
+        if version is None and time.monotonic() >= self.next_fallback:
+            # No monitor snapshot - read the status directly at a low rate
+            payload = build_status_payload(get_current_status())
+            self.sent = payload
+            self.sent_version = None
+            self.next_fallback = time.monotonic() + self.fallback_interval
+            return ('status', payload, None)
+            
+        return None
+
+class StatusEventStream:
+    """
+    Server-Sent Events of a StatusFeed, with keepalive comments
+    
+    Iterated synchronously under WSGI (runserver) and asynchronously under
+    ASGI: Django buffers a stream completely when the iterator type does not
+    match the server, so each server gets the kind it can send as produced.
+    """
+    
+    def __init__(self, last_event_id):
+        config = settings.BANDASKAPP_CONFIG
+        self.poll_interval = config.get('STATUS_STREAM_POLL_INTERVAL', 0.5)
+        self.keepalive_interval = config.get('STATUS_STREAM_KEEPALIVE', 15)
+        self.max_duration = config.get('STATUS_STREAM_MAX_DURATION', 300)
+        self.feed = StatusFeed(last_event_id)
+        self.started = self.last_message = time.monotonic()
+    
+    def retry_message(self):
+        """Reconnect delay for the browser"""
+        # Streams end after max_duration so workers are recycled, the client
+        # resumes via Last-Event-ID
+        return f'retry: {int(self.poll_interval * 2000)}\n\n'
+    
+    def running(self):
+        """Whether the stream is still within max_duration"""
+        return time.monotonic() - self.started < self.max_duration
+    
+    def message(self, event):
+        """Text to send for a polled event (or a keepalive when due), else None"""
+        if event is not None:
+            self.last_message = time.monotonic()
+            return _sse_event(*event)
+        if time.monotonic() - self.last_message >= self.keepalive_interval:
+            self.last_message = time.monotonic()
+            return ': keepalive\n\n'
+        return None
+    
+    def __iter__(self):
+        yield self.retry_message()
+        while self.running():
+            message = self.message(self.feed.poll())
+            if message is not None:
+                yield message
+            time.sleep(self.poll_interval)
+    
+    async def __aiter__(self):
+        yield self.retry_message()
+        while self.running():
+            message = self.message(await sync_to_async(self.feed.poll)())
+            if message is not None:
+                yield message
+            await asyncio.sleep(self.poll_interval)
+
+async def api_status_stream(request):
+    """Server-Sent Events stream of status changes published by the monitor"""
+    stream = StatusEventStream(request.headers.get('Last-Event-ID', ''))
+    response = StreamingHttpResponse(
+        stream.__aiter__() if isinstance(request, ASGIRequest) else iter(stream),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def perform_control_action(action, data):
+    """
+    Execute a control action from the web interface (POST /control/ or the WebSocket)
+    
+    Args:
+        action: Action name (toggle_mode, cycle_winter_regime, update_thresholds
+            or a RelayCommand action, which is queued for the monitor)
+        data: Mapping with the action parameters (e.g. dhw_low for update_thresholds)
+        
+    Returns:
+        (response dictionary, HTTP status code)
+    """
+    try:
+        if action == 'toggle_mode':
+            # Toggle between automatic and manual mode (from the row, not the
+            # snapshot - a stale snapshot would undo a toggle made since)
+            system_state = SystemState.load()
+            new_mode = 'manual' if system_state.control_mode == 'automatic' else 'automatic'
+            system_state.control_mode = new_mode
+            system_state.save(update_fields=['control_mode'])
+            
+            # Log the change
+            SystemLog.objects.create(
+                level='info',
+                message=f'Control mode changed to {new_mode}',
+                component='web_interface'
+            )
+            
+            return {
+                'success': True,
+                'message': f'Control mode changed to {new_mode}',
+                'new_mode': new_mode
+            }, 200
+            
+        elif action in dict(RelayCommand.ACTIONS):
+            # Relay writes are executed by the monitor process, the web
+            # request only queues them (api/commands/<id>/ or the WebSocket
+            # report the result)
+            command = RelayCommand.objects.create(action=action)
+            return {
+                'success': True,
+                'message': f'{command.get_action_display()} command queued',
+                'command_id': command.id,
+                'status': command.status,
+            }, 200
+            
+        elif action == 'cycle_winter_regime':
+            # Cycle through winter regime states
+            system_state = SystemState.load()
+            current_state = system_state.winter_regime_state
+            
+            # Cycle: off -> automatic -> on -> off
+            if current_state == 'off':
+                new_state = 'automatic'
+            elif current_state == 'automatic':
+                new_state = 'on'
+            else:  # 'on'
+                new_state = 'off'
+            
+            system_state.winter_regime_state = new_state
+            system_state.save(update_fields=['winter_regime_state'])
+            
+            # Log the change
+            SystemLog.objects.create(
+                level='info',
+                message=f'Winter regime state changed to {new_state}',
+                component='web_interface'
+            )
+            
+            return {
+                'success': True,
+                'message': f'Winter regime state changed to {new_state}',
+                'new_state': new_state
+            }, 200
+            
+        elif action == 'update_thresholds':
+            # Update temperature thresholds
+            try:
+                dhw_low = float(data.get('dhw_low', 45))
+                dhw_high = float(data.get('dhw_high', 60))
+                hhw_low = float(data.get('hhw_low', 45))
+                hhw_high = float(data.get('hhw_high', 60))
                 
-            elif action == 'manual_furnace_on':
-                # Manually turn furnace ON
-                success = controller.manual_control_furnace(True)
-                if success:
-                    return JsonResponse({
-                        'success': True,
-                        'message': 'Furnace turned ON manually'
-                    })
-                else:
-                    return JsonResponse({
-                        'success': False,
-                        'error': 'Failed to turn furnace ON'
-                    }, status=500)
-                    
-            elif action == 'manual_furnace_off':
-                # Manually turn furnace OFF
-                success = controller.manual_control_furnace(False)
-                if success:
-                    return JsonResponse({
-                        'success': True,
-                        'message': 'Furnace turned OFF manually'
-                    })
-                else:
-                    return JsonResponse({
+                # Validate DHW thresholds
+                if dhw_low >= dhw_high:
+                    return {
                         'success': False,
-                        'error': 'Failed to turn furnace OFF'
-                    }, status=500)
-                    
-            elif action == 'pump_on':
-                # Manually turn pump ON
-                success = controller.manual_control_pump(True)
-                if success:
-                    return JsonResponse({
-                        'success': True,
-                        'message': 'Pump turned ON manually'
-                    })
-                else:
-                    return JsonResponse({
+                        'error': 'DHW low threshold must be less than high threshold'
+                    }, 400
+                
+                # Validate HHW thresholds
+                if hhw_low >= hhw_high:
+                    return {
                         'success': False,
-                        'error': 'Failed to turn pump ON'
-                    }, status=500)
-                    
-            elif action == 'pump_off':
-                # Manually turn pump OFF
-                success = controller.manual_control_pump(False)
-                if success:
-                    return JsonResponse({
-                        'success': True,
-                        'message': 'Pump turned OFF manually'
-                    })
-                else:
-                    return JsonResponse({
+                        'error': 'HHW low threshold must be less than high threshold'
+                    }, 400
+                
+                if dhw_low < 20 or dhw_high > 80 or hhw_low < 20 or hhw_high > 80:
+                    return {
                         'success': False,
-                        'error': 'Failed to turn pump OFF'
-                    }, status=500)
-                    
-            elif action == 'sync_relays':
-                # Synchronize relay states
-                controller.sync_relay_states()
-                return JsonResponse({
-                    'success': True,
-                    'message': 'Relay states synchronized'
-                })
+                        'error': 'Temperature thresholds must be between 20°C and 80°C'
+                    }, 400
                 
-            elif action == 'cycle_winter_regime':
-                # Cycle through winter regime states
+                # Update system state
                 system_state = SystemState.load()
-                current_state = system_state.winter_regime_state
-                
-                # Cycle: off -> automatic -> on -> off
-                if current_state == 'off':
-                    new_state = 'automatic'
-                elif current_state == 'automatic':
-                    new_state = 'on'
-                else:  # 'on'
-                    new_state = 'off'
-                
-                system_state.winter_regime_state = new_state
-                system_state.save()
+                system_state.dhw_temp_low = dhw_low
+                system_state.dhw_temp_high = dhw_high
+                system_state.hhw_temp_low = hhw_low
+                system_state.hhw_temp_high = hhw_high
+                system_state.save(update_fields=['dhw_temp_low', 'dhw_temp_high', 'hhw_temp_low', 'hhw_temp_high'])
                 
                 # Log the change
                 SystemLog.objects.create(
                     level='info',
-                    message=f'Winter regime state changed to {new_state}',
+                    message=f'Temperature thresholds updated: DHW {dhw_low}°C-{dhw_high}°C, HHW {hhw_low}°C-{hhw_high}°C',
                     component='web_interface'
                 )
                 
-                return JsonResponse({
+                return {
                     'success': True,
-                    'message': f'Winter regime state changed to {new_state}',
-                    'new_state': new_state
-                })
+                    'message': f'Temperature thresholds updated: DHW {dhw_low}°C-{dhw_high}°C, HHW {hhw_low}°C-{hhw_high}°C'
+                }, 200
                 
-            elif action == 'update_thresholds':
-                # Update temperature thresholds
-                try:
-                    dhw_low = float(request.POST.get('dhw_low', 45))
-                    dhw_high = float(request.POST.get('dhw_high', 60))
-                    hhw_low = float(request.POST.get('hhw_low', 45))
-                    hhw_high = float(request.POST.get('hhw_high', 60))
-                    
-                    # Validate DHW thresholds
-                    if dhw_low >= dhw_high:
-                        return JsonResponse({
-                            'success': False,
-                            'error': 'DHW low threshold must be less than high threshold'
-                        }, status=400)
-                    
-                    # Validate HHW thresholds
-                    if hhw_low >= hhw_high:
-                        return JsonResponse({
-                            'success': False,
-                            'error': 'HHW low threshold must be less than high threshold'
-                        }, status=400)
-                    
-                    if dhw_low < 20 or dhw_high > 80 or hhw_low < 20 or hhw_high > 80:
-                        return JsonResponse({
-                            'success': False,
-                            'error': 'Temperature thresholds must be between 20°C and 80°C'
-                        }, status=400)
-                    
-                    # Update system state
-                    system_state = SystemState.load()
-                    system_state.dhw_temp_low = dhw_low
-                    system_state.dhw_temp_high = dhw_high
-                    system_state.hhw_temp_low = hhw_low
-                    system_state.hhw_temp_high = hhw_high
-                    system_state.save()
-                    
-                    # Log the change
-                    SystemLog.objects.create(
-                        level='info',
-                        message=f'Temperature thresholds updated: DHW {dhw_low}°C-{dhw_high}°C, HHW {hhw_low}°C-{hhw_high}°C',
-                        component='web_interface'
-                    )
-                    
-                    return JsonResponse({
-                        'success': True,
-                        'message': f'Temperature thresholds updated: DHW {dhw_low}°C-{dhw_high}°C, HHW {hhw_low}°C-{hhw_high}°C'
-                    })
-                    
-                except ValueError:
-                    return JsonResponse({
-                        'success': False,
-                        'error': 'Invalid temperature values'
-                    }, status=400)
-            
-            else:
-                return JsonResponse({
+            except ValueError:
+                return {
                     'success': False,
-                    'error': f'Unknown action: {action}'
-                }, status=400)
-                
-        except Exception as e:
-            return JsonResponse({
+                    'error': 'Invalid temperature values'
+                }, 400
+        
+        else:
+            return {
                 'success': False,
-                'error': str(e)
-            }, status=500)
+                'error': f'Unknown action: {action}'
+            }, 400
+            
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }, 500
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ControlView(View):
+    """Handle control actions"""
+    
+    def post(self, request):
+        result, status = perform_control_action(request.POST.get('action'), request.POST)
+        return JsonResponse(result, status=status)
+
+def command_status_payload(command):
+    """Execution status of a queued relay command as a JSON-serializable dictionary"""
+    return {
+        'success': True,
+        'command_id': command.id,
+        'action': command.action,
+        'status': command.status,
+        'message': command.message,
+        'created_at': command.created_at.isoformat(),
+        'completed_at': command.completed_at.isoformat() if command.completed_at else None,
+    }
+
+def api_command_status(request, command_id):
+    """API endpoint reporting the execution status of a queued relay command"""
+    try:
+        command = RelayCommand.objects.get(pk=command_id)
+    except RelayCommand.DoesNotExist:
+        return JsonResponse({
+            'success': False,
+            'error': f'Command {command_id} not found'
+        }, status=404)
+        
+    return JsonResponse(command_status_payload(command))
+
+def _parse_history_window(params):
+    """
+    Time window of a history request: ?start=&end= (ISO 8601) or ?window=<seconds> ending now
+    
+    Raises:
+        ValueError: for invalid parameters
+    """
+    end = parse_datetime(params['end']) if params.get('end') else timezone.now()
+    if end is None:
+        raise ValueError('end must be an ISO 8601 date/time')
+        
+    if params.get('start'):
+        start = parse_datetime(params['start'])
+        if start is None:
+            raise ValueError('start must be an ISO 8601 date/time')
+    else:
+        window = float(params.get('window', settings.BANDASKAPP_CONFIG.get('HISTORY_DEFAULT_WINDOW', 3600)))
+        start = end - timedelta(seconds=window)
+        
+    if timezone.is_naive(start):
+        start = timezone.make_aware(start)
+    if timezone.is_naive(end):
+        end = timezone.make_aware(end)
+    if start >= end:
+        raise ValueError('start must be before end')
+    return start, end
+
+def api_history(request):
+    """
+    API endpoint for temperature history, downsampled for graphs
+    
+    ?window=<seconds> (or ?start=&end=) selects the time window, ?points=<n>
+    the number of points per sensor (the pixel width of the graph) and
+    ?sensors=<circuit ID>,... the sensors (default: all active). Each series
+    is downsampled with LTTB; 't' holds Unix timestamps in milliseconds.
+    """
+    config = settings.BANDASKAPP_CONFIG
+    try:
+        start, end = _parse_history_window(request.GET)
+        points = int(request.GET.get('points', config.get('HISTORY_DEFAULT_POINTS', 300)))
+        points = max(3, min(points, config.get('HISTORY_MAX_POINTS', 2000)))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+        
+    try:
+        sensors = TemperatureSensor.objects.filter(is_active=True)
+        if request.GET.get('sensors'):
+            sensors = sensors.filter(circuit_id__in=request.GET['sensors'].split(','))
+            
+        series = {}
+        for sensor in sensors:
+            times, values, count = get_sensor_history(sensor, start, end, points)
+            series[sensor.circuit_id] = {
+                'name': sensor.name,
+                'count': count,
+                't': (times * 1000).round().astype(int).tolist(),
+                'v': values.round(2).tolist(),
+            }
+            
+        response = JsonResponse({
+            'success': True,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'points': points,
+            'sensors': series,
+        })
+        response['Cache-Control'] = 'no-cache'
+        return response
+        
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 def logs(request):
     """System logs view"""
@@ -374,11 +683,8 @@ def logs(request):
 def settings_view(request):
     """Settings view"""
     try:
-        system_state = SystemState.load()
-        
-        # Get hardware controller for current status
-        controller = HardwareController()
-        status = controller.get_system_status()
+        # Current status (monitor snapshot when available)
+        status = get_current_status()
         
         # Get configuration for hardware circuit IDs
         config = settings.BANDASKAPP_CONFIG
@@ -397,7 +703,6 @@ def settings_view(request):
             })
         
         context = {
-            'system_state': system_state,
             # Add hardware status for the hardware values card
             'dhw_temp': status.get('dhw_temperature', 0),
             'dhw_temp_2': status.get('dhw_temperature_2', 0),
@@ -0,0 +1,136 @@
+"""
+WebSocket endpoint (/ws/) carrying live status and control commands
+
+Server to client:
+    {"type": "status", "data": {...}, "version": 12}  full status (as /api/status/)
+    {"type": "delta", "data": {...}, "version": 13}   changed keys only
+    {"type": "control_result", "id": ..., "status": 200, "data": {...}}
+    {"type": "command", "data": {...}}                relay command outcome (as /api/commands/<id>/)
+
+Client to server:
+    {"type": "control", "id": ..., "action": "update_thresholds", "dhw_low": 45, ...}
+"""
+import asyncio
+import json
+import logging
+from urllib.parse import urlsplit
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http.request import split_domain_port, validate_host
+
+from core.models import RelayCommand
+from core.views import StatusFeed, perform_control_action, command_status_payload
+
+logger = logging.getLogger(__name__)
+
+async def websocket_application(scope, receive, send):
+    """ASGI application for one WebSocket connection"""
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    if not origin_allowed(scope):
+        logger.warning(f"Rejected WebSocket connection from origin {_header(scope, b'origin')!r}")
+        await send({'type': 'websocket.close', 'code': 1008})
+        return
+    await send({'type': 'websocket.accept'})
+    
+    send_lock = asyncio.Lock()
+    
+    async def send_json(data):
+        async with send_lock:
+            await send({'type': 'websocket.send', 'text': json.dumps(data)})
+            
+    tasks = set()
+    pusher = asyncio.create_task(_push_status(send_json))
+    try:
+        while True:
+            message = await receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+            if message['type'] == 'websocket.receive' and message.get('text'):
+                task = asyncio.create_task(_handle_message(message['text'], send_json))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+    finally:
+        pusher.cancel()
+        for task in tasks:
+            task.cancel()
+
+def _header(scope, name):
+    """Value of a request header of an ASGI scope or None"""
+    for key, value in scope.get('headers', []):
+        if key.lower() == name:
+            return value.decode('latin1')
+    return None
+
+def origin_allowed(scope):
+    """
+    Check the Origin of a WebSocket handshake against ALLOWED_HOSTS
+    
+    Browsers apply no same-origin policy to WebSockets, so without this check
+    any page open in the kiosk browser could send control commands. Handshakes
+    without an Origin header are rejected as well.
+    """
+    origin = _header(scope, b'origin')
+    if not origin:
+        return False
+        
+    host, _ = split_domain_port(urlsplit(origin).netloc.lower())
+    if not host:
+        return False
+        
+    # Same defaults as Django's Host header validation
+    allowed_hosts = settings.ALLOWED_HOSTS
+    if settings.DEBUG and not allowed_hosts:
+        allowed_hosts = ['.localhost', '127.0.0.1', '[::1]']
+    return validate_host(host, allowed_hosts)
+
+async def _push_status(send_json):
+    """Send status updates as the monitor publishes them"""
+    feed = StatusFeed()
+    poll_interval = settings.BANDASKAPP_CONFIG.get('STATUS_STREAM_POLL_INTERVAL', 0.5)
+    
+    while True:
+        try:
+            event = await sync_to_async(feed.poll)()
+            if event is not None:
+                event_type, data, version = event
+                await send_json({'type': event_type, 'data': data, 'version': version})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error pushing status over WebSocket: {e}")
+        await asyncio.sleep(poll_interval)
+
+async def _handle_message(text, send_json):
+    """Execute a control message and report its result"""
+    try:
+        request = json.loads(text)
+    except ValueError:
+        await send_json({'type': 'error', 'error': 'Invalid JSON'})
+        return
+        
+    if not isinstance(request, dict) or request.get('type') != 'control':
+        await send_json({'type': 'error', 'error': 'Unsupported message'})
+        return
+        
+    result, status = await sync_to_async(perform_control_action)(request.get('action'), request)
+    await send_json({'type': 'control_result', 'id': request.get('id'), 'status': status, 'data': result})
+    
+    # Relay commands run in the monitor - push their outcome instead of having
+    # the client poll for it
+    if result.get('command_id'):
+        await _report_command(result['command_id'], send_json)
+
+async def _report_command(command_id, send_json):
+    """Wait for the monitor to execute a queued relay command and send its outcome"""
+    config = settings.BANDASKAPP_CONFIG
+    poll_interval = config.get('COMMAND_POLL_INTERVAL', 0.5)
+    deadline = asyncio.get_running_loop().time() + config.get('COMMAND_TIMEOUT', 30) + poll_interval * 4
+    
+    while True:
+        command = await sync_to_async(RelayCommand.objects.get)(pk=command_id)
+        if command.status != 'pending' or asyncio.get_running_loop().time() >= deadline:
+            await send_json({'type': 'command', 'data': command_status_payload(command)})
+            return
+        await asyncio.sleep(poll_interval)
@@ -228,7 +228,7 @@ Type=simple
 User=$USER
 WorkingDirectory=$(pwd)
 Environment=PATH=$(pwd)/venv/bin
-ExecStart=$(pwd)/venv/bin/python manage.py runserver 0.0.0.0:8000
+ExecStart=$(pwd)/venv/bin/uvicorn bandaskapp.asgi:application --host 0.0.0.0 --port 8000
 Restart=always
 RestartSec=10
 StandardOutput=journal
@@ -0,0 +1,82 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Optional, List, Tuple
+
+class ActuationScheduler:
+    """
+    Deferred relay commands keyed by relay, fired when their cooldown expires
+    
+    Only the latest desired state per relay is kept; rescheduling a relay
+    replaces its pending command. Times are time.monotonic() values.
+    """
+    
+    def __init__(self):
+        self._pending = {}  # relay circuit ID -> (due, sequence, state)
+        self._heap = []  # (due, sequence, relay circuit ID), stale entries skipped lazily
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+    
+    def schedule(self, relay_id: str, state: bool, due: float) -> None:
+        """
+        Queue a relay state to be applied at a monotonic time
+        
+        Args:
+            relay_id: Relay circuit ID
+            state: Desired relay state
+            due: time.monotonic() value at which the command may be applied
+        """
+        with self._lock:
+            sequence = next(self._sequence)
+            self._pending[relay_id] = (due, sequence, state)
+            heapq.heappush(self._heap, (due, sequence, relay_id))
+    
+    def cancel(self, relay_id: str) -> None:
+        """Drop the pending command of a relay, e.g. after a direct write"""
+        with self._lock:
+            self._pending.pop(relay_id, None)
+    
+    def pending(self, relay_id: str) -> Optional[bool]:
+        """Pending state of a relay or None"""
+        with self._lock:
+            entry = self._pending.get(relay_id)
+            return entry[2] if entry is not None else None
+    
+    def next_due(self) -> Optional[float]:
+        """Monotonic time of the earliest pending command or None"""
+        with self._lock:
+            self._discard_stale()
+            return self._heap[0][0] if self._heap else None
+    
+    def pop_due(self, now: float = None) -> List[Tuple[str, bool]]:
+        """
+        Remove and return the commands that are due
+        
+        Args:
+            now: Current time.monotonic() value (defaults to now)
+            
+        Returns:
+            List of (relay circuit ID, state) in due order
+        """
+        if now is None:
+            now = time.monotonic()
+            
+        due = []
+        with self._lock:
+            self._discard_stale()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, relay_id = heapq.heappop(self._heap)
+                _, _, state = self._pending.pop(relay_id)
+                due.append((relay_id, state))
+                self._discard_stale()
+        return due
+    
+    def _discard_stale(self) -> None:
+        """Pop heap entries that were replaced or cancelled (lock held)"""
+        while self._heap:
+            due, sequence, relay_id = self._heap[0]
+            entry = self._pending.get(relay_id)
+            if entry is not None and entry[1] == sequence:
+                return
+            heapq.heappop(self._heap)
@@ -0,0 +1,102 @@
+import time
+from typing import Optional, Dict, Tuple
+
+class AdaptiveInterval:
+    """
+    Monitoring interval that shrinks as a control temperature nears a switching point
+    
+    For every control sensor the time until it can reach one of its hysteresis
+    thresholds is estimated from the distance to the threshold and the recent
+    rate of change (exponentially smoothed); the next interval is a fraction of
+    the shortest such time, clamped to [min_interval, max_interval]. While a
+    temperature is inside its hysteresis band the interval never exceeds
+    band_interval (the regular fixed interval), so adapting can only speed up
+    control near switching points, never slow it down.
+    """
+    
+    def __init__(self, min_interval: float, max_interval: float, default_interval: float = None,
+                 band_interval: float = None, safety_factor: float = 0.5, min_rate: float = 0.05,
+                 smoothing: float = 0.5):
+        """
+        Args:
+            min_interval: Shortest interval in seconds
+            max_interval: Longest interval in seconds
+            default_interval: Interval while no control temperature is known
+                (defaults to min_interval)
+            band_interval: Longest interval while a temperature is inside its
+                (low, high) band (defaults to default_interval)
+            safety_factor: Fraction of the estimated time to a threshold to wait
+            min_rate: Assumed minimum rate of change in °C/s, so a steady
+                temperature next to a threshold is still polled quickly
+            smoothing: Weight of the newest rate sample in the moving average
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.default_interval = min_interval if default_interval is None else default_interval
+        self.band_interval = self.default_interval if band_interval is None else band_interval
+        self.safety_factor = safety_factor
+        self.min_rate = min_rate
+        self.smoothing = smoothing
+        
+        self.last_samples = {}  # circuit ID -> (time.monotonic(), temperature)
+        self.rates = {}  # circuit ID -> smoothed rate of change in °C/s
+        self.interval = self._clamp(self.default_interval)
+    
+    def update(self, temperatures: Dict[str, Optional[float]],
+               thresholds: Dict[str, Tuple[float, float]], now: float = None) -> float:
+        """
+        Record the latest control temperatures and compute the next interval
+        
+        Args:
+            temperatures: Circuit ID -> current temperature (None if unavailable)
+            thresholds: Circuit ID -> (low, high) band of the sensors that
+                currently drive control decisions
+            now: Current time.monotonic() value (defaults to now)
+            
+        Returns:
+            Seconds until the next monitoring cycle
+        """
+        if now is None:
+            now = time.monotonic()
+            
+        time_to_threshold = None
+        in_band = False
+        for circuit_id, (low, high) in thresholds.items():
+            temp = temperatures.get(circuit_id)
+            if temp is None:
+                continue
+                
+            in_band = in_band or low <= temp <= high
+            rate = self._update_rate(circuit_id, temp, now)
+            for threshold in (low, high):
+                # Speed towards this threshold, never below the assumed minimum
+                approach_rate = rate if threshold > temp else -rate
+                seconds = abs(temp - threshold) / max(approach_rate, self.min_rate)
+                if time_to_threshold is None or seconds < time_to_threshold:
+                    time_to_threshold = seconds
+                    
+        if time_to_threshold is None:
+            self.interval = self._clamp(self.default_interval)
+        else:
+            self.interval = self._clamp(time_to_threshold * self.safety_factor)
+            
+        # Never slower than the fixed interval while a switching point is near
+        if in_band:
+            self.interval = min(self.interval, self.band_interval)
+        return self.interval
+    
+    def _update_rate(self, circuit_id: str, temp: float, now: float) -> float:
+        """Fold a new reading into the smoothed rate of change of a sensor"""
+        last = self.last_samples.get(circuit_id)
+        self.last_samples[circuit_id] = (now, temp)
+        if last is None or now <= last[0]:
+            return self.rates.get(circuit_id, 0.0)
+            
+        sample_rate = (temp - last[1]) / (now - last[0])
+        rate = self.rates.get(circuit_id)
+        rate = sample_rate if rate is None else self.smoothing * sample_rate + (1 - self.smoothing) * rate
+        self.rates[circuit_id] = rate
+        return rate
+    
+    def _clamp(self, interval: float) -> float:
+        return min(self.max_interval, max(self.min_interval, interval))
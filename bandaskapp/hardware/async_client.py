@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import time
+from typing import Optional, Dict, Any, Iterable
+from django.conf import settings
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp not installed - controller falls back to sequential reads
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+class AsyncEVOKClient:
+    """
+    Asyncio client for EVOK API with bounded concurrent circuit reads
+    
+    Given the breaker, health and latency trackers of the shared EVOKClient,
+    requests go through the same circuit breaker and their outcomes count
+    towards the same health and timeout statistics.
+    """
+    
+    def __init__(self, base_url: str = None, max_concurrency: int = None, timeout: float = 5,
+                 breaker=None, health=None, latency=None):
+        # Use configuration from settings if not provided
+        if base_url is None:
+            base_url = settings.BANDASKAPP_CONFIG['EVOK_BASE_URL']
+        if max_concurrency is None:
+            max_concurrency = settings.BANDASKAPP_CONFIG.get('EVOK_MAX_CONCURRENCY', 4)
+            
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.last_error = None
+        self.breaker = breaker
+        self.health = health
+        self.latency = latency
+        
+        # Created lazily so they bind to the running event loop
+        self._session = None
+        self._semaphore = None
+    
+    @staticmethod
+    def is_available() -> bool:
+        """Check if the aiohttp library is installed"""
+        return aiohttp is not None
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    async def close(self) -> None:
+        """Close the underlying HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    async def get_temperature(self, circuit_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Read temperature from a sensor
+        
+        Args:
+            circuit_id: EVOK circuit ID for the temperature sensor
+            
+        Returns:
+            Dictionary with temperature data or None on error
+        """
+        return await self._request('GET', f"/json/temp/{circuit_id}", f"reading temperature sensor {circuit_id}")
+    
+    async def get_relay_state(self, circuit_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Read relay state
+        
+        Args:
+            circuit_id: EVOK circuit ID for the relay
+            
+        Returns:
+            Dictionary with relay state or None on error
+        """
+        return await self._request('GET', f"/json/ro/{circuit_id}", f"reading relay {circuit_id}")
+    
+    async def set_relay_state(self, circuit_id: str, value: bool) -> Optional[Dict[str, Any]]:
+        """
+        Set relay state
+        
+        Args:
+            circuit_id: EVOK circuit ID for the relay
+            value: True for ON, False for OFF
+            
+        Returns:
+            Dictionary with result or None on error
+        """
+        data = await self._request(
+            'POST', f"/json/ro/{circuit_id}", f"setting relay {circuit_id}", {"value": int(value)}
+        )
+        
+        if data is not None:
+            if data.get('success'):
+                state = "ON" if value else "OFF"
+                logger.info(f"Relay {circuit_id} set to {state}")
+            else:
+                logger.error(f"Failed to set relay {circuit_id}: {data}")
+                
+        return data
+    
+    async def get_digital_input(self, circuit_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Read digital input state
+        
+        Args:
+            circuit_id: EVOK circuit ID for the digital input
+            
+        Returns:
+            Dictionary with digital input data or None on error
+        """
+        return await self._request('GET', f"/json/di/{circuit_id}", f"reading digital input {circuit_id}")
+    
+    async def get_temperatures(self, circuit_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Read several temperature sensors concurrently
+        
+        Args:
+            circuit_ids: EVOK circuit IDs of the temperature sensors
+            
+        Returns:
+            Dictionary mapping circuit ID to temperature data (None on error)
+        """
+        circuit_ids = list(circuit_ids)
+        results = await asyncio.gather(*(self.get_temperature(circuit_id) for circuit_id in circuit_ids))
+        return dict(zip(circuit_ids, results))
+    
+    async def _request(self, method: str, path: str, action: str, payload: dict = None) -> Optional[Dict[str, Any]]:
+        """Perform one request within the concurrency limit, returning None on error"""
+        if self.breaker is not None and not self.breaker.allow_request():
+            self.last_error = f"EVOK unreachable (circuit breaker open), skipped {action}"
+            logger.debug(self.last_error)
+            return None
+            
+        # Same endpoint keys as EVOKClient, e.g. "GET temp"
+        parts = path.strip('/').split('/')
+        endpoint = f"{method} {parts[1] if len(parts) > 2 else parts[-1]}"
+        
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"Accept": "application/json", "Content-Type": "application/json"},
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            
+        try:
+            async with self._semaphore:
+                started = time.monotonic()
+                async with self._session.request(method, f"{self.base_url}{path}", json=payload) as response:
+                    elapsed = time.monotonic() - started
+                    if self.latency is not None:
+                        self.latency.record(endpoint, elapsed)
+                    response.raise_for_status()
+                    data = await response.json()
+                    
+            self._record(True, elapsed)
+            self.last_error = None
+            return data
+            
+        except asyncio.TimeoutError:
+            if self.latency is not None:
+                self.latency.record(endpoint, self.timeout)
+            self._record(False)
+            error_msg = f"Timeout {action}"
+            logger.error(error_msg)
+            self.last_error = error_msg
+            return None
+            
+        except aiohttp.ClientConnectionError:
+            self._record(False)
+            error_msg = f"Connection error {action}"
+            logger.error(error_msg)
+            self.last_error = error_msg
+            return None
+            
+        except aiohttp.ClientResponseError as e:
+            # EVOK answered - only server errors count against its availability
+            if e.status >= 500:
+                self._record(False)
+            else:
+                self._record(True, elapsed)
+            error_msg = f"HTTP error {action}: {e}"
+            logger.error(error_msg)
+            self.last_error = error_msg
+            return None
+            
+        except Exception as e:
+            self._record(False)
+            error_msg = f"Unexpected error {action}: {e}"
+            logger.error(error_msg)
+            self.last_error = error_msg
+            return None
+    
+    def _record(self, success: bool, latency: float = None) -> None:
+        """Report a request outcome to the shared breaker and health tracker"""
+        if self.breaker is not None:
+            if success:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+        if self.health is not None:
+            self.health.record(success, latency)
+    
+    def get_last_error(self) -> Optional[str]:
+        """Get the last error message"""
+        return self.last_error
@@ -0,0 +1,73 @@
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+class _InFlightRead:
+    """A read currently being performed, shared with concurrent callers"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+class ReadCache:
+    """
+    Short-TTL read-through cache that coalesces concurrent identical reads
+    
+    While a read for a key is in flight, other callers for the same key wait
+    for its result instead of issuing their own request (single-flight).
+    Failed reads (None) are shared with the waiting callers but not cached.
+    """
+    
+    def __init__(self, ttl: float = 1.0):
+        self.ttl = ttl
+        self._entries = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, loading it at most once concurrently
+        
+        Args:
+            key: Cache key, e.g. ('temp', circuit_id)
+            loader: Function performing the actual read
+            
+        Returns:
+            Cached or freshly loaded value
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+                
+            read = self._in_flight.get(key)
+            leader = read is None
+            if leader:
+                read = self._in_flight[key] = _InFlightRead()
+                
+        if not leader:
+            read.done.wait()
+            return read.result
+            
+        try:
+            read.result = loader()
+        finally:
+            with self._lock:
+                if read.result is not None and self.ttl > 0:
+                    self._entries[key] = (time.monotonic() + self.ttl, read.result)
+                del self._in_flight[key]
+            read.done.set()
+            
+        return read.result
+    
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, e.g. a device state learned from a bulk read or a write"""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+    
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a cached value"""
+        with self._lock:
+            self._entries.pop(key, None)
@@ -0,0 +1,76 @@
+import logging
+from typing import Optional
+from django.db import connections
+
+from core.models import SystemState
+
+logger = logging.getLogger(__name__)
+
+class ChangeMonitor:
+    """
+    Detects database changes committed by other processes (the web views)
+    
+    SQLite's PRAGMA data_version changes only when another connection commits,
+    so polling it costs no table read and ignores the monitor's own writes.
+    Only when it moves is SystemState.version read to tell settings changes
+    (mode, regime, thresholds) apart from other writes such as queued commands.
+    """
+    
+    def __init__(self, using: str = 'default'):
+        self.using = using
+        self.data_version = None
+        self.state_version = None
+        
+        # Changes seen by poll() and not yet consumed (nothing is cached at start)
+        self.database_changed = True
+        self.state_changed = True
+    
+    def poll(self) -> None:
+        """Check for commits since the previous poll and record what changed"""
+        data_version = self._data_version()
+        if data_version is not None and data_version == self.data_version:
+            return
+        self.data_version = data_version
+        self.database_changed = True
+        
+        state_version = SystemState.objects.filter(pk=1).values_list('version', flat=True).first()
+        if state_version != self.state_version:
+            self.state_version = state_version
+            self.state_changed = True
+    
+    def consume_database_change(self) -> bool:
+        """
+        Return whether anything was committed since the last call and reset the flag
+        
+        Returns:
+            True if another process wrote to the database (always True on
+            backends without a data version)
+        """
+        database_changed = self.database_changed
+        self.database_changed = False
+        return database_changed
+    
+    def consume_state_change(self) -> bool:
+        """
+        Return whether SystemState changed since the last call and reset the flag
+        
+        Returns:
+            True if SystemState must be reloaded
+        """
+        state_changed = self.state_changed
+        self.state_changed = False
+        return state_changed
+    
+    def _data_version(self) -> Optional[int]:
+        """PRAGMA data_version of the monitor's connection or None if unsupported"""
+        connection = connections[self.using]
+        if connection.vendor != 'sqlite':
+            return None
+            
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA data_version')
+                return cursor.fetchone()[0]
+        except Exception as e:
+            logger.warning(f"Failed to read database data version: {e}")
+            return None
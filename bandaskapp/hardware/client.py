@@ -1,13 +1,69 @@
 import requests
 import logging
+import os
+import threading
 import time
-from typing import Optional, Dict, Any
+from requests.adapters import HTTPAdapter
+from typing import Optional, Dict, Any, List
 from django.conf import settings
 
+from .cache import ReadCache
+from .resilience import CircuitBreaker, LatencyTracker, HealthTracker
+from .transport import HardwareTransport, device_key
+
 logger = logging.getLogger(__name__)
 
-class EVOKClient:
-    """Client for communicating with EVOK API (Unipi1.1 interface)"""
+# Process-wide clients keyed by base URL (see get_shared_client)
+_shared_clients = {}
+_shared_clients_lock = threading.Lock()
+_shared_clients_pid = None
+
+def get_shared_client(base_url: str = None) -> 'EVOKClient':
+    """
+    Return the process-wide EVOKClient for a base URL, creating it on first use
+    
+    Sharing one client keeps its pooled keep-alive connections to EVOK alive
+    across web requests and monitoring cycles.
+    
+    Args:
+        base_url: EVOK API base URL (defaults to EVOK_BASE_URL from settings)
+        
+    Returns:
+        Shared EVOKClient instance
+    """
+    global _shared_clients_pid
+    
+    if base_url is None:
+        base_url = settings.BANDASKAPP_CONFIG['EVOK_BASE_URL']
+    base_url = base_url.rstrip('/')
+    
+    with _shared_clients_lock:
+        # Never reuse pooled sockets inherited from a parent process
+        if _shared_clients_pid != os.getpid():
+            _shared_clients.clear()
+            _shared_clients_pid = os.getpid()
+        
+        client = _shared_clients.get(base_url)
+        if client is None:
+            client = EVOKClient(base_url)
+            _shared_clients[base_url] = client
+        return client
+
+def get_shared_pool_stats() -> Dict[str, Dict[str, int]]:
+    """Return connection pool statistics of all shared clients, keyed by host"""
+    with _shared_clients_lock:
+        clients = list(_shared_clients.values())
+    
+    stats = {}
+    for client in clients:
+        stats.update(client.get_pool_stats())
+    return stats
+
+class EVOKClient(HardwareTransport):
+    """Client for communicating with EVOK API (Unipi1.1 interface) - the REST transport"""
+    
+    # EVOK endpoint listing every device (temp, ro, di, ...) in one response
+    ALL_DEVICES_PATH = "/rest/all"
     
     def __init__(self, base_url: str = None):
         # Use configuration from settings if no URL provided
@@ -19,6 +75,37 @@ class EVOKClient:
         self.timeout = 5
         self.last_error = None
         
+        # Keep-alive pool sized for concurrent web workers plus the monitor;
+        # no automatic retries so a dead EVOK fails within one timeout
+        pool_size = settings.BANDASKAPP_CONFIG.get('EVOK_POOL_SIZE', 4)
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        
+        # Fail fast while EVOK is unreachable and size timeouts from observed latency
+        resilience = settings.BANDASKAPP_CONFIG.get('EVOK_RESILIENCE', {})
+        self.breaker = CircuitBreaker(
+            failure_threshold=resilience.get('failure_threshold', 3),
+            reset_timeout=resilience.get('reset_timeout', 30),
+        )
+        self.latency = LatencyTracker(
+            min_timeout=resilience.get('min_timeout', 0.5),
+            max_timeout=resilience.get('max_timeout', self.timeout),
+            percentile=resilience.get('timeout_percentile', 99),
+            multiplier=resilience.get('timeout_multiplier', 3),
+        )
+        
+        # EVOK health derived from real requests, probed only when there is no traffic
+        self.health = HealthTracker(
+            window=resilience.get('health_window', 60),
+            min_success_rate=resilience.get('min_success_rate', 0.5),
+            probe_after=resilience.get('probe_after', 30),
+        )
+        
+        # Short-lived cache of reads keyed by (dev, circuit); identical concurrent
+        # reads (e.g. several browsers polling status) share one EVOK request
+        self.cache = ReadCache(ttl=settings.BANDASKAPP_CONFIG.get('EVOK_READ_CACHE_TTL', 1.0))
+        
         # Set headers for EVOK API
         self.session.headers.update({
             "Accept": "application/json",
@@ -37,40 +124,14 @@ class EVOKClient:
         Returns:
             Dictionary with temperature data or None on error
         """
-        try:
-            url = f"{self.base_url}/json/temp/{circuit_id}"
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
-            
-            data = response.json()
-            self.last_error = None
-            
+        data = self.cache.get(
+            ('temp', circuit_id),
+            lambda: self._request('GET', f"/json/temp/{circuit_id}", f"reading temperature sensor {circuit_id}")
+        )
+        
+        if data is not None:
             logger.debug(f"Temperature reading for {circuit_id}: {data.get('value')}°C")
-            return data
-            
-        except requests.exceptions.Timeout:
-            error_msg = f"Timeout reading temperature sensor {circuit_id}"
-            logger.error(error_msg)
-            self.last_error = error_msg
-            return None
-            
-        except requests.exceptions.ConnectionError:
-            error_msg = f"Connection error reading temperature sensor {circuit_id}"
-            logger.error(error_msg)
-            self.last_error = error_msg
-            return None
-            
-        except requests.exceptions.HTTPError as e:
-            error_msg = f"HTTP error reading temperature sensor {circuit_id}: {e}"
-            logger.error(error_msg)
-            self.last_error = error_msg
-            return None
-            
-        except Exception as e:
-            error_msg = f"Unexpected error reading temperature sensor {circuit_id}: {e}"
-            logger.error(error_msg)
-            self.last_error = error_msg
-            return None
+        return data
     
     def get_relay_state(self, circuit_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -82,40 +143,14 @@ class EVOKClient:
         Returns:
             Dictionary with relay state or None on error
         """
-        try:
-            url = f"{self.base_url}/json/ro/{circuit_id}"
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
-            
-            data = response.json()
-            self.last_error = None
-            
+        data = self.cache.get(
+            ('ro', circuit_id),
+            lambda: self._request('GET', f"/json/ro/{circuit_id}", f"reading relay {circuit_id}")
+        )
+        
+        if data is not None:
             logger.debug(f"Relay state for {circuit_id}: {data.get('value')}")
-            return data
-            
-        except requests.exceptions.Timeout:
-            error_msg = f"Timeout reading relay {circuit_id}"
-            logger.error(error_msg)
-            self.last_error = error_msg
-            return None
-            
-        except requests.exceptions.ConnectionError:
-            error_msg = f"Connection error reading relay {circuit_id}"
-            logger.error(error_msg)
-            self.last_error = error_msg
-            return None
-            
-        except requests.exceptions.HTTPError as e:
-            error_msg = f"HTTP error reading relay {circuit_id}: {e}"
-            logger.error(error_msg)
-            self.last_error = error_msg
-            return None
-            
-        except Exception as e:
-            error_msg = f"Unexpected error reading relay {circuit_id}: {e}"
-            logger.error(error_msg)
-            self.last_error = error_msg
-            return None
+        return data
     
     def set_relay_state(self, circuit_id: str, value: bool) -> Optional[Dict[str, Any]]:
         """
@@ -128,47 +163,19 @@ class EVOKClient:
         Returns:
             Dictionary with result or None on error
         """
-        try:
-            url = f"{self.base_url}/json/ro/{circuit_id}"
-            payload = {"value": int(value)}
-            
-            response = self.session.post(url, json=payload, timeout=self.timeout)
-            response.raise_for_status()
-            
-            data = response.json()
-            self.last_error = None
-            
+        data = self._request('POST', f"/json/ro/{circuit_id}", f"setting relay {circuit_id}", {"value": int(value)})
+        
+        # Cached reads of this relay are stale now
+        self.cache.invalidate(('ro', circuit_id))
+        self.cache.invalidate(('all', None))
+        
+        if data is not None:
             if data.get('success'):
                 state = "ON" if value else "OFF"
                 logger.info(f"Relay {circuit_id} set to {state}")
             else:
                 logger.error(f"Failed to set relay {circuit_id}: {data}")
-            
-            return data
-            
-        except requests.exceptions.Timeout:
-            error_msg = f"Timeout setting relay {circuit_id}"
-            logger.error(error_msg)
-            self.last_error = error_msg
-            return None
-            
-        except requests.exceptions.ConnectionError:
-            error_msg = f"Connection error setting relay {circuit_id}"
-            logger.error(error_msg)
-            self.last_error = error_msg
-            return None
-            
-        except requests.exceptions.HTTPError as e:
-            error_msg = f"HTTP error setting relay {circuit_id}: {e}"
-            logger.error(error_msg)
-            self.last_error = error_msg
-            return None
-            
-        except Exception as e:
-            error_msg = f"Unexpected error setting relay {circuit_id}: {e}"
-            logger.error(error_msg)
-            self.last_error = error_msg
-            return None
+        return data
     
     def test_connection(self) -> bool:
         """
@@ -177,21 +184,32 @@ class EVOKClient:
         Returns:
             True if connection is successful, False otherwise
         """
-        try:
-            # Try to get a simple endpoint
-            url = f"{self.base_url}/json/ro/1_01"  # Test with furnace relay
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
-            
-            self.last_error = None
-            logger.info("EVOK API connection test successful")
-            return True
-            
-        except Exception as e:
-            error_msg = f"EVOK API connection test failed: {e}"
+        # Try to get a simple endpoint (furnace relay)
+        if self._request('GET', "/json/ro/1_01", "testing connection") is None:
+            error_msg = f"EVOK API connection test failed: {self.last_error}"
             logger.error(error_msg)
             self.last_error = error_msg
             return False
+        
+        logger.info("EVOK API connection test successful")
+        return True
+    
+    def check_health(self) -> bool:
+        """
+        Check EVOK health from the success of recent requests
+        
+        Only probes EVOK (test_connection) when no request was made recently.
+        
+        Returns:
+            True if EVOK is considered reachable, False otherwise
+        """
+        if self.health.needs_probe():
+            return self.test_connection()
+            
+        if not self.health.is_healthy():
+            self.last_error = f"EVOK unhealthy: {self.last_error}"
+            return False
+        return True
     
     def get_digital_input(self, circuit_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -203,40 +221,14 @@ class EVOKClient:
         Returns:
             Dictionary with digital input data or None on error
         """
-        try:
-            url = f"{self.base_url}/json/di/{circuit_id}"
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
-            
-            data = response.json()
-            self.last_error = None
-            
+        data = self.cache.get(
+            ('di', circuit_id),
+            lambda: self._request('GET', f"/json/di/{circuit_id}", f"reading digital input {circuit_id}")
+        )
+        
+        if data is not None:
             logger.debug(f"Digital input state for {circuit_id}: {data.get('value')}")
-            return data
-            
-        except requests.exceptions.Timeout:
-            error_msg = f"Timeout reading digital input {circuit_id}"
-            logger.error(error_msg)
-            self.last_error = error_msg
-            return None
-            
-        except requests.exceptions.ConnectionError:
-            error_msg = f"Connection error reading digital input {circuit_id}"
-            logger.error(error_msg)
-            self.last_error = error_msg
-            return None
-            
-        except requests.exceptions.HTTPError as e:
-            error_msg = f"HTTP error reading digital input {circuit_id}: {e}"
-            logger.error(error_msg)
-            self.last_error = error_msg
-            return None
-            
-        except Exception as e:
-            error_msg = f"Unexpected error reading digital input {circuit_id}: {e}"
-            logger.error(error_msg)
-            self.last_error = error_msg
-            return None
+        return data
     
     def set_digital_input(self, circuit_id: str, value: bool) -> Optional[Dict[str, Any]]:
         """
@@ -249,49 +241,142 @@ class EVOKClient:
         Returns:
             Dictionary with result or None on error
         """
-        try:
-            url = f"{self.base_url}/json/di/{circuit_id}"
-            payload = {"value": int(value)}
-            
-            response = self.session.post(url, json=payload, timeout=self.timeout)
-            response.raise_for_status()
-            
-            data = response.json()
-            self.last_error = None
-            
+        data = self._request('POST', f"/json/di/{circuit_id}", f"setting digital input {circuit_id}", {"value": int(value)})
+        
+        # Cached reads of this input are stale now
+        self.cache.invalidate(('di', circuit_id))
+        self.cache.invalidate(('all', None))
+        
+        if data is not None:
             if data.get('success'):
                 state = "ON" if value else "OFF"
                 logger.info(f"Digital input {circuit_id} set to {state}")
             else:
                 logger.error(f"Failed to set digital input {circuit_id}: {data}")
+        return data
+    
+    def get_all(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Read every device from EVOK in a single request
+        
+        Returns:
+            List of device dictionaries (each with 'dev' and 'circuit') or None on error
+        """
+        data = self.cache.get(('all', None), self._read_all)
+        if data is None:
+            return None
+        
+        logger.debug(f"Bulk read returned {len(data)} devices")
+        return data
+    
+    def _read_all(self) -> Optional[List[Dict[str, Any]]]:
+        """Perform the bulk read and seed the per-circuit cache from it"""
+        data = self._request('GET', self.ALL_DEVICES_PATH, "reading all devices")
+        if data is None:
+            return None
+        
+        # Some EVOK versions wrap the listing as {"data": [...]}
+        if isinstance(data, dict):
+            data = data.get('data', [])
+        
+        for device in data:
+            self.cache.put(device_key(device), device)
+        return data
+    
+    def _request(self, method: str, path: str, action: str, payload: dict = None) -> Optional[Any]:
+        """
+        Send one request to EVOK through the circuit breaker
+        
+        Args:
+            method: HTTP method
+            path: URL path below the base URL
+            action: Description used in error messages (e.g. "reading relay 1_01")
+            payload: JSON body for POST requests
             
+        Returns:
+            Decoded JSON response or None on error
+        """
+        if not self.breaker.allow_request():
+            self.last_error = f"EVOK unreachable (circuit breaker open), skipped {action}"
+            logger.debug(self.last_error)
+            return None
+        
+        # Adaptive timeout per endpoint type, e.g. "GET temp", "POST ro" or "GET all"
+        parts = path.strip('/').split('/')
+        endpoint = f"{method} {parts[1] if len(parts) > 2 else parts[-1]}"
+        timeout = self.latency.timeout_for(endpoint)
+        
+        try:
+            started = time.monotonic()
+            response = self.session.request(method, f"{self.base_url}{path}", json=payload, timeout=timeout)
+            elapsed = time.monotonic() - started
+            self.latency.record(endpoint, elapsed)
+            response.raise_for_status()
+            
+            data = response.json()
+            self.breaker.record_success()
+            self.health.record(True, elapsed)
+            self.last_error = None
             return data
             
         except requests.exceptions.Timeout:
-            error_msg = f"Timeout setting digital input {circuit_id}"
+            self.latency.record(endpoint, timeout)
+            self.breaker.record_failure()
+            self.health.record(False)
+            error_msg = f"Timeout {action}"
             logger.error(error_msg)
             self.last_error = error_msg
             return None
             
         except requests.exceptions.ConnectionError:
-            error_msg = f"Connection error setting digital input {circuit_id}"
+            self.breaker.record_failure()
+            self.health.record(False)
+            error_msg = f"Connection error {action}"
             logger.error(error_msg)
             self.last_error = error_msg
             return None
             
         except requests.exceptions.HTTPError as e:
-            error_msg = f"HTTP error setting digital input {circuit_id}: {e}"
+            # EVOK answered - only server errors count against its availability
+            if e.response is not None and e.response.status_code >= 500:
+                self.breaker.record_failure()
+                self.health.record(False)
+            else:
+                self.breaker.record_success()
+                self.health.record(True, elapsed)
+            error_msg = f"HTTP error {action}: {e}"
             logger.error(error_msg)
             self.last_error = error_msg
             return None
             
         except Exception as e:
-            error_msg = f"Unexpected error setting digital input {circuit_id}: {e}"
+            # E.g. a 2xx response whose body is not JSON - never leave a
+            # half-open probe unresolved
+            self.breaker.record_failure()
+            self.health.record(False)
+            error_msg = f"Unexpected error {action}: {e}"
             logger.error(error_msg)
             self.last_error = error_msg
             return None
     
-    def get_last_error(self) -> Optional[str]:
-        """Get the last error message"""
-        return self.last_error
-
+    def get_pool_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get keep-alive and connection pool statistics per host
+        
+        Returns:
+            Dictionary keyed by 'host:port' with request, connection and reuse counts
+        """
+        stats = {}
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            
+            stats[f"{pool.host}:{pool.port}"] = {
+                'requests': pool.num_requests,
+                'connections_opened': pool.num_connections,
+                'keep_alive_reuses': max(0, pool.num_requests - pool.num_connections),
+                'idle_connections': pool.pool.qsize() if pool.pool is not None else 0,
+            }
+        return stats
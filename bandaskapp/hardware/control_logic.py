@@ -0,0 +1,176 @@
+"""
+Pure control decision logic for the summer / winter regimes
+
+Nothing here touches the database or the hardware: decide() maps temperatures,
+thresholds, regime, heating control unit input, relay states and cooldowns to
+the desired relay states, so recorded data can be replayed through the same
+logic the controller uses.
+"""
+from dataclasses import dataclass
+from typing import Optional, Iterable, Iterator, Tuple
+
+@dataclass
+class ControlInputs:
+    """Everything a control decision depends on"""
+    
+    regime: str  # SystemState.winter_regime_state: 'off', 'automatic' or 'on'
+    dhw_temp: Optional[float]
+    hhw_temp: Optional[float]
+    dhw_temp_low: float
+    dhw_temp_high: float
+    hhw_temp_low: float
+    hhw_temp_high: float
+    heating_control_state: Optional[bool] = None  # None = heating control unit unreadable
+    furnace_on: Optional[bool] = None  # Known relay states, None = unknown
+    pump_on: Optional[bool] = None
+    furnace_cooldown_remaining: float = 0.0  # Seconds until the relay may switch again
+    pump_cooldown_remaining: float = 0.0
+
+@dataclass
+class ControlDecision:
+    """
+    Result of a control decision
+    
+    furnace/pump are the desired relay states (None = leave as is); the
+    *_blocked flags mark a change that a cooldown is holding back. The
+    *_target fields hold the regime logic's output before relay states and
+    cooldowns are considered (None = hold the current state).
+    """
+    
+    furnace: Optional[bool] = None
+    pump: Optional[bool] = None
+    furnace_target: Optional[bool] = None
+    pump_target: Optional[bool] = None
+    furnace_blocked: bool = False
+    pump_blocked: bool = False
+    switch_to_manual: bool = False  # Automatic regime lost the heating control unit
+    
+    @property
+    def furnace_action(self) -> Optional[bool]:
+        """Furnace state to write now, or None if no write is needed or allowed"""
+        return None if self.furnace_blocked else self.furnace
+    
+    @property
+    def pump_action(self) -> Optional[bool]:
+        """Pump state to write now, or None if no write is needed or allowed"""
+        return None if self.pump_blocked else self.pump
+
+def _dhw_furnace(inputs: ControlInputs) -> Optional[bool]:
+    """Hysteresis on DHW only"""
+    if inputs.dhw_temp is None:
+        return None
+    if inputs.dhw_temp < inputs.dhw_temp_low:
+        return True
+    if inputs.dhw_temp > inputs.dhw_temp_high:
+        return False
+    return None
+
+def _dhw_or_hhw_furnace(inputs: ControlInputs) -> Optional[bool]:
+    """Heat if DHW OR HHW is below its low threshold, stop once both are above high"""
+    dhw_temp = inputs.dhw_temp
+    hhw_temp = inputs.hhw_temp
+    dhw_needs_heat = dhw_temp is not None and dhw_temp < inputs.dhw_temp_low
+    hhw_needs_heat = hhw_temp is not None and hhw_temp < inputs.hhw_temp_low
+    
+    if dhw_needs_heat or hhw_needs_heat:
+        return True
+    if dhw_temp is not None and hhw_temp is not None:
+        if dhw_temp > inputs.dhw_temp_high and hhw_temp > inputs.hhw_temp_high:
+            return False
+    return None
+
+def decide(inputs: ControlInputs) -> ControlDecision:
+    """
+    Decide the relay states for one control cycle
+    
+    Args:
+        inputs: Current temperatures, thresholds, regime, relay states and cooldowns
+        
+    Returns:
+        ControlDecision with only the changes to make (states already in place
+        are dropped and cooldown-limited changes flagged as blocked)
+    """
+    regime = inputs.regime
+    
+    if regime == 'off':
+        # Summer regime: only DHW control, nothing at all without a DHW reading
+        if inputs.dhw_temp is None:
+            return ControlDecision()
+        pump = False
+        furnace = _dhw_furnace(inputs)
+        
+    elif regime == 'automatic':
+        # Winter regime controlled by the heating control unit
+        if inputs.heating_control_state is None:
+            return ControlDecision(switch_to_manual=True)
+        if inputs.heating_control_state:
+            pump = True
+            furnace = _dhw_or_hhw_furnace(inputs)
+        else:
+            pump = False
+            furnace = _dhw_furnace(inputs)
+            
+    elif regime == 'on':
+        # Winter regime controlled by BandaskApp: pump always on
+        pump = True
+        furnace = _dhw_or_hhw_furnace(inputs)
+        
+    else:
+        return ControlDecision()
+        
+    decision = ControlDecision(furnace_target=furnace, pump_target=pump)
+    if pump is not None and pump != inputs.pump_on:
+        decision.pump = pump
+        decision.pump_blocked = inputs.pump_cooldown_remaining > 0
+    if furnace is not None and furnace != inputs.furnace_on:
+        decision.furnace = furnace
+        decision.furnace_blocked = inputs.furnace_cooldown_remaining > 0
+    return decision
+
+def replay(samples: Iterable[Tuple[float, Optional[float], Optional[float], Optional[bool]]],
+           regime: str, dhw_temp_low: float, dhw_temp_high: float,
+           hhw_temp_low: float, hhw_temp_high: float,
+           furnace_cooldown: float = 0.0, pump_cooldown: float = 0.0,
+           furnace_on: bool = False, pump_on: bool = False) -> Iterator[Tuple[float, str, bool]]:
+    """
+    Run recorded samples through decide(), simulating relay states and cooldowns
+    
+    Args:
+        samples: (timestamp in seconds, dhw_temp, hhw_temp, heating_control_state)
+            tuples in time order, e.g. built from TemperatureLog rows
+        regime: Winter regime state to evaluate
+        dhw_temp_low, dhw_temp_high, hhw_temp_low, hhw_temp_high: Thresholds
+        furnace_cooldown, pump_cooldown: Relay cooldowns in seconds
+        furnace_on, pump_on: Initial relay states
+        
+    Yields:
+        (timestamp, 'furnace' or 'pump', new state) for every relay switch
+    """
+    last_furnace_switch = last_pump_switch = None
+    inputs = ControlInputs(regime, None, None, dhw_temp_low, dhw_temp_high, hhw_temp_low, hhw_temp_high)
+    
+    for timestamp, dhw_temp, hhw_temp, heating_control_state in samples:
+        inputs.dhw_temp = dhw_temp
+        inputs.hhw_temp = hhw_temp
+        inputs.heating_control_state = heating_control_state
+        inputs.furnace_on = furnace_on
+        inputs.pump_on = pump_on
+        inputs.furnace_cooldown_remaining = (
+            furnace_cooldown - (timestamp - last_furnace_switch) if last_furnace_switch is not None else 0.0
+        )
+        inputs.pump_cooldown_remaining = (
+            pump_cooldown - (timestamp - last_pump_switch) if last_pump_switch is not None else 0.0
+        )
+        
+        decision = decide(inputs)
+        if decision.switch_to_manual:
+            inputs.regime = 'on'
+            
+        if decision.pump_action is not None:
+            pump_on = decision.pump_action
+            last_pump_switch = timestamp
+            yield timestamp, 'pump', pump_on
+        if decision.furnace_action is not None:
+            furnace_on = decision.furnace_action
+            last_furnace_switch = timestamp
+            yield timestamp, 'furnace', furnace_on
@@ -1,20 +1,28 @@
 import time
+import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Dict, List
 from django.utils import timezone
 from django.conf import settings
+from django.db import transaction
 
-from core.models import TemperatureSensor, Relay, SystemState, SystemLog, TemperatureLog
+from core.models import TemperatureSensor, Relay, SystemState, SystemLog, TemperatureLog, RelayCommand
 from .client import EVOKClient
+from .async_client import AsyncEVOKClient
+from .transport import HardwareTransport, create_transport, device_key
+from .cycle import CycleContext
+from .control_logic import ControlInputs, ControlDecision, decide
+from .actuation import ActuationScheduler
 
 logger = logging.getLogger(__name__)
 
 class HardwareController:
     """Controller for managing hardware operations and control logic"""
     
-    def __init__(self, client: Optional[EVOKClient] = None):
-        self.client = client or EVOKClient()
+    def __init__(self, client: Optional[HardwareTransport] = None):
+        # Hardware transport from settings (by default the shared, pooled EVOK client)
+        self.client = client or create_transport()
         
         # Get configuration from settings
         self.config = settings.BANDASKAPP_CONFIG
@@ -25,19 +33,150 @@ class HardwareController:
         self.hhw_temp_low = self.config['HHW_THRESHOLDS']['low']
         self.hhw_temp_high = self.config['HHW_THRESHOLDS']['high']
         
-        # Cooldown periods (seconds)
+        # Cooldown periods (seconds); last switch times are time.monotonic() values
         self.furnace_cooldown = self.config['COOLDOWN_TIMES']['furnace']
         self.pump_cooldown = self.config['COOLDOWN_TIMES']['pump']
         self.last_furnace_switch = None
         self.last_pump_switch = None
         
+        # Relay changes held back by a cooldown, applied when it expires
+        self.actuations = ActuationScheduler()
+        
         # Temperature validation
         self.min_temp = self.config['TEMPERATURE_VALIDATION']['min_temp']
         self.max_temp = self.config['TEMPERATURE_VALIDATION']['max_temp']
         self.max_temp_jump = self.config['TEMPERATURE_VALIDATION']['max_jump']
         
+        # Per-cycle snapshot of all EVOK devices, keyed by (dev, circuit)
+        self.snapshot = {}
+        self.snapshot_time = None
+        self.snapshot_max_age = self.config.get('SNAPSHOT_MAX_AGE', 5)
+        
+        # Write-through cache of known relay states (circuit ID -> bool), filled by
+        # our own writes and reconciled against hardware in sync_relay_states()
+        # and whenever a bulk read already returned the relay
+        self.relay_states = {}
+        
+        # Whether the last relay write failed (the monitor retries sooner)
+        self.relay_write_failed = False
+        
+        # Last connectivity check result, used to log only state transitions
+        self.api_reachable = True
+        
+        # Optional EVOKSubscription - when connected, its live map replaces the bulk read
+        self.subscription = None
+        
+        # SystemState of the last cycle context, reused while it is unchanged
+        self.system_state = None
+        
         logger.info("Hardware Controller initialized")
     
+    def refresh_snapshot(self) -> bool:
+        """
+        Read all EVOK devices with one bulk request (or from the live subscription)
+        and store them as the cycle snapshot
+        
+        Returns:
+            True if the snapshot was refreshed, False on error
+        """
+        if self.subscription is not None and self.subscription.connected:
+            # Pushed updates keep the live map current - no request needed
+            self.snapshot = self.subscription.snapshot()
+            self.snapshot_time = time.time()
+            self._reconcile_relay_states()
+            return True
+        
+        devices = self.client.get_all()
+        if devices is None:
+            logger.warning(f"Bulk read failed, falling back to per-circuit reads: {self.client.get_last_error()}")
+            self.snapshot = {}
+            self.snapshot_time = None
+            
+            # Concurrent per-circuit reads only help the REST transport, and not
+            # while EVOK is known to be down
+            if (not isinstance(self.client, EVOKClient) or
+                    not AsyncEVOKClient.is_available() or self.client.breaker.is_open):
+                return False
+            
+            # Read every circuit concurrently so one slow sensor does not stall the cycle
+            self.snapshot = asyncio.run(self.read_all_async())
+            self.snapshot_time = time.time()
+            self._reconcile_relay_states()
+            return any(data is not None for data in self.snapshot.values())
+        
+        self.snapshot = {device_key(device): device for device in devices}
+        self.snapshot_time = time.time()
+        self._reconcile_relay_states()
+        return True
+    
+    def snapshot_fresh(self) -> bool:
+        """Check if the cycle snapshot is recent enough to serve reads"""
+        return (
+            self.snapshot_time is not None and
+            (time.time() - self.snapshot_time) < self.snapshot_max_age
+        )
+    
+    def _reconcile_relay_states(self) -> None:
+        """Update cached relay states from relays observed in the cycle snapshot"""
+        for (dev, circuit_id), data in self.snapshot.items():
+            if dev == 'ro' and data is not None and circuit_id in self.relay_states:
+                self.relay_states[circuit_id] = bool(data.get('value', 0))
+    
+    async def read_all_async(self) -> dict:
+        """
+        Read all configured temperature sensors, relays and the heating control
+        input concurrently
+        
+        Returns:
+            Dictionary keyed by (dev, circuit) with device data (None on error)
+        """
+        reads = [
+            ('temp', thermometer['id'])
+            for thermometer in self.config['THERMOMETERS']
+            if thermometer['label'] != 'NONE' and self._is_sensor_enabled(thermometer['id'])
+        ]
+        reads += [
+            ('ro', self.config['FURNACE_RELAY_ID']),
+            ('ro', self.config['PUMP_RELAY_ID']),
+            ('di', self.config['HEATING_CONTROL_UNIT_ID']),
+        ]
+        
+        # Outcomes count towards the shared client's breaker, health and timeouts
+        timeout = self.client.latency.timeout_for('GET temp')
+        async with AsyncEVOKClient(self.client.base_url, timeout=timeout, breaker=self.client.breaker,
+                                   health=self.client.health, latency=self.client.latency) as client:
+            readers = {
+                'temp': client.get_temperature,
+                'ro': client.get_relay_state,
+                'di': client.get_digital_input,
+            }
+            results = await asyncio.gather(*(readers[dev](circuit_id) for dev, circuit_id in reads))
+        
+        return dict(zip(reads, results))
+    
+    def _read_device(self, dev: str, circuit_id: str) -> Optional[dict]:
+        """
+        Get device data from the cycle snapshot, falling back to a direct read
+        
+        Args:
+            dev: EVOK device type ('temp', 'ro' or 'di')
+            circuit_id: EVOK circuit ID
+            
+        Returns:
+            Dictionary with device data or None on error
+        """
+        if self.snapshot_fresh() and (dev, circuit_id) in self.snapshot:
+            # A None entry is a failed read from this cycle - do not retry it serially
+            return self.snapshot[(dev, circuit_id)]
+        
+        if dev == 'temp':
+            return self.client.get_temperature(circuit_id)
+        elif dev == 'ro':
+            return self.client.get_relay_state(circuit_id)
+        elif dev == 'di':
+            return self.client.get_digital_input(circuit_id)
+        raise ValueError(f"Unsupported device type: {dev}")
+    
     def update_temperature(self) -> Optional[float]:
         """
         Read DHW temperature from control sensor and update database
@@ -45,63 +184,7 @@ class HardwareController:
         Returns:
             Current temperature value or None on error
         """
-        # Check if sensor is enabled
-        if not self._is_sensor_enabled(self.config['CONTROL_DHW_ID']):
-            logger.debug("DHW Control sensor is disabled, skipping temperature update")
-            return None
-            
-        try:
-            # Get DHW sensor from database using circuit ID
-            dhw_sensor = TemperatureSensor.objects.get(circuit_id=self.config['CONTROL_DHW_ID'])
-            
-            # Read from hardware
-            data = self.client.get_temperature(dhw_sensor.circuit_id)
-            
-            if data is None:
-                # Communication error
-                dhw_sensor.is_lost = True
-                dhw_sensor.save()
-                self._log_system_event('error', f'Failed to read DHW temperature: {self.client.get_last_error()}')
-                return None
-            
-            # Check if sensor is lost
-            if data.get('lost', True):
-                dhw_sensor.is_lost = True
-                dhw_sensor.save()
-                self._log_system_event('warning', 'DHW temperature sensor is lost')
-                return None
-            
-            # Get temperature value
-            new_temp = data.get('value')
-            if new_temp is None:
-                self._log_system_event('error', 'DHW temperature reading returned no value')
-                return None
-            
-            # Validate temperature
-            if not self._validate_temperature(dhw_sensor, new_temp):
-                return None
-            
-            # Update sensor in database
-            dhw_sensor.current_value = new_temp
-            dhw_sensor.last_reading = timezone.now()
-            dhw_sensor.is_lost = False
-            dhw_sensor.save()
-            
-            # Log temperature reading
-            TemperatureLog.objects.create(
-                sensor=dhw_sensor,
-                value=new_temp
-            )
-            
-            logger.debug(f"DHW temperature updated: {new_temp:.1f}°C")
-            return new_temp
-            
-        except TemperatureSensor.DoesNotExist:
-            self._log_system_event('error', 'DHW temperature sensor not found in database')
-            return None
-        except Exception as e:
-            self._log_system_event('error', f'Error updating DHW temperature: {e}')
-            return None
+        return self._update_single_sensor(self.config['CONTROL_DHW_ID'], "DHW Control sensor")
     
     def update_temperature_2(self) -> Optional[float]:
         """
@@ -110,63 +193,7 @@ class HardwareController:
         Returns:
             Current temperature value or None on error
         """
-        # Check if sensor is enabled
-        if not self._is_sensor_enabled(self.config['THERMOMETERS'][1]['id']):
-            logger.debug("DHW Sensor 2 is disabled, skipping temperature update")
-            return None
-            
-        try:
-            # Get DHW sensor 2 from database using circuit ID
-            dhw_sensor = TemperatureSensor.objects.get(circuit_id=self.config['THERMOMETERS'][1]['id'])
-            
-            # Read from hardware
-            data = self.client.get_temperature(dhw_sensor.circuit_id)
-            
-            if data is None:
-                # Communication error
-                dhw_sensor.is_lost = True
-                dhw_sensor.save()
-                self._log_system_event('error', f'Failed to read DHW temperature 2: {self.client.get_last_error()}')
-                return None
-            
-            # Check if sensor is lost
-            if data.get('lost', True):
-                dhw_sensor.is_lost = True
-                dhw_sensor.save()
-                self._log_system_event('warning', 'DHW temperature sensor 2 is lost')
-                return None
-            
-            # Get temperature value
-            new_temp = data.get('value')
-            if new_temp is None:
-                self._log_system_event('error', 'DHW temperature 2 reading returned no value')
-                return None
-            
-            # Validate temperature
-            if not self._validate_temperature(dhw_sensor, new_temp):
-                return None
-            
-            # Update sensor in database
-            dhw_sensor.current_value = new_temp
-            dhw_sensor.last_reading = timezone.now()
-            dhw_sensor.is_lost = False
-            dhw_sensor.save()
-            
-            # Log temperature reading
-            TemperatureLog.objects.create(
-                sensor=dhw_sensor,
-                value=new_temp
-            )
-            
-            logger.debug(f"DHW temperature 2 updated: {new_temp:.1f}°C")
-            return new_temp
-            
-        except TemperatureSensor.DoesNotExist:
-            self._log_system_event('error', 'DHW temperature sensor 2 not found in database')
-            return None
-        except Exception as e:
-            self._log_system_event('error', f'Error updating DHW temperature 2: {e}')
-            return None
+        return self._update_single_sensor(self.config['THERMOMETERS'][1]['id'], "DHW Sensor 2")
     
     def update_temperature_3(self) -> Optional[float]:
         """
@@ -175,63 +202,7 @@ class HardwareController:
         Returns:
             Current temperature value or None on error
         """
-        # Check if sensor is enabled
-        if not self._is_sensor_enabled(self.config['THERMOMETERS'][2]['id']):
-            logger.debug("DHW Sensor 3 is disabled, skipping temperature update")
-            return None
-            
-        try:
-            # Get DHW sensor 3 from database using circuit ID
-            dhw_sensor = TemperatureSensor.objects.get(circuit_id=self.config['THERMOMETERS'][2]['id'])
-            
-            # Read from hardware
-            data = self.client.get_temperature(dhw_sensor.circuit_id)
-            
-            if data is None:
-                # Communication error
-                dhw_sensor.is_lost = True
-                dhw_sensor.save()
-                self._log_system_event('error', f'Failed to read DHW temperature 3: {self.client.get_last_error()}')
-                return None
-            
-            # Check if sensor is lost
-            if data.get('lost', True):
-                dhw_sensor.is_lost = True
-                dhw_sensor.save()
-                self._log_system_event('warning', 'DHW temperature sensor 3 is lost')
-                return None
-            
-            # Get temperature value
-            new_temp = data.get('value')
-            if new_temp is None:
-                self._log_system_event('error', 'DHW temperature 3 reading returned no value')
-                return None
-            
-            # Validate temperature
-            if not self._validate_temperature(dhw_sensor, new_temp):
-                return None
-            
-            # Update sensor in database
-            dhw_sensor.current_value = new_temp
-            dhw_sensor.last_reading = timezone.now()
-            dhw_sensor.is_lost = False
-            dhw_sensor.save()
-            
-            # Log temperature reading
-            TemperatureLog.objects.create(
-                sensor=dhw_sensor,
-                value=new_temp
-            )
-            
-            logger.debug(f"DHW temperature 3 updated: {new_temp:.1f}°C")
-            return new_temp
-            
-        except TemperatureSensor.DoesNotExist:
-            self._log_system_event('error', 'DHW temperature sensor 3 not found in database')
-            return None
-        except Exception as e:
-            self._log_system_event('error', f'Error updating DHW temperature 3: {e}')
-            return None
+        return self._update_single_sensor(self.config['THERMOMETERS'][2]['id'], "DHW Sensor 3")
     
     def update_temperature_hhw(self) -> Optional[float]:
         """
@@ -240,63 +211,114 @@ class HardwareController:
         Returns:
             Current temperature value or None on error
         """
+        return self._update_single_sensor(self.config['CONTROL_HHW_ID'], "HHW Sensor")
+    
+    def _update_single_sensor(self, circuit_id: str, name: str) -> Optional[float]:
+        """Update one sensor through the sensor pipeline with validation"""
         # Check if sensor is enabled
-        if not self._is_sensor_enabled(self.config['CONTROL_HHW_ID']):
-            logger.debug("HHW Sensor is disabled, skipping temperature update")
+        if not self._is_sensor_enabled(circuit_id):
+            logger.debug(f"{name} is disabled, skipping temperature update")
             return None
             
-        try:
-            # Get HHW sensor from database using circuit ID
-            hhw_sensor = TemperatureSensor.objects.get(circuit_id=self.config['CONTROL_HHW_ID'])
-            
-            # Read from hardware
-            data = self.client.get_temperature(hhw_sensor.circuit_id)
-            
-            if data is None:
-                # Communication error
-                hhw_sensor.is_lost = True
-                hhw_sensor.save()
-                self._log_system_event('error', f'Failed to read HHW temperature: {self.client.get_last_error()}')
-                return None
-            
-            # Check if sensor is lost
-            if data.get('lost', True):
-                hhw_sensor.is_lost = True
-                hhw_sensor.save()
-                self._log_system_event('warning', 'HHW temperature sensor is lost')
-                return None
-            
-            # Get temperature value
-            new_temp = data.get('value')
-            if new_temp is None:
-                self._log_system_event('error', 'HHW temperature reading returned no value')
-                return None
-            
-            # Validate temperature
-            if not self._validate_temperature(hhw_sensor, new_temp):
-                return None
-            
-            # Update sensor in database
-            hhw_sensor.current_value = new_temp
-            hhw_sensor.last_reading = timezone.now()
-            hhw_sensor.is_lost = False
-            hhw_sensor.save()
-            
-            # Log temperature reading
-            TemperatureLog.objects.create(
-                sensor=hhw_sensor,
-                value=new_temp
-            )
-            
-            logger.debug(f"HHW temperature updated: {new_temp:.1f}°C")
-            return new_temp
+        return self.update_sensors([circuit_id], validate=True).get(circuit_id)
+    
+    def update_sensors(self, circuit_ids: Optional[List[str]] = None, validate: bool = False,
+                       sensors: Optional[Dict[str, TemperatureSensor]] = None) -> Dict[str, Optional[float]]:
+        """
+        Read temperature sensors and store the whole batch in one transaction
+        
+        Sensor rows are loaded with one query; changed rows are written with one
+        bulk_update and the readings logged with one bulk_create.
+        
+        Args:
+            circuit_ids: Circuit IDs to update (defaults to all enabled THERMOMETERS)
+            validate: Reject out-of-range readings and jumps and record failures as
+                system events (otherwise failures only go to the log file)
+            sensors: Already loaded sensor rows keyed by circuit ID (e.g. from a
+                CycleContext), updated in place instead of being queried
             
-        except TemperatureSensor.DoesNotExist:
-            self._log_system_event('error', 'HHW temperature sensor not found in database')
-            return None
+        Returns:
+            Dictionary mapping circuit ID to the new temperature or None on error
+        """
+        labels = {
+            thermometer['id']: thermometer['label']
+            for thermometer in self.config['THERMOMETERS']
+            if thermometer['label'] != 'NONE'
+        }
+        if circuit_ids is None:
+            circuit_ids = list(labels)
+            
+        def report(level: str, message: str) -> None:
+            if validate:
+                self._log_system_event(level, message)
+            else:
+                getattr(logger, level)(message)
+                
+        results = {circuit_id: None for circuit_id in circuit_ids}
+        
+        try:
+            if sensors is None:
+                sensors = TemperatureSensor.objects.in_bulk(circuit_ids, field_name='circuit_id')
+            now = timezone.now()
+            changed_sensors = []
+            temperature_logs = []
+            
+            for circuit_id in circuit_ids:
+                label = labels.get(circuit_id, circuit_id)
+                sensor = sensors.get(circuit_id)
+                if sensor is None:
+                    report('error', f'{label} temperature sensor not found in database')
+                    continue
+                    
+                # Read from cycle snapshot (or hardware if not in snapshot)
+                data = self._read_device('temp', circuit_id)
+                
+                if data is None or data.get('lost', True):
+                    if data is None:
+                        # Communication error
+                        report('error', f'Failed to read {label} temperature: {self.client.get_last_error()}')
+                    else:
+                        report('warning', f'{label} temperature sensor is lost')
+                    if not sensor.is_lost:
+                        sensor.is_lost = True
+                        changed_sensors.append(sensor)
+                    continue
+                    
+                # Get temperature value
+                new_temp = data.get('value')
+                if new_temp is None:
+                    report('error', f'{label} temperature reading returned no value')
+                    continue
+                    
+                # Validate temperature
+                if validate and not self._validate_temperature(sensor, new_temp):
+                    continue
+                    
+                sensor.current_value = new_temp
+                sensor.last_reading = now
+                sensor.is_lost = False
+                changed_sensors.append(sensor)
+                temperature_logs.append(TemperatureLog(sensor=sensor, value=new_temp))
+                results[circuit_id] = new_temp
+                
+                logger.debug(f"Updated {label} temperature: {new_temp:.1f}°C")
+                
+            # One transaction (one fsync on SQLite) for the whole batch;
+            # bulk_update bypasses auto_now, so updated_at is set here
+            if changed_sensors or temperature_logs:
+                for sensor in changed_sensors:
+                    sensor.updated_at = now
+                with transaction.atomic():
+                    TemperatureSensor.objects.bulk_update(
+                        changed_sensors, ['current_value', 'last_reading', 'is_lost', 'updated_at']
+                    )
+                    TemperatureLog.objects.bulk_create(temperature_logs)
+                    
         except Exception as e:
-            self._log_system_event('error', f'Error updating HHW temperature: {e}')
-            return None
+            report('error', f'Error updating temperature sensors: {e}')
+            return {circuit_id: None for circuit_id in circuit_ids}
+            
+        return results
     
     def _validate_temperature(self, sensor: TemperatureSensor, new_temp: float) -> bool:
         """
@@ -329,10 +351,30 @@ class HardwareController:
         
         return True
     
-    def control_furnace(self) -> bool:
+    def load_cycle_context(self, refresh: bool = False, reload_state: bool = True) -> CycleContext:
+        """
+        Load SystemState, sensors, relays and the heating control input for one cycle
+        
+        Args:
+            refresh: Refresh the device snapshot first (start of a monitoring cycle),
+                so the DI and all later reads of the cycle come from one bulk read
+            reload_state: Reload SystemState; False reuses the instance of the
+                previous context (the caller knows no other process changed it)
+        """
+        if refresh:
+            self.refresh_snapshot()
+        system_state = None if reload_state else self.system_state
+        ctx = CycleContext.load(self, system_state)
+        self.system_state = ctx.system_state
+        return ctx
+    
+    def control_furnace(self, ctx: Optional[CycleContext] = None) -> bool:
         """
         Control furnace based on DHW temperature and system state
         
+        Args:
+            ctx: Cycle context (loaded if not provided)
+            
         Returns:
             True if control action was taken, False otherwise
         """
@@ -342,8 +384,9 @@ class HardwareController:
             return False
             
         try:
-            # Get system state
-            system_state = SystemState.load()
+            if ctx is None:
+                ctx = self.load_cycle_context()
+            system_state = ctx.system_state
             
             # Skip if in manual mode
             if system_state.control_mode == 'manual':
@@ -357,14 +400,13 @@ class HardwareController:
             self.hhw_temp_high = system_state.hhw_temp_high
             
             # Execute winter regime control logic
-            self.control_winter_regime()
-            
-            # Get updated system status
-            status = self.get_system_status()
+            self.control_winter_regime(ctx)
             
             # Log the action if furnace state changed
-            if status.get('furnace_running') != system_state.furnace_running:
-                action = "started" if status.get('furnace_running') else "stopped"
+            furnace = ctx.relays.get(self.config['FURNACE_RELAY_ID'])
+            furnace_running = furnace.current_state if furnace is not None else False
+            if furnace_running != system_state.furnace_running:
+                action = "started" if furnace_running else "stopped"
                 self._log_system_event(
                     'info',
                     f'Furnace {action} via winter regime control'
@@ -405,7 +447,7 @@ class HardwareController:
         """Check if furnace is in cooldown period"""
         if self.last_furnace_switch is None:
             return False
-        return (time.time() - self.last_furnace_switch) < self.furnace_cooldown
+        return (time.monotonic() - self.last_furnace_switch) < self.furnace_cooldown
     
     def manual_control_furnace(self, state: bool) -> bool:
         """
@@ -420,12 +462,16 @@ class HardwareController:
         try:
             furnace = Relay.objects.get(circuit_id=self.config['FURNACE_RELAY_ID'])
             
+            # A manual command supersedes any deferred automatic one
+            self.actuations.cancel(furnace.circuit_id)
+            
             success = self._set_relay_state(furnace, state)
             if success:
                 # Update system state
                 system_state = SystemState.load()
                 system_state.furnace_running = state
-                system_state.save()
+                system_state.save(update_fields=['furnace_running'])
+                self.system_state = system_state
                 
                 # Log manual action
                 action = "ON" if state else "OFF"
@@ -455,12 +501,16 @@ class HardwareController:
         try:
             pump = Relay.objects.get(circuit_id=self.config['PUMP_RELAY_ID'])
             
+            # A manual command supersedes any deferred automatic one
+            self.actuations.cancel(pump.circuit_id)
+            
             success = self._set_relay_state(pump, state)
             if success:
                 # Update system state
                 system_state = SystemState.load()
                 system_state.pump_running = state
-                system_state.save()
+                system_state.save(update_fields=['pump_running'])
+                self.system_state = system_state
                 
                 # Log manual action
                 action = "ON" if state else "OFF"
@@ -477,10 +527,64 @@ class HardwareController:
             self._log_system_event('error', f'Error in manual pump control: {e}')
             return False
     
+    def process_relay_commands(self) -> int:
+        """
+        Execute relay commands queued by the web interface
+        
+        Only the monitor process calls this, so all relay writes are made by a
+        single owner and never race each other. Commands older than
+        COMMAND_TIMEOUT are expired instead of being executed late.
+        
+        Returns:
+            Number of commands processed
+        """
+        commands = list(RelayCommand.objects.filter(status='pending'))
+        if not commands:
+            return 0
+            
+        handlers = {
+            'manual_furnace_on': lambda: self.manual_control_furnace(True),
+            'manual_furnace_off': lambda: self.manual_control_furnace(False),
+            'pump_on': lambda: self.manual_control_pump(True),
+            'pump_off': lambda: self.manual_control_pump(False),
+            'sync_relays': self._sync_relay_states_command,
+        }
+        timeout = timedelta(seconds=self.config.get('COMMAND_TIMEOUT', 30))
+        
+        for command in commands:
+            if timezone.now() - command.created_at > timeout:
+                command.status = 'expired'
+                command.message = 'Command expired before the monitor could execute it'
+            else:
+                try:
+                    if handlers[command.action]():
+                        command.status = 'done'
+                        command.message = f'{command.get_action_display()} completed'
+                    else:
+                        command.status = 'failed'
+                        command.message = f'{command.get_action_display()} failed: {self.client.get_last_error()}'
+                except Exception as e:
+                    command.status = 'failed'
+                    command.message = f'{command.get_action_display()} failed: {e}'
+                    
+            command.completed_at = timezone.now()
+            command.save(update_fields=['status', 'message', 'completed_at'])
+            logger.info(f"Relay command {command.id} ({command.action}): {command.status}")
+            
+        return len(commands)
+    
+    def _sync_relay_states_command(self) -> bool:
+        """Relay sync for a queued command (sync_relay_states logs its own errors)"""
+        self.sync_relay_states()
+        return True
+    
     def _set_relay_state(self, relay: Relay, state: bool) -> bool:
         """
         Set relay state and update database
         
+        A state the write-through cache already holds is not written to the
+        hardware again; otherwise the row is saved once, after the result.
+        
         Args:
             relay: Relay model instance
             state: True for ON, False for OFF
@@ -488,20 +592,38 @@ class HardwareController:
         Returns:
             True if successful, False otherwise
         """
-        # Set expected state
-        relay.expected_state = state
-        relay.save()
-        
+        # Known to be in this state already (write-through cache) - no hardware
+        # write, and no database write unless the row disagrees
+        if self.relay_states.get(relay.circuit_id) == state:
+            if relay.current_state != state or relay.expected_state != state:
+                relay.current_state = relay.expected_state = state
+                relay.save(update_fields=['current_state', 'expected_state', 'last_change', 'updated_at'])
+            return True
+            
         # Send command to hardware
         result = self.client.set_relay_state(relay.circuit_id, state)
+        relay.expected_state = state
         
         if result and result.get('success'):
-            # Update current state
+            # One row write for expected and current state
             relay.current_state = state
-            relay.save()
+            relay.save(update_fields=['current_state', 'expected_state', 'last_change', 'updated_at'])
+            
+            self.relay_states[relay.circuit_id] = state
+            self.relay_write_failed = False
+            
+            # Keep the cycle snapshot consistent with what we just wrote
+            if ('ro', relay.circuit_id) in self.snapshot:
+                self.snapshot[('ro', relay.circuit_id)] = dict(
+                    self.snapshot[('ro', relay.circuit_id)], value=int(state)
+                )
             return True
         else:
-            # Hardware command failed
+            # Hardware command failed - actual state is unknown until the next
+            # sync, which retries the recorded expected state
+            relay.save(update_fields=['expected_state', 'updated_at'])
+            self.relay_states.pop(relay.circuit_id, None)
+            self.relay_write_failed = True
             error_msg = f"Failed to set {relay.name} relay: {self.client.get_last_error()}"
             self._log_system_event('error', error_msg)
             return False
@@ -510,11 +632,12 @@ class HardwareController:
         """Synchronize actual vs expected relay states"""
         try:
             for relay in Relay.objects.filter(is_active=True):
-                # Read actual state from hardware
-                data = self.client.get_relay_state(relay.circuit_id)
+                # Read actual state from hardware (cycle snapshot if fresh)
+                data = self._read_device('ro', relay.circuit_id)
                 
                 if data is not None:
                     actual_state = bool(data.get('value', 0))
+                    self.relay_states[relay.circuit_id] = actual_state
                     
                     # Update current state
                     relay.current_state = actual_state
@@ -537,13 +660,22 @@ class HardwareController:
         """
         Check API connectivity and log warnings if needed
         
+        Health comes from the outcome of recent real requests; the hardware is
+        only probed when there was no traffic recently.
+        
         Returns:
             True if API is reachable, False otherwise
         """
-        if self.client.test_connection():
+        if self.client.check_health():
+            if not self.api_reachable:
+                self._log_system_event('info', 'Hardware reachable again')
+            self.api_reachable = True
             return True
         else:
-            self._log_system_event('error', f'EVOK API unreachable: {self.client.get_last_error()}')
+            # Log only the transition - the circuit breaker keeps later checks cheap
+            if self.api_reachable:
+                self._log_system_event('error', f'Hardware unreachable: {self.client.get_last_error()}')
+            self.api_reachable = False
             return False
     
     def _log_system_event(self, level: str, message: str) -> None:
@@ -569,15 +701,20 @@ class HardwareController:
         """
         return circuit_id != 'NONE'
     
-    def get_system_status(self) -> dict:
+    def get_system_status(self, ctx: Optional[CycleContext] = None) -> dict:
         """
         Get current system status
         
+        Args:
+            ctx: Cycle context to build the status from (loaded if not provided)
+            
         Returns:
             Dictionary with system status information
         """
         try:
-            system_state = SystemState.load()
+            if ctx is None:
+                ctx = self.load_cycle_context()
+            system_state = ctx.system_state
             
             # Initialize status with default values
             status = {
@@ -587,6 +724,10 @@ class HardwareController:
                     'low': system_state.dhw_temp_low,
                     'high': system_state.dhw_temp_high,
                 },
+                'hhw_temp_thresholds': {
+                    'low': system_state.hhw_temp_low,
+                    'high': system_state.hhw_temp_high,
+                },
                 'api_connected': self.client.get_last_error() is None,
             }
             
@@ -600,8 +741,8 @@ class HardwareController:
                 online_key = f'sensor_{i+1}_online'
                 
                 if self._is_sensor_enabled(sensor_id):
-                    try:
-                        sensor = TemperatureSensor.objects.get(circuit_id=sensor_id)
+                    sensor = ctx.sensors.get(sensor_id)
+                    if sensor is not None:
                         status.update({
                             temp_key: sensor.current_value,
                             online_key: sensor.is_online,
@@ -609,7 +750,7 @@ class HardwareController:
                         # Set last_reading from the first available sensor
                         if i == 0:
                             status['last_reading'] = sensor.last_reading
-                    except TemperatureSensor.DoesNotExist:
+                    else:
                         logger.warning(f"Temperature sensor with circuit ID {sensor_id} not found in database")
                         status.update({
                             temp_key: None,
@@ -635,13 +776,13 @@ class HardwareController:
             
             # Handle HHW Sensor (for winter regime) - use the configured HHW sensor
             if self._is_sensor_enabled(self.config['CONTROL_HHW_ID']):
-                try:
-                    hhw_sensor = TemperatureSensor.objects.get(circuit_id=self.config['CONTROL_HHW_ID'])
+                hhw_sensor = ctx.sensors.get(self.config['CONTROL_HHW_ID'])
+                if hhw_sensor is not None:
                     status.update({
                         'hhw_temperature': hhw_sensor.current_value,
                         'hhw_sensor_online': hhw_sensor.is_online,
                     })
-                except TemperatureSensor.DoesNotExist:
+                else:
                     logger.warning(f"HHW Sensor with circuit ID {self.config['CONTROL_HHW_ID']} not found in database")
                     status.update({
                         'hhw_temperature': None,
@@ -655,29 +796,23 @@ class HardwareController:
                 })
             
             # Handle Furnace Relay (required for control)
-            try:
-                furnace = Relay.objects.get(circuit_id=self.config['FURNACE_RELAY_ID'])
+            furnace = ctx.relays.get(self.config['FURNACE_RELAY_ID'])
+            if furnace is not None:
                 status['furnace_running'] = furnace.current_state
-            except Relay.DoesNotExist:
+            else:
                 logger.warning(f"Furnace relay with circuit ID {self.config['FURNACE_RELAY_ID']} not found in database")
                 status['furnace_running'] = False
             
             # Handle Pump Relay
-            try:
-                pump = Relay.objects.get(circuit_id=self.config['PUMP_RELAY_ID'])
+            pump = ctx.relays.get(self.config['PUMP_RELAY_ID'])
+            if pump is not None:
                 status['pump_running'] = pump.current_state
-            except Relay.DoesNotExist:
+            else:
                 logger.warning(f"Pump relay with circuit ID {self.config['PUMP_RELAY_ID']} not found in database")
                 status['pump_running'] = False
             
-            # Handle Heating Controller Status
-            try:
-                heating_control_state = self._get_heating_control_state()
-                status['heating_controller_state'] = heating_control_state
-                logger.info(f"Added heating controller state to status: {heating_control_state}")
-            except Exception as e:
-                logger.warning(f"Error getting heating controller state: {e}")
-                status['heating_controller_state'] = None
+            # Handle Heating Controller Status (read once per cycle context)
+            status['heating_controller_state'] = ctx.heating_control_state
             
             return status
             
@@ -687,52 +822,112 @@ class HardwareController:
                 'error': str(e)
             }
     
-    def control_winter_regime(self) -> None:
+    def control_winter_regime(self, ctx: Optional[CycleContext] = None) -> None:
         """
         Control system based on winter regime state and heating control unit
+        
+        The decision itself is made by control_logic.decide(); this method only
+        gathers its inputs and applies the result.
+        
+        Args:
+            ctx: Cycle context (loaded if not provided)
         """
         try:
-            system_state = SystemState.load()
-            winter_regime = system_state.winter_regime_state
-            
-            # Get current temperatures
-            dhw_temp = self._get_control_temperature(self.config['CONTROL_DHW_ID'])
-            hhw_temp = self._get_control_temperature(self.config['CONTROL_HHW_ID'])
-            
-            # Get heating control unit state
-            heating_control_state = self._get_heating_control_state()
-            
-            if winter_regime == 'off':
-                # Summer regime: only DHW control
-                self._control_summer_regime(dhw_temp)
-                
-            elif winter_regime == 'automatic':
-                # Winter regime: controlled by heating control unit
-                self._control_winter_automatic(dhw_temp, hhw_temp, heating_control_state)
-                
-            elif winter_regime == 'on':
-                # Winter regime: manual control by BandaskApp
-                self._control_winter_manual(dhw_temp, hhw_temp)
+            if ctx is None:
+                ctx = self.load_cycle_context()
                 
+            decision = decide(self._get_control_inputs(ctx))
+            self._apply_control_decision(decision, ctx)
+            
         except Exception as e:
             self._log_system_event('error', f'Error in winter regime control: {e}')
     
-    def _get_control_temperature(self, circuit_id: str) -> Optional[float]:
+    def _get_control_inputs(self, ctx: CycleContext) -> ControlInputs:
+        """Collect the inputs of a control decision from the cycle context and controller state"""
+        system_state = ctx.system_state
+        now = time.monotonic()
+        
+        def cooldown_remaining(last_switch: Optional[float], cooldown: float) -> float:
+            return cooldown - (now - last_switch) if last_switch else 0.0
+            
+        return ControlInputs(
+            regime=system_state.winter_regime_state,
+            dhw_temp=self._get_control_temperature(self.config['CONTROL_DHW_ID'], ctx),
+            hhw_temp=self._get_control_temperature(self.config['CONTROL_HHW_ID'], ctx),
+            dhw_temp_low=system_state.dhw_temp_low,
+            dhw_temp_high=system_state.dhw_temp_high,
+            hhw_temp_low=system_state.hhw_temp_low,
+            hhw_temp_high=system_state.hhw_temp_high,
+            heating_control_state=ctx.heating_control_state,
+            furnace_on=self.relay_states.get(self.config['FURNACE_RELAY_ID']),
+            pump_on=self.relay_states.get(self.config['PUMP_RELAY_ID']),
+            furnace_cooldown_remaining=cooldown_remaining(self.last_furnace_switch, self.furnace_cooldown),
+            pump_cooldown_remaining=cooldown_remaining(self.last_pump_switch, self.pump_cooldown),
+        )
+    
+    def _apply_control_decision(self, decision: ControlDecision, ctx: CycleContext) -> None:
+        """Execute a control decision: regime fallback and relay writes"""
+        # Changes held back by a cooldown are queued to fire when it expires;
+        # every later decision that does not hold the change back again drops
+        # it (a new target, the state already in place, or no target at all)
+        for name, relay_id, target, blocked, last_switch, cooldown in (
+            ('Pump', self.config['PUMP_RELAY_ID'], decision.pump_target, decision.pump_blocked,
+             self.last_pump_switch, self.pump_cooldown),
+            ('Furnace', self.config['FURNACE_RELAY_ID'], decision.furnace_target, decision.furnace_blocked,
+             self.last_furnace_switch, self.furnace_cooldown),
+        ):
+            if blocked:
+                self.actuations.schedule(relay_id, target, last_switch + cooldown)
+                logger.debug(f"{name} switch to {'ON' if target else 'OFF'} deferred until cooldown expires")
+            else:
+                self.actuations.cancel(relay_id)
+                
+        if decision.switch_to_manual:
+            # API error - switch to manual mode
+            # Only this field - the cycle's copy may predate settings saved meanwhile
+            ctx.system_state.winter_regime_state = 'on'
+            ctx.system_state.save(update_fields=['winter_regime_state'])
+            self._log_system_event('warning', 'Heating control unit API error, switching to manual winter regime')
+            return
+            
+        if decision.pump_action is not None:
+            self._set_pump_state(decision.pump_action, ctx)
+        if decision.furnace_action is not None:
+            self._set_furnace_state(decision.furnace_action, ctx)
+    
+    def _get_control_temperature(self, circuit_id: str, ctx: CycleContext) -> Optional[float]:
         """Get temperature from control sensor"""
         if not self._is_sensor_enabled(circuit_id):
             return None
             
-        try:
-            sensor = TemperatureSensor.objects.get(circuit_id=circuit_id)
-            return sensor.current_value
-        except TemperatureSensor.DoesNotExist:
+        return ctx.temperature(circuit_id)
+    
+    def control_sensor_ids(self) -> List[str]:
+        """Circuit IDs of the enabled DHW and HHW control sensors"""
+        circuit_ids = []
+        for key in ('CONTROL_DHW_ID', 'CONTROL_HHW_ID'):
+            circuit_id = self.config.get(key, 'NONE')
+            if self._is_sensor_enabled(circuit_id) and circuit_id not in circuit_ids:
+                circuit_ids.append(circuit_id)
+        return circuit_ids
+    
+    def read_heating_control_input(self) -> Optional[bool]:
+        """
+        Read the heating control unit input directly from hardware (not the snapshot)
+        
+        Returns:
+            Input state or None on error
+        """
+        data = self.client.get_digital_input(self.config['HEATING_CONTROL_UNIT_ID'])
+        if data is None:
             return None
+        return bool(data.get('value', 0))
     
     def _get_heating_control_state(self) -> Optional[bool]:
         """Get heating control unit state"""
         try:
             logger.info(f"Getting heating control state for circuit ID: {self.config['HEATING_CONTROL_UNIT_ID']}")
-            data = self.client.get_digital_input(self.config['HEATING_CONTROL_UNIT_ID'])
+            data = self._read_device('di', self.config['HEATING_CONTROL_UNIT_ID'])
             logger.info(f"Raw heating control data: {data}")
             if data:
                 value = bool(data.get('value', 0))
@@ -745,177 +940,97 @@ class HardwareController:
             self._log_system_event('error', f'Error reading heating control unit: {e}')
             return None
     
-    def _control_summer_regime(self, dhw_temp: Optional[float]) -> None:
-        """Control system in summer regime (DHW only)"""
-        if dhw_temp is None:
-            return
-            
-        # Turn pump OFF in summer regime
-        self._set_pump_state(False)
-        
-        # Control furnace based on DHW temperature
-        system_state = SystemState.load()
-        if dhw_temp < system_state.dhw_temp_low:
-            self._set_furnace_state(True)
-        elif dhw_temp > system_state.dhw_temp_high:
-            self._set_furnace_state(False)
+    def actuations_due_in(self) -> Optional[float]:
+        """Seconds until the next deferred relay command is due, or None if none is queued"""
+        due = self.actuations.next_due()
+        if due is None:
+            return None
+        return max(0.0, due - time.monotonic())
     
-    def _control_winter_automatic(self, dhw_temp: Optional[float], hhw_temp: Optional[float], heating_control_state: Optional[bool]) -> None:
-        """Control system in winter automatic regime"""
-        # Load system state once at method level to avoid variable scope issues
-        system_state = SystemState.load()
-        
-        if heating_control_state is None:
-            # API error - switch to manual mode
-            system_state.winter_regime_state = 'on'
-            system_state.save()
-            self._log_system_event('warning', 'Heating control unit API error, switching to manual winter regime')
-            return
+    def run_due_actuations(self) -> int:
+        """
+        Apply deferred relay commands whose cooldown has expired
         
-        if heating_control_state:
-            # Heating control unit requests HHW
-            self._set_pump_state(True)
-            
-            # Control furnace based on DHW OR HHW (logical OR)
-            dhw_needs_heat = dhw_temp is not None and dhw_temp < system_state.dhw_temp_low
-            hhw_needs_heat = hhw_temp is not None and hhw_temp < system_state.hhw_temp_low
-            
-            if dhw_needs_heat or hhw_needs_heat:
-                self._set_furnace_state(True)
-            elif dhw_temp is not None and hhw_temp is not None:
-                dhw_satisfied = dhw_temp > system_state.dhw_temp_high
-                hhw_satisfied = hhw_temp > system_state.hhw_temp_high
-                if dhw_satisfied and hhw_satisfied:
-                    self._set_furnace_state(False)
-        else:
-            # Heating control unit does not request HHW
-            self._set_pump_state(False)
-            
-            # Control furnace based on DHW only
-            if dhw_temp is not None:
-                if dhw_temp < system_state.dhw_temp_low:
-                    self._set_furnace_state(True)
-                elif dhw_temp > system_state.dhw_temp_high:
-                    self._set_furnace_state(False)
-    
-    def _control_winter_manual(self, dhw_temp: Optional[float], hhw_temp: Optional[float]) -> None:
-        """Control system in winter manual regime"""
-        # Pump is always ON in manual winter regime
-        self._set_pump_state(True)
-        
-        # Control furnace based on DHW OR HHW (logical OR)
-        system_state = SystemState.load()
-        dhw_needs_heat = dhw_temp is not None and dhw_temp < system_state.dhw_temp_low
-        hhw_needs_heat = hhw_temp is not None and hhw_temp < system_state.hhw_temp_low
-        
-        if dhw_needs_heat or hhw_needs_heat:
-            self._set_furnace_state(True)
-        elif dhw_temp is not None and hhw_temp is not None:
-            dhw_satisfied = dhw_temp > system_state.dhw_temp_high
-            hhw_satisfied = hhw_temp > system_state.hhw_temp_high
-            if dhw_satisfied and hhw_satisfied:
-                self._set_furnace_state(False)
-    
-    def _set_pump_state(self, state: bool) -> None:
-        """Set pump relay state with cooldown protection"""
-        if self.last_pump_switch and (time.time() - self.last_pump_switch) < self.pump_cooldown:
-            return
-            
+        Returns:
+            Number of relay writes performed
+        """
+        due = self.actuations.pop_due()
+        if not due:
+            return 0
+            
+        # Commands queued by automatic control are void once manual mode is on
+        if SystemState.load().control_mode == 'manual':
+            logger.debug("System in manual mode, dropping deferred relay commands")
+            return 0
+            
+        applied = 0
+        for relay_id, state in due:
+            if self.relay_states.get(relay_id) == state:
+                continue
+            if relay_id == self.config['PUMP_RELAY_ID']:
+                self._set_pump_state(state)
+            elif relay_id == self.config['FURNACE_RELAY_ID']:
+                self._set_furnace_state(state)
+            applied += 1
+            logger.info(f"Applied deferred relay command: {relay_id} -> {'ON' if state else 'OFF'}")
+        return applied
+    
+    def _set_pump_state(self, state: bool, ctx: Optional[CycleContext] = None) -> None:
+        """Write pump relay state (cooldown and no-op changes are filtered by decide())"""
         try:
-            pump = Relay.objects.get(circuit_id=self.config['PUMP_RELAY_ID'])
+            if ctx is not None and self.config['PUMP_RELAY_ID'] in ctx.relays:
+                pump = ctx.relays[self.config['PUMP_RELAY_ID']]
+            else:
+                pump = Relay.objects.get(circuit_id=self.config['PUMP_RELAY_ID'])
             if self._set_relay_state(pump, state):
-                self.last_pump_switch = time.time()
+                self.last_pump_switch = time.monotonic()
         except Relay.DoesNotExist:
             logger.warning(f"Pump relay with circuit ID {self.config['PUMP_RELAY_ID']} not found in database")
     
-    def _set_furnace_state(self, state: bool) -> None:
-        """Set furnace relay state with cooldown protection"""
-        if self.last_furnace_switch and (time.time() - self.last_furnace_switch) < self.furnace_cooldown:
-            return
-            
+    def _set_furnace_state(self, state: bool, ctx: Optional[CycleContext] = None) -> None:
+        """Write furnace relay state (cooldown and no-op changes are filtered by decide())"""
         try:
-            furnace = Relay.objects.get(circuit_id=self.config['FURNACE_RELAY_ID'])
+            if ctx is not None and self.config['FURNACE_RELAY_ID'] in ctx.relays:
+                furnace = ctx.relays[self.config['FURNACE_RELAY_ID']]
+            else:
+                furnace = Relay.objects.get(circuit_id=self.config['FURNACE_RELAY_ID'])
             if self._set_relay_state(furnace, state):
-                self.last_furnace_switch = time.time()
+                self.last_furnace_switch = time.monotonic()
         except Relay.DoesNotExist:
             logger.warning(f"Furnace relay with circuit ID {self.config['FURNACE_RELAY_ID']} not found in database")
     
-    def update_all_sensors(self) -> dict:
+    def update_all_sensors(self, ctx: Optional[CycleContext] = None,
+                           circuit_ids: Optional[List[str]] = None) -> dict:
         """
         Update all temperature sensors from hardware and return status
         
+        Args:
+            ctx: Cycle context (loaded with refresh) whose sensor rows are updated in place
+            circuit_ids: Only update these sensors (defaults to all enabled THERMOMETERS)
+            
         Returns:
             Dictionary with update results for each sensor
         """
         results = {}
         
         try:
+            # One bulk request for every device; reads below use the snapshot
+            # (already refreshed when the cycle context was loaded)
+            if ctx is None:
+                self.refresh_snapshot()
+            
+            temperatures = self.update_sensors(circuit_ids, sensors=ctx.sensors if ctx is not None else None)
+            
             # Process all thermometers from configuration
             for i, thermometer in enumerate(self.config['THERMOMETERS']):
                 if thermometer['label'] == 'NONE':
                     continue  # Skip disabled sensors
+                if circuit_ids is not None and thermometer['id'] not in circuit_ids:
+                    continue
                     
-                sensor_id = thermometer['id']
-                temp_key = f'temp_{i+1}'
-                online_key = f'sensor_{i+1}_online'
-                
-                try:
-                    # Read from hardware
-                    data = self.client.get_temperature(sensor_id)
-                    
-                    if data is None:
-                        # Communication error
-                        results[temp_key] = None
-                        results[online_key] = False
-                        continue
-                    
-                    # Check if sensor is lost
-                    if data.get('lost', True):
-                        results[temp_key] = None
-                        results[online_key] = False
-                        continue
-                    
-                    # Get temperature value
-                    new_temp = data.get('value')
-                    if new_temp is None:
-                        results[temp_key] = None
-                        results[online_key] = False
-                        continue
-                    
-                    # Validate temperature (skip validation for now to avoid errors)
-                    # if not self._validate_temperature(None, new_temp):
-                    #     results[temp_key] = None
-                    #     results[online_key] = False
-                    #     continue
-                    
-                    # Update sensor in database
-                    try:
-                        sensor = TemperatureSensor.objects.get(circuit_id=sensor_id)
-                        sensor.current_value = new_temp
-                        sensor.last_reading = timezone.now()
-                        sensor.is_lost = False
-                        sensor.save()
-                        
-                        # Log temperature reading
-                        TemperatureLog.objects.create(
-                            sensor=sensor,
-                            value=new_temp
-                        )
-                        
-                        results[temp_key] = new_temp
-                        results[online_key] = True
-                        
-                        logger.debug(f"Updated {thermometer['label']} temperature: {new_temp:.1f}°C")
-                        
-                    except TemperatureSensor.DoesNotExist:
-                        logger.warning(f"Temperature sensor with circuit ID {sensor_id} not found in database")
-                        results[temp_key] = None
-                        results[online_key] = False
-                        
-                except Exception as e:
-                    logger.error(f"Error updating {thermometer['label']} sensor: {e}")
-                    results[temp_key] = None
-                    results[online_key] = False
+                new_temp = temperatures.get(thermometer['id'])
+                results[f'temp_{i+1}'] = new_temp
+                results[f'sensor_{i+1}_online'] = new_temp is not None
             
             return results
             
@@ -0,0 +1,44 @@
+from dataclasses import dataclass, field
+from typing import Optional, Dict
+
+from core.models import TemperatureSensor, Relay, SystemState
+
+@dataclass
+class CycleContext:
+    """
+    State shared by everything in one monitoring cycle
+    
+    SystemState, the sensor and relay rows and the heating control unit input
+    are loaded once; sensor updates, control decisions and relay writes modify
+    these instances in place, so the status built at the end of the cycle
+    reflects them without reloading.
+    """
+    
+    system_state: SystemState
+    sensors: Dict[str, TemperatureSensor] = field(default_factory=dict)
+    relays: Dict[str, Relay] = field(default_factory=dict)
+    heating_control_state: Optional[bool] = None
+    
+    @classmethod
+    def load(cls, controller, system_state: Optional[SystemState] = None) -> 'CycleContext':
+        """
+        Load the context with one query per table and one DI read
+        
+        Args:
+            controller: HardwareController (its snapshot serves the DI read)
+            system_state: Already loaded SystemState to reuse (loaded if not provided)
+        """
+        return cls(
+            system_state=system_state or SystemState.load(),
+            sensors=TemperatureSensor.objects.in_bulk(
+                [thermometer['id'] for thermometer in controller.config['THERMOMETERS']],
+                field_name='circuit_id'
+            ),
+            relays=Relay.objects.in_bulk(field_name='circuit_id'),
+            heating_control_state=controller._get_heating_control_state(),
+        )
+    
+    def temperature(self, circuit_id: str) -> Optional[float]:
+        """Current value of a sensor or None if it is disabled or unknown"""
+        sensor = self.sensors.get(circuit_id)
+        return sensor.current_value if sensor is not None else None
@@ -0,0 +1,284 @@
+import logging
+import socket
+import struct
+import threading
+import time
+from typing import Optional, Dict, Any, List
+from django.conf import settings
+
+from .resilience import HealthTracker
+from .transport import HardwareTransport, device_key
+
+logger = logging.getLogger(__name__)
+
+# Modbus function codes used by the Unipi
+READ_HOLDING_REGISTERS = 0x03
+WRITE_SINGLE_COIL = 0x05
+WRITE_SINGLE_REGISTER = 0x06
+
+class ModbusError(Exception):
+    """Modbus exception response or malformed frame"""
+    pass
+
+def circuit_bit(circuit_id: str) -> int:
+    """Bit/coil index of an EVOK circuit ID, e.g. '1_01' -> 0, '1_02' -> 1"""
+    return int(circuit_id.rsplit('_', 1)[-1]) - 1
+
+class ModbusTransport(HardwareTransport):
+    """
+    Modbus TCP transport for Unipi relays and digital inputs
+    
+    The digital input and relay bitmaps are read with a single read-holding-
+    registers request; relays are switched with write-single-coil. Temperatures
+    are not exposed over Modbus on the Unipi 1.1 and are delegated to another
+    transport (the shared EVOK client by default).
+    """
+    
+    def __init__(self, host: str = None, port: int = None, temperature_transport: HardwareTransport = None):
+        # Use configuration from settings if not provided
+        config = settings.BANDASKAPP_CONFIG
+        modbus_config = config.get('MODBUS', {})
+        
+        self.host = host or modbus_config.get('host', '127.0.0.1')
+        self.port = port or modbus_config.get('port', 502)
+        self.unit_id = modbus_config.get('unit_id', 0)
+        self.timeout = modbus_config.get('timeout', 1.0)
+        self.input_register = modbus_config.get('input_register', 0)
+        self.relay_register = modbus_config.get('relay_register', 1)
+        self.relay_coil_base = modbus_config.get('relay_coil_base', 0)
+        
+        # Circuit ID -> bit in the bitmap register (and relay coil offset);
+        # derived from the EVOK IDs unless overridden in MODBUS settings
+        self.relay_bits = {
+            config['FURNACE_RELAY_ID']: circuit_bit(config['FURNACE_RELAY_ID']),
+            config['PUMP_RELAY_ID']: circuit_bit(config['PUMP_RELAY_ID']),
+        }
+        self.relay_bits.update(modbus_config.get('relays', {}))
+        self.input_bits = {
+            config['HEATING_CONTROL_UNIT_ID']: circuit_bit(config['HEATING_CONTROL_UNIT_ID']),
+        }
+        self.input_bits.update(modbus_config.get('inputs', {}))
+        
+        if temperature_transport is None:
+            from .client import get_shared_client
+            temperature_transport = get_shared_client()
+        self.temperature_transport = temperature_transport
+        
+        # Health derived from real requests, probed only when there is no traffic
+        self.health = HealthTracker(
+            window=modbus_config.get('health_window', 60),
+            min_success_rate=modbus_config.get('min_success_rate', 0.5),
+            probe_after=modbus_config.get('probe_after', 30),
+        )
+        
+        self.last_error = None
+        self._socket = None
+        self._transaction_id = 0
+        self._lock = threading.Lock()
+        
+        logger.info(f"Modbus transport initialized for {self.host}:{self.port}")
+    
+    def get_temperature(self, circuit_id: str) -> Optional[Dict[str, Any]]:
+        data = self.temperature_transport.get_temperature(circuit_id)
+        self.last_error = self.temperature_transport.get_last_error()
+        return data
+    
+    def get_relay_state(self, circuit_id: str) -> Optional[Dict[str, Any]]:
+        if circuit_id not in self.relay_bits:
+            self.last_error = f"Relay {circuit_id} has no Modbus address"
+            return None
+            
+        registers = self._read_bitmaps(f"reading relay {circuit_id}")
+        if registers is None:
+            return None
+        return self._relay_device(circuit_id, registers[self.relay_register])
+    
+    def set_relay_state(self, circuit_id: str, value: bool) -> Optional[Dict[str, Any]]:
+        if circuit_id not in self.relay_bits:
+            self.last_error = f"Relay {circuit_id} has no Modbus address"
+            return None
+            
+        coil = self.relay_coil_base + self.relay_bits[circuit_id]
+        pdu = struct.pack('>BHH', WRITE_SINGLE_COIL, coil, 0xFF00 if value else 0x0000)
+        if self._transact(pdu, f"setting relay {circuit_id}") is None:
+            return None
+            
+        state = "ON" if value else "OFF"
+        logger.info(f"Relay {circuit_id} set to {state}")
+        return {
+            'success': True,
+            'result': {'dev': 'relay', 'circuit': circuit_id, 'value': int(value)}
+        }
+    
+    def get_digital_input(self, circuit_id: str) -> Optional[Dict[str, Any]]:
+        if circuit_id not in self.input_bits:
+            self.last_error = f"Digital input {circuit_id} has no Modbus address"
+            return None
+            
+        registers = self._read_bitmaps(f"reading digital input {circuit_id}")
+        if registers is None:
+            return None
+        return self._input_device(circuit_id, registers[self.input_register])
+    
+    def set_digital_input(self, circuit_id: str, value: bool) -> Optional[Dict[str, Any]]:
+        """Write the input bitmap register (only accepted by the stand-in server)"""
+        if circuit_id not in self.input_bits:
+            self.last_error = f"Digital input {circuit_id} has no Modbus address"
+            return None
+            
+        action = f"setting digital input {circuit_id}"
+        registers = self._read_bitmaps(action)
+        if registers is None:
+            return None
+            
+        bitmap = registers[self.input_register]
+        mask = 1 << self.input_bits[circuit_id]
+        bitmap = bitmap | mask if value else bitmap & ~mask
+        pdu = struct.pack('>BHH', WRITE_SINGLE_REGISTER, self.input_register, bitmap)
+        if self._transact(pdu, action) is None:
+            return None
+        return {'success': True, 'result': self._input_device(circuit_id, bitmap)}
+    
+    def get_all(self) -> Optional[List[Dict[str, Any]]]:
+        """Relays and inputs from one Modbus request, temperatures from the temperature transport"""
+        registers = self._read_bitmaps("reading all devices")
+        if registers is None:
+            return None
+            
+        devices = [
+            self._relay_device(circuit_id, registers[self.relay_register])
+            for circuit_id in self.relay_bits
+        ]
+        devices.extend(
+            self._input_device(circuit_id, registers[self.input_register])
+            for circuit_id in self.input_bits
+        )
+        
+        temperatures = self.temperature_transport.get_all()
+        if temperatures is not None:
+            devices.extend(device for device in temperatures if device_key(device)[0] == 'temp')
+        return devices
+    
+    def test_connection(self) -> bool:
+        if self._read_bitmaps("testing connection") is None:
+            error_msg = f"Modbus connection test failed: {self.last_error}"
+            logger.error(error_msg)
+            self.last_error = error_msg
+            return False
+            
+        logger.info("Modbus connection test successful")
+        return True
+    
+    def check_health(self) -> bool:
+        """
+        Check Modbus health from the success of recent requests
+        
+        Only probes the server (test_connection) when no request was made recently.
+        
+        Returns:
+            True if the Modbus server is considered reachable, False otherwise
+        """
+        if self.health.needs_probe():
+            return self.test_connection()
+            
+        if not self.health.is_healthy():
+            self.last_error = f"Modbus unhealthy: {self.last_error}"
+            return False
+        return True
+    
+    def _relay_device(self, circuit_id: str, bitmap: int) -> Dict[str, Any]:
+        return {'dev': 'relay', 'circuit': circuit_id, 'value': (bitmap >> self.relay_bits[circuit_id]) & 1}
+    
+    def _input_device(self, circuit_id: str, bitmap: int) -> Dict[str, Any]:
+        return {'dev': 'di', 'circuit': circuit_id, 'value': (bitmap >> self.input_bits[circuit_id]) & 1}
+    
+    def _read_bitmaps(self, action: str) -> Optional[Dict[int, int]]:
+        """
+        Read the input and relay bitmap registers in one request
+        
+        Returns:
+            Dictionary mapping register address to value or None on error
+        """
+        start = min(self.input_register, self.relay_register)
+        count = max(self.input_register, self.relay_register) - start + 1
+        
+        response = self._transact(struct.pack('>BHH', READ_HOLDING_REGISTERS, start, count), action)
+        if response is None:
+            return None
+            
+        byte_count = response[1]
+        if byte_count != 2 * count or len(response) < 2 + byte_count:
+            self.last_error = f"Malformed Modbus response {action}"
+            logger.error(self.last_error)
+            return None
+            
+        values = struct.unpack(f'>{count}H', response[2:2 + byte_count])
+        return {start + offset: value for offset, value in enumerate(values)}
+    
+    def _transact(self, pdu: bytes, action: str) -> Optional[bytes]:
+        """
+        Send one request PDU and return the response PDU
+        
+        The TCP connection is kept open between requests and re-established
+        after any error.
+        
+        Args:
+            pdu: Function code and data
+            action: Description used in error messages (e.g. "reading relay 1_01")
+            
+        Returns:
+            Response PDU or None on error
+        """
+        with self._lock:
+            started = time.monotonic()
+            try:
+                if self._socket is None:
+                    self._socket = socket.create_connection((self.host, self.port), timeout=self.timeout)
+                    self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    
+                self._transaction_id = (self._transaction_id + 1) & 0xFFFF
+                header = struct.pack('>HHHB', self._transaction_id, 0, len(pdu) + 1, self.unit_id)
+                self._socket.sendall(header + pdu)
+                
+                transaction_id, _, length, _ = struct.unpack('>HHHB', self._recv_exact(7))
+                response = self._recv_exact(length - 1)
+                
+                if transaction_id != self._transaction_id:
+                    raise ModbusError(f"transaction ID mismatch ({transaction_id} != {self._transaction_id})")
+                if response[0] & 0x80:
+                    raise ModbusError(f"exception code {response[1]} for function {response[0] & 0x7F}")
+                    
+                self.last_error = None
+                self.health.record(True, time.monotonic() - started)
+                return response
+                
+            except socket.timeout:
+                error_msg = f"Timeout {action}"
+            except (ConnectionError, OSError) as e:
+                error_msg = f"Connection error {action}: {e}"
+            except ModbusError as e:
+                error_msg = f"Modbus error {action}: {e}"
+                
+            logger.error(error_msg)
+            self.last_error = error_msg
+            self.health.record(False)
+            self._close()
+            return None
+    
+    def _recv_exact(self, size: int) -> bytes:
+        """Read exactly size bytes from the connection"""
+        data = b''
+        while len(data) < size:
+            chunk = self._socket.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("connection closed by server")
+            data += chunk
+        return data
+    
+    def _close(self) -> None:
+        if self._socket is not None:
+            try:
+                self._socket.close()
+            except OSError:
+                pass
+            self._socket = None
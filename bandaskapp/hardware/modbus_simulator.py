@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Modbus TCP stand-in for BandaskApp development and tests
+Serves the Unipi digital input / relay bitmap registers and relay coils
+"""
+import argparse
+import socketserver
+import struct
+import threading
+
+READ_HOLDING_REGISTERS = 0x03
+WRITE_SINGLE_COIL = 0x05
+WRITE_SINGLE_REGISTER = 0x06
+
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+ILLEGAL_DATA_VALUE = 0x03
+
+class ModbusStandIn:
+    """Minimal Modbus TCP server holding the input and relay bitmaps in memory"""
+    
+    def __init__(self, host: str = '127.0.0.1', port: int = 5020, input_register: int = 0,
+                 relay_register: int = 1, relay_coil_base: int = 0, register_count: int = 2):
+        self.input_register = input_register
+        self.relay_register = relay_register
+        self.relay_coil_base = relay_coil_base
+        self.registers = [0] * max(register_count, input_register + 1, relay_register + 1)
+        self.request_count = 0
+        self.lock = threading.Lock()
+        
+        stand_in = self
+        
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                stand_in._serve_connection(self.request)
+                
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.address = self.server.server_address
+        self.thread = None
+    
+    def start(self):
+        """Serve in a background thread"""
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def set_input(self, bit: int, value: bool):
+        """Change a digital input, e.g. to simulate the heating control unit"""
+        self._set_bit(self.input_register, bit, value)
+    
+    def get_relay(self, bit: int) -> int:
+        with self.lock:
+            return (self.registers[self.relay_register] >> bit) & 1
+    
+    def _set_bit(self, register: int, bit: int, value: bool):
+        with self.lock:
+            if value:
+                self.registers[register] |= 1 << bit
+            else:
+                self.registers[register] &= ~(1 << bit)
+    
+    def _serve_connection(self, conn):
+        """Answer requests on one connection until the client disconnects"""
+        while True:
+            header = self._recv_exact(conn, 7)
+            if header is None:
+                return
+            transaction_id, protocol_id, length, unit_id = struct.unpack('>HHHB', header)
+            pdu = self._recv_exact(conn, length - 1)
+            if pdu is None:
+                return
+                
+            response = self._handle_pdu(pdu)
+            conn.sendall(struct.pack('>HHHB', transaction_id, protocol_id, len(response) + 1, unit_id) + response)
+    
+    def _handle_pdu(self, pdu: bytes) -> bytes:
+        function = pdu[0]
+        with self.lock:
+            self.request_count += 1
+            
+        if function == READ_HOLDING_REGISTERS:
+            address, count = struct.unpack('>HH', pdu[1:5])
+            if address + count > len(self.registers):
+                return bytes([function | 0x80, ILLEGAL_DATA_ADDRESS])
+            with self.lock:
+                values = self.registers[address:address + count]
+            return struct.pack(f'>BB{count}H', function, 2 * count, *values)
+            
+        if function == WRITE_SINGLE_COIL:
+            address, value = struct.unpack('>HH', pdu[1:5])
+            bit = address - self.relay_coil_base
+            if not 0 <= bit < 16:
+                return bytes([function | 0x80, ILLEGAL_DATA_ADDRESS])
+            if value not in (0x0000, 0xFF00):
+                return bytes([function | 0x80, ILLEGAL_DATA_VALUE])
+            self._set_bit(self.relay_register, bit, value == 0xFF00)
+            return pdu[:5]
+            
+        if function == WRITE_SINGLE_REGISTER:
+            address, value = struct.unpack('>HH', pdu[1:5])
+            if address >= len(self.registers):
+                return bytes([function | 0x80, ILLEGAL_DATA_ADDRESS])
+            with self.lock:
+                self.registers[address] = value
+            return pdu[:5]
+            
+        return bytes([function | 0x80, ILLEGAL_FUNCTION])
+    
+    @staticmethod
+    def _recv_exact(conn, size: int):
+        data = b''
+        while len(data) < size:
+            chunk = conn.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Modbus TCP stand-in for the Unipi relays and inputs')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=5020, help='TCP port to listen on')
+    args = parser.parse_args()
+    
+    stand_in = ModbusStandIn(args.host, args.port)
+    print(f"Modbus stand-in listening on {args.host}:{args.port}")
+    try:
+        stand_in.server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down Modbus stand-in...")
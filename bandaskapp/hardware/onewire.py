@@ -0,0 +1,182 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Iterable, List
+from django.conf import settings
+
+from .transport import HardwareTransport, device_key
+
+logger = logging.getLogger(__name__)
+
+# DS18B20 power-on reset value - returned when a conversion did not complete
+POWER_ON_RESET_MILLIDEGREES = 85000
+
+class OneWireSensorReader:
+    """Reads DS18B20 temperature sensors directly from the Linux w1 sysfs tree"""
+    
+    def __init__(self, base_path: str = None, retries: int = None, max_workers: int = None):
+        # Use configuration from settings if not provided
+        onewire_config = settings.BANDASKAPP_CONFIG.get('ONEWIRE', {})
+        if base_path is None:
+            base_path = onewire_config.get('base_path', '/sys/bus/w1/devices')
+        if retries is None:
+            retries = onewire_config.get('retries', 2)
+        if max_workers is None:
+            max_workers = onewire_config.get('max_workers', 8)
+            
+        self.base_path = base_path
+        self.retries = retries
+        self.last_error = None
+        
+        # Each conversion takes up to 750 ms, so sensors are read in parallel
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='w1')
+    
+    @staticmethod
+    def sysfs_name(circuit_id: str) -> str:
+        """
+        Convert an EVOK circuit ID to the w1 sysfs device name
+        
+        EVOK prints the 64-bit ROM in bus order (family, 6 serial bytes, CRC),
+        e.g. '28AA8C7F481401C8'; the kernel names the device family-serial with
+        the serial as a little-endian number, e.g. '28-0114487f8caa'.
+        
+        Raises:
+            ValueError: If the ID is not a 16-digit hex ROM code
+        """
+        if '-' in circuit_id:
+            return circuit_id.lower()
+            
+        rom = bytes.fromhex(circuit_id)
+        if len(rom) != 8:
+            raise ValueError(f"expected a 16-digit ROM code, got {len(circuit_id)} characters")
+        return f"{rom[0]:02x}-{rom[6:0:-1].hex()}"
+    
+    def read(self, circuit_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Read one sensor, retrying CRC failures and incomplete conversions
+        
+        Args:
+            circuit_id: EVOK circuit ID (or sysfs device name) of the sensor
+            
+        Returns:
+            EVOK-shaped temperature dictionary ('lost' is True if the sensor is
+            not on the bus) or None if the circuit ID is invalid or every attempt
+            was a bad read (CRC error, unparsable value or power-on reset value)
+        """
+        try:
+            path = os.path.join(self.base_path, self.sysfs_name(circuit_id), 'w1_slave')
+        except ValueError as e:
+            # A bad configured ID must not break reads of the other sensors
+            self.last_error = f"Invalid 1-Wire circuit ID {circuit_id!r}: {e}"
+            logger.error(self.last_error)
+            return None
+            
+        data = {'dev': 'temp', 'circuit': circuit_id, 'type': 'DS18B20', 'time': time.time()}
+        
+        for attempt in range(1 + self.retries):
+            try:
+                with open(path) as f:
+                    lines = f.read().splitlines()
+            except FileNotFoundError:
+                data.update(value=None, lost=True)
+                return data
+            except OSError as e:
+                error_msg = f"Error reading 1-Wire sensor {circuit_id}: {e}"
+                logger.warning(error_msg)
+                self.last_error = error_msg
+                continue
+                
+            # Line 1 ends with "crc=xx YES|NO", line 2 with "t=<millidegrees>"
+            if len(lines) < 2 or not lines[0].strip().endswith('YES') or 't=' not in lines[1]:
+                logger.debug(f"CRC error on 1-Wire sensor {circuit_id} (attempt {attempt + 1})")
+                self.last_error = f"CRC error reading 1-Wire sensor {circuit_id}"
+                continue
+                
+            try:
+                millidegrees = int(lines[1].rsplit('t=', 1)[1])
+            except ValueError:
+                # Truncated or garbled read - retried like a CRC error
+                logger.debug(f"Unparsable reading from 1-Wire sensor {circuit_id} (attempt {attempt + 1})")
+                self.last_error = f"Unparsable reading from 1-Wire sensor {circuit_id}"
+                continue
+                
+            if millidegrees == POWER_ON_RESET_MILLIDEGREES:
+                logger.debug(f"1-Wire sensor {circuit_id} returned power-on reset value (attempt {attempt + 1})")
+                self.last_error = f"Incomplete conversion on 1-Wire sensor {circuit_id}"
+                continue
+                
+            data.update(value=millidegrees / 1000.0, lost=False)
+            return data
+            
+        logger.error(self.last_error)
+        return None
+    
+    def read_many(self, circuit_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Read several sensors in parallel, returning circuit ID -> data (None on error)"""
+        circuit_ids = list(circuit_ids)
+        return dict(zip(circuit_ids, self.executor.map(self.read, circuit_ids)))
+
+class OneWireTransport(HardwareTransport):
+    """
+    Transport reading temperatures straight from 1-Wire sysfs
+    
+    Relays and digital inputs are delegated to another transport (normally EVOK).
+    """
+    
+    def __init__(self, io_transport: HardwareTransport, reader: OneWireSensorReader = None):
+        self.io = io_transport
+        self.reader = reader or OneWireSensorReader()
+        self.last_error = None
+    
+    def _sensor_ids(self) -> List[str]:
+        """Circuit IDs of all enabled thermometers from configuration"""
+        return [
+            thermometer['id']
+            for thermometer in settings.BANDASKAPP_CONFIG['THERMOMETERS']
+            if thermometer['id'] != 'NONE'
+        ]
+    
+    def get_temperature(self, circuit_id: str) -> Optional[Dict[str, Any]]:
+        data = self.reader.read(circuit_id)
+        self.last_error = None if data is not None else self.reader.last_error
+        return data
+    
+    def get_relay_state(self, circuit_id: str) -> Optional[Dict[str, Any]]:
+        return self._delegate(self.io.get_relay_state, circuit_id)
+    
+    def set_relay_state(self, circuit_id: str, value: bool) -> Optional[Dict[str, Any]]:
+        return self._delegate(self.io.set_relay_state, circuit_id, value)
+    
+    def get_digital_input(self, circuit_id: str) -> Optional[Dict[str, Any]]:
+        return self._delegate(self.io.get_digital_input, circuit_id)
+    
+    def set_digital_input(self, circuit_id: str, value: bool) -> Optional[Dict[str, Any]]:
+        return self._delegate(self.io.set_digital_input, circuit_id, value)
+    
+    def get_all(self) -> Optional[List[Dict[str, Any]]]:
+        """Read all sensors from sysfs in parallel and relays/inputs from the I/O transport"""
+        readings = self.reader.read_many(self._sensor_ids())
+        devices = [data for data in readings.values() if data is not None]
+        
+        io_devices = self._delegate(self.io.get_all)
+        if io_devices is not None:
+            devices.extend(device for device in io_devices if device_key(device)[0] != 'temp')
+            
+        return devices
+    
+    def test_connection(self) -> bool:
+        result = self.io.test_connection()
+        self.last_error = self.io.get_last_error()
+        return result
+    
+    def check_health(self) -> bool:
+        result = self.io.check_health()
+        self.last_error = self.io.get_last_error()
+        return result
+    
+    def _delegate(self, method, *args):
+        """Call the I/O transport and take over its error state"""
+        data = method(*args)
+        self.last_error = self.io.get_last_error()
+        return data
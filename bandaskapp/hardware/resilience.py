@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker that fails fast while EVOK is unreachable"""
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+    
+    @property
+    def is_open(self) -> bool:
+        """True while requests are being rejected (open and not yet due for a probe)"""
+        with self._lock:
+            return self.state == self.OPEN and (time.monotonic() - self.opened_at) < self.reset_timeout
+    
+    def allow_request(self) -> bool:
+        """
+        Check if a request may be sent
+        
+        After the reset timeout one probe request is let through (half-open);
+        its outcome closes or re-opens the breaker.
+        
+        Returns:
+            True if the request may proceed, False to fail fast
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+                
+            if self.state == self.OPEN:
+                if (time.monotonic() - self.opened_at) < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+                logger.info("EVOK circuit breaker half-open, probing")
+                
+            # Half-open: only a single probe at a time
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+    
+    def record_success(self) -> None:
+        """Record a request that reached EVOK"""
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("EVOK circuit breaker closed, EVOK reachable again")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+    
+    def record_failure(self) -> None:
+        """Record a request that could not reach EVOK"""
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(
+                        f"EVOK circuit breaker open after {self.failures} failures, "
+                        f"failing fast for {self.reset_timeout}s"
+                    )
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+class LatencyTracker:
+    """Per-endpoint latency history used to derive adaptive request timeouts"""
+    
+    def __init__(self, min_timeout: float = 0.5, max_timeout: float = 5.0,
+                 percentile: float = 99, multiplier: float = 3.0,
+                 window: int = 50, min_samples: int = 10):
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.window = window
+        self.min_samples = min_samples
+        
+        self._samples = {}
+        self._lock = threading.Lock()
+    
+    def record(self, endpoint: str, latency: float) -> None:
+        """Record the latency of one request in seconds"""
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if samples is None:
+                samples = self._samples[endpoint] = deque(maxlen=self.window)
+            samples.append(latency)
+    
+    def get_percentile(self, endpoint: str):
+        """Return the configured latency percentile for an endpoint, or None without data"""
+        with self._lock:
+            samples = sorted(self._samples.get(endpoint, ()))
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+        return samples[index]
+    
+    def timeout_for(self, endpoint: str) -> float:
+        """
+        Get the request timeout for an endpoint
+        
+        Uses the maximum timeout until enough samples exist, then a multiple of
+        the observed latency percentile clamped to [min_timeout, max_timeout].
+        """
+        with self._lock:
+            sample_count = len(self._samples.get(endpoint, ()))
+        if sample_count < self.min_samples:
+            return self.max_timeout
+            
+        timeout = self.get_percentile(endpoint) * self.multiplier
+        return max(self.min_timeout, min(self.max_timeout, timeout))
+
+class HealthTracker:
+    """
+    Passive EVOK health model built from the outcome and latency of real requests
+    
+    Keeps the requests of the last `window` seconds; EVOK counts as healthy while
+    enough of them succeeded. An active probe is only needed when there has been
+    no traffic for `probe_after` seconds.
+    """
+    
+    def __init__(self, window: float = 60.0, min_success_rate: float = 0.5, probe_after: float = 30.0):
+        self.window = window
+        self.min_success_rate = min_success_rate
+        self.probe_after = probe_after
+        
+        self._samples = deque()  # (time.monotonic(), success, latency)
+        self._lock = threading.Lock()
+    
+    def record(self, success: bool, latency: float = None) -> None:
+        """Record the outcome of one request (latency in seconds, None if unknown)"""
+        with self._lock:
+            now = time.monotonic()
+            self._samples.append((now, success, latency))
+            self._expire(now)
+    
+    def idle_for(self) -> float:
+        """Seconds since the last recorded request (infinite if none is in the window)"""
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            return now - self._samples[-1][0] if self._samples else float('inf')
+    
+    def needs_probe(self) -> bool:
+        """True if there was no traffic recently enough to judge health"""
+        return self.idle_for() >= self.probe_after
+    
+    def is_healthy(self) -> bool:
+        """True if the last request succeeded or the window's success rate is sufficient"""
+        with self._lock:
+            self._expire(time.monotonic())
+            if not self._samples:
+                return False
+            if self._samples[-1][1]:
+                return True
+            successes = sum(1 for _, success, _ in self._samples if success)
+            return successes / len(self._samples) >= self.min_success_rate
+    
+    def stats(self) -> dict:
+        """Request count, success rate and latencies (seconds) over the window"""
+        with self._lock:
+            self._expire(time.monotonic())
+            samples = list(self._samples)
+            
+        latencies = sorted(latency for _, success, latency in samples if success and latency is not None)
+        return {
+            'requests': len(samples),
+            'success_rate': sum(1 for _, success, _ in samples if success) / len(samples) if samples else None,
+            'median_latency': latencies[len(latencies) // 2] if latencies else None,
+            'max_latency': latencies[-1] if latencies else None,
+        }
+    
+    def _expire(self, now: float) -> None:
+        """Drop samples older than the window (lock held)"""
+        while self._samples and now - self._samples[0][0] > self.window:
+            self._samples.popleft()
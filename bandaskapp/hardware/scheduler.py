@@ -0,0 +1,130 @@
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Optional, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ScheduledTask:
+    """A periodic task and its timing statistics (times are time.monotonic() values)"""
+    
+    name: str
+    period: float
+    callback: Callable[[], None]
+    deadline: float  # Seconds after the due time by which a run must have finished
+    next_run: float = 0.0
+    runs: int = 0
+    overruns: int = 0  # Runs that finished after their deadline
+    skipped: int = 0  # Periods dropped because a run was still late
+    last_duration: float = 0.0
+    max_duration: float = 0.0
+
+class TaskScheduler:
+    """
+    Runs tasks at their own periods on a drift-free monotonic timeline
+    
+    Each task is due at fixed multiples of its period from its start time, so
+    run time does not accumulate as drift. A run finishing after its deadline
+    counts as an overrun; periods missed entirely are skipped (not run back to
+    back) and reported.
+    """
+    
+    def __init__(self):
+        self.tasks = {}  # name -> ScheduledTask, in registration order
+    
+    def add(self, name: str, period: float, callback: Callable[[], None],
+            deadline: float = None, delay: float = 0.0) -> ScheduledTask:
+        """
+        Register a periodic task
+        
+        Args:
+            name: Unique task name
+            period: Seconds between runs
+            callback: Function to run
+            deadline: Seconds after the due time by which a run should finish
+                (defaults to the period)
+            delay: Seconds until the first run (0 = run on the first pass)
+            
+        Returns:
+            The registered ScheduledTask
+        """
+        task = ScheduledTask(
+            name=name,
+            period=period,
+            callback=callback,
+            deadline=period if deadline is None else deadline,
+            next_run=time.monotonic() + delay,
+        )
+        self.tasks[name] = task
+        return task
+    
+    def set_period(self, name: str, period: float) -> None:
+        """Change the period of a task, effective from its next run"""
+        task = self.tasks[name]
+        task.next_run += period - task.period
+        task.period = period
+    
+    def run_now(self, name: str) -> None:
+        """Make a task due immediately (e.g. after an event), restarting its timeline"""
+        self.tasks[name].next_run = time.monotonic()
+    
+    def next_due_in(self) -> Optional[float]:
+        """Seconds until the earliest task is due, or None without tasks"""
+        if not self.tasks:
+            return None
+        return max(0.0, min(task.next_run for task in self.tasks.values()) - time.monotonic())
+    
+    def run_pending(self) -> List[str]:
+        """
+        Run every task that is due, earliest due time first
+        
+        Returns:
+            Names of the tasks that ran
+        """
+        ran = []
+        now = time.monotonic()
+        due = sorted((task for task in self.tasks.values() if task.next_run <= now), key=lambda task: task.next_run)
+        
+        for task in due:
+            due_time = task.next_run
+            start = time.monotonic()
+            try:
+                task.callback()
+            except Exception as e:
+                logger.error(f"Task {task.name} failed: {e}")
+            end = time.monotonic()
+            ran.append(task.name)
+            
+            task.runs += 1
+            task.last_duration = end - start
+            task.max_duration = max(task.max_duration, task.last_duration)
+            if end - due_time > task.deadline:
+                task.overruns += 1
+                logger.warning(f"Task {task.name} missed its {task.deadline:.1f}s deadline: started "
+                               f"{start - due_time:.2f}s late, ran {task.last_duration:.2f}s")
+                               
+            # Next slot on the original timeline, skipping the ones already missed
+            task.next_run = due_time + task.period
+            if task.next_run <= end:
+                missed = math.floor((end - task.next_run) / task.period) + 1
+                task.next_run += missed * task.period
+                task.skipped += missed
+                logger.warning(f"Task {task.name} skipped {missed} period(s) of {task.period:.1f}s")
+                
+        return ran
+    
+    def stats(self) -> Dict[str, dict]:
+        """Timing statistics per task"""
+        return {
+            task.name: {
+                'period': task.period,
+                'runs': task.runs,
+                'overruns': task.overruns,
+                'skipped': task.skipped,
+                'last_duration': task.last_duration,
+                'max_duration': task.max_duration,
+            }
+            for task in self.tasks.values()
+        }
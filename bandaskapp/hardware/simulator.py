@@ -12,10 +12,16 @@ import select
 import tty
 import termios
 import os
+import queue
 import django
 from datetime import datetime
 from flask import Flask, jsonify, request
 
+try:
+    from flask_sock import Sock
+except ImportError:  # flask-sock not installed - WebSocket endpoint disabled
+    Sock = None
+
 # Setup Django environment to access settings
 import sys
 import os
@@ -30,6 +36,7 @@ django.setup()
 from django.conf import settings
 
 app = Flask(__name__)
+sock = Sock(app) if Sock else None
 
 # Get configuration from Django settings
 CONFIG = settings.BANDASKAPP_CONFIG
@@ -40,7 +47,12 @@ CONTROL_DHW_ID = CONFIG['CONTROL_DHW_ID']
 CONTROL_HHW_ID = CONFIG['CONTROL_HHW_ID']
 
 class EVOKSimulator:
-    def __init__(self):
+    def __init__(self, background=True, clock=time.time):
+        # background=False builds only the state model (no threads, keyboard or
+        # console output); callers then advance it with step()
+        self.background = background
+        self.clock = clock
+        
         # Temperature sensors - Initialize from new array-based configuration
         self.sensors = {}
         
@@ -56,7 +68,7 @@ class EVOKSimulator:
                     'address': address,
                     'value': 15.0,  # Start below 45°C threshold
                     'lost': False,
-                    'time': time.time(),
+                    'time': self.clock(),
                     'type': 'DS18B20'
                 }
 
@@ -91,7 +103,7 @@ class EVOKSimulator:
         
         # Temperature cycling parameters
         self.simulation_mode = 'auto'  # 'auto' or 'manual'
-        self.cycle_start_time = time.time()
+        self.cycle_start_time = self.clock()
         self.cycle_period = 60  # 2 minutes for full cycle (30-70°C) - much faster!
         self.temp_min = 30.0
         self.temp_max = 70.0
@@ -99,15 +111,24 @@ class EVOKSimulator:
         self.temp_amplitude = (self.temp_max - self.temp_min) / 2  # 20°C
         self.manual_temp_adjustment = 0.0
         
+        # WebSocket subscribers - one event queue per connected client
+        self.ws_clients = []
+        self.ws_clients_lock = threading.Lock()
+        
         # Keyboard input handling
         self.old_settings = None
-        self.setup_keyboard()
+        if background:
+            self.setup_keyboard()
         
         # Heating control unit cycling parameters
-        self.heating_control_cycle_start = time.time()
+        self.heating_control_cycle_start = self.clock()
         self.heating_control_cycle_period = 15  # 15 seconds per state
         self.heating_control_manual_state = None  # None = auto cycling, 0/1 = manual state
         
+        # In-process use (e.g. MemoryTransport) advances the model explicitly
+        if not background:
+            return
+        
         # Start background threads
         self.simulation_thread = threading.Thread(target=self._simulate_temperature, daemon=True)
         self.simulation_thread.start()
@@ -183,7 +204,7 @@ class EVOKSimulator:
                     elif key.lower() == 'a':
                         self.simulation_mode = 'auto'
                         self.manual_temp_adjustment = 0.0
-                        self.cycle_start_time = time.time()
+                        self.cycle_start_time = self.clock()
                         print(f"\r{datetime.now().strftime('%H:%M:%S')} - Reset to AUTO mode")
                         
                     elif key.lower() == 'h':
@@ -192,6 +213,7 @@ class EVOKSimulator:
                         new_state = 1 - current_state  # Toggle between 0 and 1
                         self.heating_control_manual_state = new_state
                         self.inputs[HEATING_CONTROL_UNIT_ID]['value'] = new_state
+                        self.publish([self.get_digital_input(HEATING_CONTROL_UNIT_ID)])
                         state_name = "ON" if new_state else "OFF"
                         print(f"\r{datetime.now().strftime('%H:%M:%S')} - Heating Control Unit: {state_name} (Manual)")
                         
@@ -215,7 +237,7 @@ class EVOKSimulator:
     
     def _get_auto_cycle_temperature(self):
         """Calculate temperature based on sinusoidal cycle"""
-        current_time = time.time()
+        current_time = self.clock()
         elapsed_time = current_time - self.cycle_start_time
         
         # Calculate position in cycle (0 to 2π)
@@ -257,112 +279,37 @@ class EVOKSimulator:
         """Background thread to simulate heating control unit cycling"""
         while True:
             try:
-                # Only auto-cycle if not in manual mode
-                if self.heating_control_manual_state is None:
-                    current_time = time.time()
-                    elapsed_time = current_time - self.heating_control_cycle_start
-                    
-                    # Calculate current state based on 15-second intervals
-                    cycle_position = int(elapsed_time / self.heating_control_cycle_period) % 2
-                    new_state = cycle_position  # 0 or 1
-                    
-                    old_state = self.inputs[HEATING_CONTROL_UNIT_ID]['value']
-                    if old_state != new_state:
-                        self.inputs[HEATING_CONTROL_UNIT_ID]['value'] = new_state
-                        state_name = "ON" if new_state else "OFF"
-                        print(f"[{datetime.now().strftime('%H:%M:%S')}] Heating Control Unit: {state_name} (Auto-cycle)")
-                
+                self.step_heating_control()
                 time.sleep(1)  # Check every second
                 
             except Exception as e:
                 print(f"❌ Heating control simulation error: {e}")
                 time.sleep(5)
     
+    def step_heating_control(self):
+        """Advance the heating control unit auto-cycle by one tick"""
+        # Only auto-cycle if not in manual mode
+        if self.heating_control_manual_state is None:
+            current_time = self.clock()
+            elapsed_time = current_time - self.heating_control_cycle_start
+            
+            # Calculate current state based on 15-second intervals
+            cycle_position = int(elapsed_time / self.heating_control_cycle_period) % 2
+            new_state = cycle_position  # 0 or 1
+            
+            old_state = self.inputs[HEATING_CONTROL_UNIT_ID]['value']
+            if old_state != new_state:
+                self.inputs[HEATING_CONTROL_UNIT_ID]['value'] = new_state
+                self.publish([self.get_digital_input(HEATING_CONTROL_UNIT_ID)])
+                state_name = "ON" if new_state else "OFF"
+                if self.background:
+                    print(f"[{datetime.now().strftime('%H:%M:%S')}] Heating Control Unit: {state_name} (Auto-cycle)")
+    
     def _simulate_temperature(self):
         """Background thread to simulate realistic temperature changes"""
         while True:
             try:
-                # Use CONTROL_DHW_ID for temperature simulation
-                if CONTROL_DHW_ID not in self.sensors:
-                    time.sleep(1)
-                    continue
-                dhw_sensor = self.sensors[CONTROL_DHW_ID]
-                furnace_relay = self.relays[FURNACE_RELAY_ID]
-                
-                current_temp = dhw_sensor['value']
-                furnace_on = furnace_relay['value'] == 1
-                
-                if self.simulation_mode == 'auto':
-                    # Auto mode: Follow sinusoidal cycle
-                    new_temp = self._get_auto_cycle_temperature()
-
-                    
-                elif self.simulation_mode == 'manual':
-                    # Manual mode: Apply manual adjustments
-                    new_temp = current_temp + self.manual_temp_adjustment
-               
-                    # Apply furnace heating/cooling in manual mode too
-                    if furnace_on:
-                        temp_change = self.heating_rate  # Heat up
-                    else:
-                        temp_change = -self.cooling_rate  # Cool down towards ambient
-               
-                    new_temp = new_temp + temp_change
-                    
-                
-                # Clamp temperature to reasonable bounds
-                new_temp = max(15.0, min(new_temp, 90.0))
-                
-                # Update sensor
-                old_temp = dhw_sensor['value']
-                dhw_sensor['value'] = round(new_temp, 1)
-                dhw_sensor['time'] = time.time()
-                # Update CONTROL_HHW_ID if it's different from CONTROL_DHW_ID
-                if CONTROL_HHW_ID != CONTROL_DHW_ID and CONTROL_HHW_ID in self.sensors:
-                    self.sensors[CONTROL_HHW_ID]['value'] = dhw_sensor['value']
-                    self.sensors[CONTROL_HHW_ID]['time'] = dhw_sensor['time']
-                
-                # Update all enabled thermometers with calculated values (excluding control sensors)
-                for i, thermometer in enumerate(CONFIG['THERMOMETERS']):
-                    if (thermometer['id'] != 'NONE' and 
-                        thermometer['id'] in self.sensors and 
-                        thermometer['id'] != CONTROL_DHW_ID and 
-                        thermometer['id'] != CONTROL_HHW_ID):
-                        # Generic simulation for any number of thermometers (excluding control sensors)
-                        # Simulate each thermometer as a function of the main (DHW) sensor, with decreasing value and amplitude
-                        # Example: Each subsequent sensor is further from the heat source
-                        offset = 5 * i  # 5°C offset per sensor index
-                        scale = max(0.2, 1.0 - 0.2 * i)  # Decrease scale for each sensor, min 0.2
-                        self.sensors[thermometer['id']]['value'] = (dhw_sensor['value'] - offset) * scale
-                        self.sensors[thermometer['id']]['time'] = dhw_sensor['time']
-                
-                # Special handling for DHW Top (first sensor) - give it a value close to control sensor
-                if (CONFIG['THERMOMETERS'][0]['id'] != 'NONE' and 
-                    CONFIG['THERMOMETERS'][0]['id'] in self.sensors and 
-                    CONFIG['THERMOMETERS'][0]['id'] != CONTROL_DHW_ID):
-                    # DHW Top should be close to the control sensor but slightly different
-                    dhw_top_offset = 2.0  # 2°C difference from control sensor
-                    self.sensors[CONFIG['THERMOMETERS'][0]['id']]['value'] = dhw_sensor['value'] - dhw_top_offset
-                    self.sensors[CONFIG['THERMOMETERS'][0]['id']]['time'] = dhw_sensor['time']
-
-                self.manual_temp_adjustment = 0.0
-
-                
-                # Log temperature changes
-                if abs(new_temp - old_temp) > 0.1:
-                    if self.simulation_mode == 'auto':
-                        cycle_progress = ((time.time() - self.cycle_start_time) / self.cycle_period) * 100
-                        status = f"AUTO-CYCLE ({cycle_progress:.1f}%)"
-                        if furnace_on:
-                            status += " + HEATING"
-                    else:
-                        status = "MANUAL"
-                        if furnace_on:
-                            status += " + HEATING"
-                    
-                    print(f"[{datetime.now().strftime('%H:%M:%S')}] {CONTROL_DHW_ID}: {new_temp:.1f}°C ({status})")
-                    if CONTROL_HHW_ID != CONTROL_DHW_ID and CONTROL_HHW_ID in self.sensors:
-                        print(f"[{datetime.now().strftime('%H:%M:%S')}] {CONTROL_HHW_ID}: {new_temp:.1f}°C (copied from DHW)")
+                self.step_temperature()
                 
             except Exception as e:
                 print(f"❌ Simulation error: {e}")
@@ -370,6 +317,101 @@ class EVOKSimulator:
             
             time.sleep(1)  # Update every second
     
+    def step_temperature(self):
+        """Advance the temperature model by one tick (one second of simulation)"""
+        # Use CONTROL_DHW_ID for temperature simulation
+        if CONTROL_DHW_ID not in self.sensors:
+            return
+        dhw_sensor = self.sensors[CONTROL_DHW_ID]
+        furnace_relay = self.relays[FURNACE_RELAY_ID]
+        previous_values = {circuit_id: sensor['value'] for circuit_id, sensor in self.sensors.items()}
+        
+        current_temp = dhw_sensor['value']
+        furnace_on = furnace_relay['value'] == 1
+        
+        if self.simulation_mode == 'auto':
+            # Auto mode: Follow sinusoidal cycle
+            new_temp = self._get_auto_cycle_temperature()
+            
+            
+        elif self.simulation_mode == 'manual':
+            # Manual mode: Apply manual adjustments
+            new_temp = current_temp + self.manual_temp_adjustment
+            
+            # Apply furnace heating/cooling in manual mode too
+            if furnace_on:
+                temp_change = self.heating_rate  # Heat up
+            else:
+                temp_change = -self.cooling_rate  # Cool down towards ambient
+                
+            new_temp = new_temp + temp_change
+            
+            
+        # Clamp temperature to reasonable bounds
+        new_temp = max(15.0, min(new_temp, 90.0))
+        
+        # Update sensor
+        old_temp = dhw_sensor['value']
+        dhw_sensor['value'] = round(new_temp, 1)
+        dhw_sensor['time'] = self.clock()
+        # Update CONTROL_HHW_ID if it's different from CONTROL_DHW_ID
+        if CONTROL_HHW_ID != CONTROL_DHW_ID and CONTROL_HHW_ID in self.sensors:
+            self.sensors[CONTROL_HHW_ID]['value'] = dhw_sensor['value']
+            self.sensors[CONTROL_HHW_ID]['time'] = dhw_sensor['time']
+            
+        # Update all enabled thermometers with calculated values (excluding control sensors)
+        for i, thermometer in enumerate(CONFIG['THERMOMETERS']):
+            if (thermometer['id'] != 'NONE' and 
+                thermometer['id'] in self.sensors and 
+                thermometer['id'] != CONTROL_DHW_ID and 
+                thermometer['id'] != CONTROL_HHW_ID):
+                # Generic simulation for any number of thermometers (excluding control sensors)
+                # Simulate each thermometer as a function of the main (DHW) sensor, with decreasing value and amplitude
+                # Example: Each subsequent sensor is further from the heat source
+                offset = 5 * i  # 5°C offset per sensor index
+                scale = max(0.2, 1.0 - 0.2 * i)  # Decrease scale for each sensor, min 0.2
+                self.sensors[thermometer['id']]['value'] = (dhw_sensor['value'] - offset) * scale
+                self.sensors[thermometer['id']]['time'] = dhw_sensor['time']
+                
+        # Special handling for DHW Top (first sensor) - give it a value close to control sensor
+        if (CONFIG['THERMOMETERS'][0]['id'] != 'NONE' and 
+            CONFIG['THERMOMETERS'][0]['id'] in self.sensors and 
+            CONFIG['THERMOMETERS'][0]['id'] != CONTROL_DHW_ID):
+            # DHW Top should be close to the control sensor but slightly different
+            dhw_top_offset = 2.0  # 2°C difference from control sensor
+            self.sensors[CONFIG['THERMOMETERS'][0]['id']]['value'] = dhw_sensor['value'] - dhw_top_offset
+            self.sensors[CONFIG['THERMOMETERS'][0]['id']]['time'] = dhw_sensor['time']
+            
+        self.manual_temp_adjustment = 0.0
+        
+        # Push changed sensors to WebSocket subscribers
+        self.publish([
+            sensor.copy() for circuit_id, sensor in self.sensors.items()
+            if sensor['value'] != previous_values[circuit_id]
+        ])
+        
+        
+        # Log temperature changes
+        if self.background and abs(new_temp - old_temp) > 0.1:
+            if self.simulation_mode == 'auto':
+                cycle_progress = ((self.clock() - self.cycle_start_time) / self.cycle_period) * 100
+                status = f"AUTO-CYCLE ({cycle_progress:.1f}%)"
+                if furnace_on:
+                    status += " + HEATING"
+            else:
+                status = "MANUAL"
+                if furnace_on:
+                    status += " + HEATING"
+                    
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] {CONTROL_DHW_ID}: {new_temp:.1f}°C ({status})")
+            if CONTROL_HHW_ID != CONTROL_DHW_ID and CONTROL_HHW_ID in self.sensors:
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] {CONTROL_HHW_ID}: {new_temp:.1f}°C (copied from DHW)")
+    
+    def step(self):
+        """Advance the whole simulation by one tick"""
+        self.step_heating_control()
+        self.step_temperature()
+    
     def get_temperature(self, circuit_id):
         """Get temperature sensor data"""
         if circuit_id in self.sensors:
@@ -390,8 +432,10 @@ class EVOKSimulator:
             
             # Log relay changes
             if old_value != int(value):
+                self.publish([self.relays[circuit_id].copy()])
                 status = "ON" if int(value) else "OFF"
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] Furnace relay: {status}")
+                if self.background:
+                    print(f"[{datetime.now().strftime('%H:%M:%S')}] Furnace relay: {status}")
             
             return {
                 'success': True,
@@ -415,9 +459,40 @@ class EVOKSimulator:
                 'modes': ['Simple', 'DirectSwitch']
             }
         return None
+    
+    def set_digital_input(self, circuit_id, value):
+        """Set digital input state (manual override of the auto-cycle)"""
+        if circuit_id in self.inputs:
+            self.inputs[circuit_id]['value'] = int(value)
+            # Reset manual override if setting value
+            self.heating_control_manual_state = int(value)
+            self.publish([self.get_digital_input(circuit_id)])
+            return {'success': True, 'result': self.inputs[circuit_id].copy()}
+        return {'success': False, 'error': 'Digital input not supported'}
+    
+    def publish(self, devices):
+        """Send device changes to all WebSocket subscribers"""
+        if not devices:
+            return
+        with self.ws_clients_lock:
+            for client_queue in self.ws_clients:
+                client_queue.put(devices)
+    
+    def get_all(self):
+        """Get every device, as returned by EVOK's all-devices listing"""
+        devices = [sensor.copy() for sensor in self.sensors.values()]
+        devices.extend(relay.copy() for relay in self.relays.values())
+        devices.extend(self.get_digital_input(circuit_id) for circuit_id in self.inputs)
+        return devices
+
+# Global simulator instance (created when run as a server, see __main__ below)
+simulator = None
 
-# Global simulator instance
-simulator = EVOKSimulator()
+@app.route('/rest/all', methods=['GET'])
+@app.route('/json/all', methods=['GET'])
+def get_all():
+    """EVOK API endpoint listing all devices in one response"""
+    return jsonify(simulator.get_all())
 
 @app.route('/json/temp/<circuit_id>', methods=['GET'])
 def get_temperature(circuit_id):
@@ -465,16 +540,34 @@ def set_digital_input(circuit_id):
             return jsonify({'success': False, 'error': 'Missing value parameter'}), 400
         
         # For simulator, we can directly set the input value
-        if circuit_id == HEATING_CONTROL_UNIT_ID:
-            simulator.inputs[circuit_id]['value'] = int(data['value'])
-            # Reset manual override if setting value
-            simulator.heating_control_manual_state = int(data['value'])
-            return jsonify({'success': True, 'result': simulator.inputs[circuit_id]})
+        result = simulator.set_digital_input(circuit_id, data['value'])
+        if result['success']:
+            return jsonify(result)
         
-        return jsonify({'success': False, 'error': 'Digital input not supported'}), 400
+        return jsonify(result), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+if sock:
+    @sock.route('/ws')
+    def websocket(ws):
+        """EVOK WebSocket endpoint pushing device changes"""
+        client_queue = queue.Queue()
+        with simulator.ws_clients_lock:
+            simulator.ws_clients.append(client_queue)
+        try:
+            while True:
+                try:
+                    devices = client_queue.get(timeout=1)
+                except queue.Empty:
+                    # Drain client commands (e.g. device filter) and detect disconnects
+                    ws.receive(timeout=0)
+                    continue
+                ws.send(json.dumps(devices))
+        finally:
+            with simulator.ws_clients_lock:
+                simulator.ws_clients.remove(client_queue)
+
 @app.route('/status', methods=['GET'])
 def status():
     """Status endpoint for debugging"""
@@ -482,7 +575,7 @@ def status():
     target_temp = 0
     
     if simulator.simulation_mode == 'auto':
-        elapsed_time = time.time() - simulator.cycle_start_time
+        elapsed_time = simulator.clock() - simulator.cycle_start_time
         cycle_progress = (elapsed_time / simulator.cycle_period) * 100
         target_temp = simulator._get_auto_cycle_temperature()
     
@@ -510,6 +603,8 @@ def status():
 
 # https://unipitechnology.stoplight.io/docs/evok/qwveyanfg1gys-evok
 if __name__ == '__main__':
+    simulator = EVOKSimulator()
+    
     print("="*60)
     print("BandaskApp EVOK Simulator - Enhanced Version")
     print("="*60)
@@ -525,6 +620,9 @@ if __name__ == '__main__':
     print(f"  Pump Relay (POST):        http://localhost:8080/json/ro/{PUMP_RELAY_ID}")
     print(f"  Heating Control (GET):    http://localhost:8080/json/di/{HEATING_CONTROL_UNIT_ID}")
     print(f"  Heating Control (POST):   http://localhost:8080/json/di/{HEATING_CONTROL_UNIT_ID}")
+    print("  All Devices (GET):        http://localhost:8080/rest/all")
+    if sock:
+        print("  Device Changes (WS):      ws://localhost:8080/ws")
     print("  Status:                   http://localhost:8080/status")
     print("="*60)
     
@@ -0,0 +1,225 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Optional
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+# Header: magic, layout version, epoch (file creation time in milliseconds),
+# sequence (odd while a write is in progress), publish time (time.time()),
+# payload length; followed by the JSON payload
+HEADER = struct.Struct('<4sIQQdI')
+MAGIC = b'BSNP'
+LAYOUT_VERSION = 2
+PAYLOAD_CAPACITY = 64 * 1024
+
+def default_snapshot_path() -> str:
+    """Snapshot file in /dev/shm (RAM) when available, else the temp directory"""
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(directory, 'bandaskapp_status')
+
+class StatusSnapshot:
+    """
+    System status shared between the monitor and web processes through an mmap'd file
+    
+    The monitor publishes the status dictionary at the end of every cycle; web
+    requests read it without database queries or EVOK requests. A sequence
+    number in the header (seqlock) lets readers detect and retry torn reads.
+    
+    Versions count publishes from the file's creation time in milliseconds
+    (the epoch), so they keep increasing when the file is recreated after a
+    reboot; a version held by a client is never mistaken for the current one.
+    """
+    
+    def __init__(self, path: str = None):
+        if path is None:
+            path = settings.BANDASKAPP_CONFIG.get('STATUS_SNAPSHOT_PATH') or default_snapshot_path()
+            
+        self.path = path
+        self._mmap = None
+        self._sequence = 0
+        self._epoch = 0
+        self._inode = None
+        self._lock = threading.Lock()
+    
+    def publish(self, status: dict) -> bool:
+        """
+        Publish a status dictionary (monitor process only - single writer)
+        
+        Args:
+            status: Status from HardwareController.get_system_status()
+            
+        Returns:
+            True if published, False on error
+        """
+        payload = json.dumps(status, cls=DjangoJSONEncoder).encode()
+        if len(payload) > PAYLOAD_CAPACITY:
+            logger.error(f"Status snapshot of {len(payload)} bytes exceeds capacity of {PAYLOAD_CAPACITY}")
+            return False
+            
+        with self._lock:
+            try:
+                if self._mmap is None:
+                    self._open(create=True)
+                    magic, layout, self._epoch, self._sequence, _, _ = HEADER.unpack_from(self._mmap, 0)
+                    if magic != MAGIC or layout != LAYOUT_VERSION or not self._epoch:
+                        # New (or old layout) file - start a new epoch
+                        self._epoch = int(time.time() * 1000)
+                        self._sequence = 0
+                    self._sequence += self._sequence % 2
+                    
+                # Odd sequence marks the write in progress
+                self._sequence += 1
+                HEADER.pack_into(self._mmap, 0, MAGIC, LAYOUT_VERSION, self._epoch, self._sequence, 0.0, 0)
+                self._mmap[HEADER.size:HEADER.size + len(payload)] = payload
+                self._sequence += 1
+                HEADER.pack_into(self._mmap, 0, MAGIC, LAYOUT_VERSION, self._epoch, self._sequence,
+                                 time.time(), len(payload))
+                return True
+                
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to publish status snapshot to {self.path}: {e}")
+                self._close()
+                return False
+    
+    def read(self, max_age: float = None) -> Optional[dict]:
+        """
+        Read the latest published status
+        
+        Args:
+            max_age: Maximum snapshot age in seconds (defaults to STATUS_SNAPSHOT_MAX_AGE)
+            
+        Returns:
+            Status dictionary (with 'snapshot_version' and 'snapshot_time'
+            added) or None if there is no current snapshot
+        """
+        if max_age is None:
+            max_age = settings.BANDASKAPP_CONFIG.get('STATUS_SNAPSHOT_MAX_AGE', 30)
+            
+        with self._lock:
+            try:
+                if self._mmap is None and not self._open(create=False):
+                    return None
+                    
+                for _ in range(100):
+                    magic, layout, epoch, sequence, published, length = HEADER.unpack_from(self._mmap, 0)
+                    if magic != MAGIC or layout != LAYOUT_VERSION or sequence == 0:
+                        return None
+                    if sequence % 2:
+                        time.sleep(0)
+                        continue
+                        
+                    payload = self._mmap[HEADER.size:HEADER.size + length]
+                    if HEADER.unpack_from(self._mmap, 0)[3] == sequence:
+                        break
+                else:
+                    logger.warning("Status snapshot kept changing while reading")
+                    return None
+                    
+            except (OSError, ValueError) as e:
+                logger.warning(f"Failed to read status snapshot from {self.path}: {e}")
+                self._close()
+                return None
+                
+        if time.time() - published > max_age:
+            self._drop_if_replaced()
+            return None
+            
+        status = json.loads(payload)
+        if status.get('last_reading'):
+            status['last_reading'] = parse_datetime(status['last_reading'])
+        status['snapshot_version'] = epoch + sequence // 2
+        status['snapshot_time'] = published
+        return status
+    
+    def current_version(self, max_age: float = None) -> Optional[int]:
+        """
+        Version of the latest published status, read from the header only
+        
+        Cheap enough to poll for changes before calling read().
+        
+        Args:
+            max_age: Maximum snapshot age in seconds (defaults to STATUS_SNAPSHOT_MAX_AGE)
+            
+        Returns:
+            Snapshot version (as in read()) or None if there is no current snapshot
+        """
+        if max_age is None:
+            max_age = settings.BANDASKAPP_CONFIG.get('STATUS_SNAPSHOT_MAX_AGE', 30)
+            
+        with self._lock:
+            try:
+                if self._mmap is None and not self._open(create=False):
+                    return None
+                magic, layout, epoch, sequence, published, _ = HEADER.unpack_from(self._mmap, 0)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Failed to read status snapshot from {self.path}: {e}")
+                self._close()
+                return None
+                
+        if magic != MAGIC or layout != LAYOUT_VERSION or sequence == 0:
+            return None
+        # While a write is in progress the previous version is still current
+        if sequence % 2 == 0 and time.time() - published > max_age:
+            self._drop_if_replaced()
+            return None
+        return epoch + sequence // 2
+    
+    def _open(self, create: bool) -> bool:
+        """Map the snapshot file, creating it if requested (lock held)"""
+        size = HEADER.size + PAYLOAD_CAPACITY
+        if create:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        else:
+            try:
+                fd = os.open(self.path, os.O_RDONLY)
+            except FileNotFoundError:
+                return False
+                
+        try:
+            if create and os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            elif os.fstat(fd).st_size < size:
+                return False
+            access = mmap.ACCESS_WRITE if create else mmap.ACCESS_READ
+            self._mmap = mmap.mmap(fd, size, access=access)
+            self._inode = os.fstat(fd).st_ino
+            return True
+        finally:
+            os.close(fd)
+    
+    def _drop_if_replaced(self) -> None:
+        """Unmap a stale snapshot whose file was recreated, so the next read maps the new one"""
+        with self._lock:
+            try:
+                replaced = self._mmap is not None and os.stat(self.path).st_ino != self._inode
+            except OSError:
+                replaced = False
+            if replaced:
+                self._close()
+    
+    def _close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+# Process-wide snapshot handle, mapped once and reused by every request
+_status_snapshot = None
+_status_snapshot_lock = threading.Lock()
+
+def get_status_snapshot() -> StatusSnapshot:
+    """Return the process-wide StatusSnapshot"""
+    global _status_snapshot
+    
+    with _status_snapshot_lock:
+        if _status_snapshot is None:
+            _status_snapshot = StatusSnapshot()
+        return _status_snapshot
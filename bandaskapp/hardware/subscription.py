@@ -0,0 +1,152 @@
+import json
+import logging
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple
+
+from .client import EVOKClient, get_shared_client
+from .transport import device_key
+
+try:
+    import websocket
+except ImportError:  # websocket-client not installed - monitor falls back to polling
+    websocket = None
+
+logger = logging.getLogger(__name__)
+
+class EVOKSubscription:
+    """Live in-memory map of EVOK devices kept up to date by WebSocket pushes"""
+    
+    # Device types the monitor cares about (EVOK names in the WebSocket filter)
+    SUBSCRIBED_DEVICES = ['temp', 'relay', 'input']
+    
+    def __init__(self, client: Optional[EVOKClient] = None, ws_url: str = None):
+        self.client = client or get_shared_client()
+        
+        # Use the EVOK base URL if no WebSocket URL provided
+        if ws_url is None:
+            ws_url = self.client.base_url.replace('http', 'ws', 1) + '/ws'
+            
+        self.ws_url = ws_url
+        self.reconnect_delay = 5
+        self.devices = {}
+        self.connected = False
+        
+        self._ws = None
+        self._thread = None
+        self._running = False
+        self._changes = []
+        self._condition = threading.Condition()
+    
+    @staticmethod
+    def is_available() -> bool:
+        """Check if the WebSocket client library is installed"""
+        return websocket is not None
+    
+    def start(self) -> bool:
+        """
+        Start the background subscription thread
+        
+        Returns:
+            True if the subscription was started, False if WebSocket support is missing
+        """
+        if not self.is_available():
+            logger.warning("websocket-client is not installed, EVOK subscription disabled")
+            return False
+            
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        logger.info(f"EVOK subscription started: {self.ws_url}")
+        return True
+    
+    def stop(self) -> None:
+        """Stop the subscription and close the WebSocket"""
+        self._running = False
+        if self._ws is not None:
+            self._ws.close()
+    
+    def snapshot(self) -> Dict[tuple, Dict[str, Any]]:
+        """Return a copy of the live device map, keyed by (dev, circuit)"""
+        with self._condition:
+            return dict(self.devices)
+    
+    def wait_for_change(self, timeout: float) -> List[Tuple[tuple, Any, Any]]:
+        """
+        Block until pushed changes arrive or the timeout expires
+        
+        Args:
+            timeout: Maximum time to wait in seconds
+            
+        Returns:
+            List of (key, old_value, new_value) tuples, empty on timeout
+        """
+        with self._condition:
+            if not self._changes:
+                self._condition.wait(timeout)
+            changes, self._changes = self._changes, []
+            return changes
+    
+    def _run(self) -> None:
+        """Connection loop - reconnects until stopped"""
+        while self._running:
+            self._ws = websocket.WebSocketApp(
+                self.ws_url,
+                on_open=self._on_open,
+                on_message=self._on_message,
+                on_error=self._on_error,
+                on_close=self._on_close,
+            )
+            self._ws.run_forever()
+            
+            if self._running:
+                time.sleep(self.reconnect_delay)
+    
+    def _on_open(self, ws) -> None:
+        """Seed the device map from a bulk read and subscribe to pushes"""
+        devices = self.client.get_all()
+        if devices is not None:
+            self._apply(devices)
+            
+        ws.send(json.dumps({"cmd": "filter", "devices": self.SUBSCRIBED_DEVICES}))
+        self.connected = True
+        logger.info("EVOK WebSocket subscription connected")
+    
+    def _on_message(self, ws, message: str) -> None:
+        """Apply pushed device updates to the live map"""
+        try:
+            data = json.loads(message)
+        except ValueError:
+            logger.warning(f"Ignoring malformed EVOK WebSocket message: {message[:100]}")
+            return
+            
+        # EVOK pushes either a single device or a list of devices
+        if isinstance(data, dict):
+            data = [data]
+        self._apply(data)
+    
+    def _on_error(self, ws, error) -> None:
+        logger.error(f"EVOK WebSocket error: {error}")
+    
+    def _on_close(self, ws, status_code, message) -> None:
+        if self.connected:
+            logger.warning("EVOK WebSocket subscription disconnected")
+        self.connected = False
+    
+    def _apply(self, devices: List[Dict[str, Any]]) -> None:
+        """Update the device map and wake waiters for changed values"""
+        with self._condition:
+            for device in devices:
+                if not isinstance(device, dict) or 'dev' not in device:
+                    continue
+                    
+                key = device_key(device)
+                old = self.devices.get(key)
+                self.devices[key] = device
+                
+                old_value = old.get('value') if old else None
+                if old is None or old_value != device.get('value'):
+                    self._changes.append((key, old_value, device.get('value')))
+                    
+            if self._changes:
+                self._condition.notify_all()
@@ -1,3 +1,589 @@
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.conf import settings
 from django.test import TestCase
 
-# Create your tests here.
+from core.models import Relay
+
+from hardware.adaptive import AdaptiveInterval
+from hardware.cache import ReadCache
+from hardware.client import EVOKClient
+from hardware.control_logic import ControlDecision, ControlInputs, decide, replay
+from hardware.controller import HardwareController
+from hardware.modbus import ModbusTransport
+from hardware.modbus_simulator import ModbusStandIn
+from hardware.onewire import OneWireSensorReader
+from hardware.transport import HardwareTransport, MemoryTransport, create_transport
+from hardware.resilience import CircuitBreaker
+from hardware.scheduler import TaskScheduler
+from hardware.status_snapshot import HEADER, StatusSnapshot
+
+class EVOKClientBreakerTests(TestCase):
+    """Circuit breaker bookkeeping of EVOKClient._request"""
+    
+    def setUp(self):
+        self.client = EVOKClient('http://evok.test')
+    
+    def _half_open(self):
+        breaker = self.client.breaker
+        breaker.state = CircuitBreaker.OPEN
+        breaker.failures = breaker.failure_threshold
+        breaker.opened_at = time.monotonic() - breaker.reset_timeout - 1
+    
+    def test_non_json_response_to_probe_reopens_breaker(self):
+        self._half_open()
+        response = mock.Mock()
+        response.raise_for_status.return_value = None
+        response.json.side_effect = ValueError('Expecting value')
+        
+        with mock.patch.object(self.client.session, 'request', return_value=response):
+            self.assertIsNone(self.client.get_temperature('28TEST'))
+            
+        breaker = self.client.breaker
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker._probe_in_flight)
+        
+        # The next probe is let through once the reset timeout has passed again
+        breaker.opened_at = time.monotonic() - breaker.reset_timeout - 1
+        self.assertTrue(breaker.allow_request())
+    
+    def test_json_response_to_probe_closes_breaker(self):
+        self._half_open()
+        response = mock.Mock()
+        response.raise_for_status.return_value = None
+        response.json.return_value = {'dev': 'temp', 'circuit': '28TEST', 'value': 50.0}
+        
+        with mock.patch.object(self.client.session, 'request', return_value=response):
+            self.assertIsNotNone(self.client.get_temperature('28TEST'))
+            
+        self.assertEqual(self.client.breaker.state, CircuitBreaker.CLOSED)
+
+class ReadCacheTests(TestCase):
+    """Short-TTL cache with single-flight loading"""
+    
+    def test_concurrent_reads_share_one_load(self):
+        cache = ReadCache(ttl=1.0)
+        release = threading.Event()
+        calls = []
+        
+        def loader():
+            calls.append(1)
+            release.wait(5)
+            return {'value': 21.5}
+            
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get('temp', loader))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        # Let every thread reach the cache before the load completes
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+            
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'value': 21.5}] * 5)
+    
+    def test_failed_read_is_not_cached(self):
+        cache = ReadCache(ttl=10.0)
+        loader = mock.Mock(side_effect=[None, {'value': 1}])
+        self.assertIsNone(cache.get('temp', loader))
+        self.assertEqual(cache.get('temp', loader), {'value': 1})
+        self.assertEqual(loader.call_count, 2)
+    
+    def test_value_expires_after_ttl(self):
+        cache = ReadCache(ttl=1.0)
+        loader = mock.Mock(side_effect=[1, 2])
+        with mock.patch('hardware.cache.time.monotonic', return_value=100.0):
+            self.assertEqual(cache.get('ro', loader), 1)
+            self.assertEqual(cache.get('ro', loader), 1)
+        with mock.patch('hardware.cache.time.monotonic', return_value=101.5):
+            self.assertEqual(cache.get('ro', loader), 2)
+    
+    def test_put_and_invalidate(self):
+        cache = ReadCache(ttl=10.0)
+        cache.put('ro', {'value': 1})
+        self.assertEqual(cache.get('ro', mock.Mock()), {'value': 1})
+        cache.invalidate('ro')
+        self.assertEqual(cache.get('ro', lambda: {'value': 0}), {'value': 0})
+
+class AdaptiveIntervalTests(TestCase):
+    """Interval chosen by AdaptiveInterval near and away from thresholds"""
+    
+    BANDS = {'dhw': (45.0, 60.0)}
+    
+    def setUp(self):
+        self.adaptive = AdaptiveInterval(2, 60, default_interval=10, band_interval=10)
+    
+    def _steady(self, temp, samples=3):
+        interval = None
+        for i in range(samples):
+            interval = self.adaptive.update({'dhw': temp}, self.BANDS, now=i * 10.0)
+        return interval
+    
+    def test_inside_band_never_slower_than_fixed_interval(self):
+        self.assertLessEqual(self._steady(52.5), 10)
+    
+    def test_steady_just_below_low_threshold(self):
+        # 0.5 °C at the minimum rate of 0.05 °C/s is 10 s, half of it is waited
+        self.assertAlmostEqual(self._steady(44.5), 5.0)
+    
+    def test_at_threshold_uses_min_interval(self):
+        self.assertEqual(self._steady(45.0), 2)
+    
+    def test_far_below_band_uses_max_interval(self):
+        self.assertEqual(self._steady(20.0), 60)
+    
+    def test_fast_approach_shortens_interval(self):
+        self.adaptive.update({'dhw': 30.0}, self.BANDS, now=0.0)
+        interval = self.adaptive.update({'dhw': 40.0}, self.BANDS, now=10.0)
+        # 1 °C/s towards 45 °C: 5 s to the threshold, half of it is waited
+        self.assertAlmostEqual(interval, 2.5)
+    
+    def test_no_temperature_uses_default(self):
+        self.assertEqual(self.adaptive.update({'dhw': None}, self.BANDS, now=0.0), 10)
+
+class DecideTests(TestCase):
+    """Table of control_logic.decide() cases (DHW 45-60 °C, HHW 40-55 °C)"""
+    
+    THRESHOLDS = dict(dhw_temp_low=45.0, dhw_temp_high=60.0, hhw_temp_low=40.0, hhw_temp_high=55.0)
+    
+    # (description, inputs, expected decision attributes)
+    CASES = [
+        # Summer regime: DHW hysteresis only, pump off
+        ('summer below low', dict(regime='off', dhw_temp=40.0, hhw_temp=None),
+         dict(furnace=True, pump=False)),
+        ('summer just below low', dict(regime='off', dhw_temp=44.9, hhw_temp=None),
+         dict(furnace=True)),
+        ('summer at low holds', dict(regime='off', dhw_temp=45.0, hhw_temp=None),
+         dict(furnace=None, furnace_target=None)),
+        ('summer at high holds', dict(regime='off', dhw_temp=60.0, hhw_temp=None),
+         dict(furnace=None, furnace_target=None)),
+        ('summer above high', dict(regime='off', dhw_temp=60.1, hhw_temp=None, furnace_on=True),
+         dict(furnace=False)),
+        ('summer lost DHW sensor', dict(regime='off', dhw_temp=None, hhw_temp=30.0),
+         dict(furnace=None, pump=None, pump_target=None)),
+        ('summer HHW is ignored', dict(regime='off', dhw_temp=50.0, hhw_temp=10.0),
+         dict(furnace=None)),
+         
+        # Winter regime, automatic: heating control unit input decides
+        ('automatic unit unreadable', dict(regime='automatic', dhw_temp=50.0, hhw_temp=50.0),
+         dict(switch_to_manual=True, furnace=None, pump=None)),
+        ('automatic unit on, HHW low', dict(regime='automatic', dhw_temp=50.0, hhw_temp=35.0,
+                                            heating_control_state=True),
+         dict(furnace=True, pump=True)),
+        ('automatic unit on, both above high', dict(regime='automatic', dhw_temp=61.0, hhw_temp=56.0,
+                                                    heating_control_state=True, furnace_on=True, pump_on=True),
+         dict(furnace=False, pump=None)),
+        ('automatic unit on, lost HHW holds', dict(regime='automatic', dhw_temp=61.0, hhw_temp=None,
+                                                   heating_control_state=True, furnace_on=True),
+         dict(furnace=None, furnace_target=None)),
+        ('automatic unit off is DHW only', dict(regime='automatic', dhw_temp=40.0, hhw_temp=60.0,
+                                                heating_control_state=False, pump_on=True),
+         dict(furnace=True, pump=False)),
+         
+        # Winter regime, manual: pump always on
+        ('manual HHW low, DHW lost', dict(regime='on', dhw_temp=None, hhw_temp=39.0),
+         dict(furnace=True, pump=True)),
+        ('manual both sensors lost', dict(regime='on', dhw_temp=None, hhw_temp=None),
+         dict(furnace=None, pump=True)),
+        ('manual inside both bands', dict(regime='on', dhw_temp=50.0, hhw_temp=50.0, pump_on=True),
+         dict(furnace=None, pump=None, pump_target=True)),
+         
+        # Relay states and cooldowns
+        ('state already in place', dict(regime='off', dhw_temp=40.0, hhw_temp=None, furnace_on=True, pump_on=False),
+         dict(furnace=None, furnace_target=True, pump=None)),
+        ('cooldown blocks change', dict(regime='off', dhw_temp=40.0, hhw_temp=None, furnace_on=False,
+                                        pump_on=False, furnace_cooldown_remaining=10.0),
+         dict(furnace=True, furnace_blocked=True, furnace_action=None)),
+        ('unknown regime', dict(regime='bogus', dhw_temp=40.0, hhw_temp=None),
+         dict(furnace=None, pump=None)),
+    ]
+    
+    def test_decide(self):
+        for description, inputs, expected in self.CASES:
+            with self.subTest(description):
+                decision = decide(ControlInputs(**inputs, **self.THRESHOLDS))
+                for name, value in expected.items():
+                    self.assertEqual(getattr(decision, name), value, name)
+
+class ReplayTests(TestCase):
+    """Recorded sequences run through control_logic.replay()"""
+    
+    THRESHOLDS = dict(dhw_temp_low=45.0, dhw_temp_high=60.0, hhw_temp_low=40.0, hhw_temp_high=55.0)
+    
+    # (timestamp, dhw_temp, hhw_temp, heating_control_state)
+    SUMMER = [(0, 50.0, None, None), (10, 44.0, None, None), (20, 50.0, None, None),
+              (30, 61.0, None, None), (40, 59.0, None, None), (50, 44.0, None, None)]
+    
+    def test_summer_hysteresis(self):
+        switches = list(replay(self.SUMMER, 'off', **self.THRESHOLDS))
+        self.assertEqual(switches, [(10, 'furnace', True), (30, 'furnace', False), (50, 'furnace', True)])
+    
+    def test_cooldown_drops_switch_until_next_decision(self):
+        switches = list(replay(self.SUMMER, 'off', furnace_cooldown=25, **self.THRESHOLDS))
+        self.assertEqual(switches, [(10, 'furnace', True)])
+    
+    def test_lost_heating_control_unit_falls_back_to_manual(self):
+        samples = [(0, 50.0, 50.0, False), (10, 50.0, 50.0, None), (20, 50.0, 50.0, None)]
+        switches = list(replay(samples, 'automatic', **self.THRESHOLDS))
+        self.assertEqual(switches, [(20, 'pump', True)])
+    
+    def test_lost_sensor_holds_state(self):
+        samples = [(0, 40.0, None, None), (10, None, None, None), (20, 61.0, None, None)]
+        switches = list(replay(samples, 'off', **self.THRESHOLDS))
+        self.assertEqual(switches, [(0, 'furnace', True), (20, 'furnace', False)])
+
+class DeferredActuationTests(TestCase):
+    """Cooldown-deferred relay changes are dropped once a decision no longer wants them"""
+    
+    def setUp(self):
+        self.controller = HardwareController(client=mock.Mock())
+        self.controller.last_furnace_switch = time.monotonic()
+        self.furnace_id = self.controller.config['FURNACE_RELAY_ID']
+        self.ctx = mock.Mock()
+        
+        # Furnace ON held back by its cooldown
+        self.controller._apply_control_decision(
+            ControlDecision(furnace=True, furnace_target=True, furnace_blocked=True), self.ctx
+        )
+        self.assertIs(self.controller.actuations.pending(self.furnace_id), True)
+    
+    def test_hold_in_hysteresis_band_cancels(self):
+        self.controller._apply_control_decision(ControlDecision(furnace_target=None), self.ctx)
+        self.assertIsNone(self.controller.actuations.pending(self.furnace_id))
+        self.assertEqual(self.controller.run_due_actuations(), 0)
+    
+    def test_lost_sensor_cancels(self):
+        self.controller._apply_control_decision(ControlDecision(), self.ctx)
+        self.assertIsNone(self.controller.actuations.pending(self.furnace_id))
+    
+    def test_still_blocked_keeps_pending(self):
+        self.controller._apply_control_decision(
+            ControlDecision(furnace=True, furnace_target=True, furnace_blocked=True), self.ctx
+        )
+        self.assertIs(self.controller.actuations.pending(self.furnace_id), True)
+
+class RelayWriteTests(TestCase):
+    """Relay writes through the write-through relay state cache"""
+    
+    def setUp(self):
+        self.client = mock.Mock()
+        self.client.set_relay_state.return_value = {'success': True}
+        self.controller = HardwareController(client=self.client)
+        self.relay = Relay.objects.create(name='Furnace', circuit_id='2_01')
+    
+    def test_write_saves_the_row_once(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(self.controller._set_relay_state(self.relay, True))
+        self.client.set_relay_state.assert_called_once_with('2_01', True)
+        
+        relay = Relay.objects.get(pk=self.relay.pk)
+        self.assertTrue(relay.current_state)
+        self.assertTrue(relay.expected_state)
+    
+    def test_cached_state_is_not_written_again(self):
+        self.controller._set_relay_state(self.relay, True)
+        with self.assertNumQueries(0):
+            self.assertTrue(self.controller._set_relay_state(self.relay, True))
+        self.assertEqual(self.client.set_relay_state.call_count, 1)
+    
+    def test_failed_write_records_expected_state(self):
+        self.client.set_relay_state.return_value = None
+        self.client.get_last_error.return_value = 'Timeout'
+        self.assertFalse(self.controller._set_relay_state(self.relay, True))
+        
+        relay = Relay.objects.get(pk=self.relay.pk)
+        self.assertTrue(relay.expected_state)
+        self.assertFalse(relay.current_state)
+        self.assertTrue(self.controller.relay_write_failed)
+        self.assertNotIn('2_01', self.controller.relay_states)
+
+class OneWireSensorReaderTests(TestCase):
+    """DS18B20 reads from a fake w1 sysfs tree"""
+    
+    CIRCUIT_ID = '28AA8C7F481401C8'  # sysfs device 28-0114487f8caa
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.reader = OneWireSensorReader(base_path=self.tmpdir.name, retries=1, max_workers=1)
+        self.addCleanup(self.reader.executor.shutdown)
+    
+    def _write(self, content):
+        device = os.path.join(self.tmpdir.name, '28-0114487f8caa')
+        os.makedirs(device, exist_ok=True)
+        with open(os.path.join(device, 'w1_slave'), 'w') as f:
+            f.write(content)
+    
+    def test_good_read(self):
+        self._write('a1 01 4b 46 7f ff 0c 10 8c : crc=8c YES\na1 01 4b 46 7f ff 0c 10 8c t=26062\n')
+        data = self.reader.read(self.CIRCUIT_ID)
+        self.assertEqual(data['value'], 26.062)
+        self.assertFalse(data['lost'])
+        self.assertEqual(data['circuit'], self.CIRCUIT_ID)
+    
+    def test_crc_error(self):
+        self._write('a1 01 4b 46 7f ff 0c 10 8c : crc=8d NO\na1 01 4b 46 7f ff 0c 10 8c t=26062\n')
+        self.assertIsNone(self.reader.read(self.CIRCUIT_ID))
+        self.assertIn('CRC error', self.reader.last_error)
+    
+    def test_power_on_reset_value(self):
+        self._write('50 05 4b 46 7f ff 0c 10 1c : crc=1c YES\n50 05 4b 46 7f ff 0c 10 1c t=85000\n')
+        self.assertIsNone(self.reader.read(self.CIRCUIT_ID))
+        self.assertIn('Incomplete conversion', self.reader.last_error)
+    
+    def test_garbled_value(self):
+        self._write('a1 01 4b 46 7f ff 0c 10 8c : crc=8c YES\na1 01 4b 46 7f ff 0c 10 8c t=26\x0062\n')
+        self.assertIsNone(self.reader.read(self.CIRCUIT_ID))
+        self.assertIn('Unparsable', self.reader.last_error)
+    
+    def test_truncated_read(self):
+        self._write('a1 01 4b 46 7f ff 0c 10 8c : crc=8c YES\n')
+        self.assertIsNone(self.reader.read(self.CIRCUIT_ID))
+    
+    def test_missing_device(self):
+        data = self.reader.read(self.CIRCUIT_ID)
+        self.assertIsNone(data['value'])
+        self.assertTrue(data['lost'])
+    
+    def test_invalid_circuit_id(self):
+        for circuit_id in ('28AA8C7F48', '28AA8C7F481401C8FF', 'NOTHEXNOTHEXNOTH'):
+            with self.subTest(circuit_id):
+                self.assertIsNone(self.reader.read(circuit_id))
+                self.assertIn('Invalid 1-Wire circuit ID', self.reader.last_error)
+    
+    def test_invalid_circuit_id_does_not_break_other_reads(self):
+        self._write('a1 01 4b 46 7f ff 0c 10 8c : crc=8c YES\na1 01 4b 46 7f ff 0c 10 8c t=26062\n')
+        readings = self.reader.read_many(['28AA8C7F48', self.CIRCUIT_ID])
+        self.assertIsNone(readings['28AA8C7F48'])
+        self.assertEqual(readings[self.CIRCUIT_ID]['value'], 26.062)
+
+class ModbusTransportTests(TestCase):
+    """Round trips between ModbusTransport and the Modbus stand-in server"""
+    
+    def setUp(self):
+        self.stand_in = ModbusStandIn(port=0).start()
+        self.addCleanup(self.stand_in.stop)
+        self.temperatures = MemoryTransport()
+        host, port = self.stand_in.address
+        self.transport = ModbusTransport(host, port, temperature_transport=self.temperatures)
+        self.addCleanup(self.transport._close)
+    
+    def test_relay_write_and_read(self):
+        # Pump relay 1_02 is coil / bit 1
+        self.assertTrue(self.transport.set_relay_state('1_02', True)['success'])
+        self.assertEqual(self.stand_in.get_relay(1), 1)
+        self.assertEqual(self.transport.get_relay_state('1_02')['value'], 1)
+        
+        self.transport.set_relay_state('1_02', False)
+        self.assertEqual(self.stand_in.get_relay(1), 0)
+        self.assertEqual(self.transport.get_relay_state('1_02')['value'], 0)
+        self.assertEqual(self.transport.get_relay_state('1_01')['value'], 0)
+    
+    def test_digital_input(self):
+        self.stand_in.set_input(0, True)
+        self.assertEqual(self.transport.get_digital_input('1_01')['value'], 1)
+        
+        self.assertTrue(self.transport.set_digital_input('1_01', False)['success'])
+        self.assertEqual(self.transport.get_digital_input('1_01')['value'], 0)
+    
+    def test_temperatures_come_from_temperature_transport(self):
+        # The Unipi 1.1 has no temperature registers - temperatures are delegated
+        circuit_id = next(device['circuit'] for device in self.temperatures.get_all() if device['dev'] == 'temp')
+        expected = self.temperatures.get_temperature(circuit_id)['value']
+        self.assertEqual(self.transport.get_temperature(circuit_id)['value'], expected)
+    
+    def test_get_all_reads_bitmaps_once(self):
+        self.stand_in.set_input(0, True)
+        self.transport.set_relay_state('1_01', True)
+        requests_before = self.stand_in.request_count
+        
+        devices = {(device['dev'], device['circuit']): device for device in self.transport.get_all()}
+        
+        self.assertEqual(self.stand_in.request_count - requests_before, 1)
+        self.assertEqual(devices[('relay', '1_01')]['value'], 1)
+        self.assertEqual(devices[('relay', '1_02')]['value'], 0)
+        self.assertEqual(devices[('di', '1_01')]['value'], 1)
+        self.assertTrue(any(dev == 'temp' for dev, _ in devices))
+    
+    def test_check_health_is_passive_after_traffic(self):
+        self.assertTrue(self.transport.check_health())  # no traffic yet - probes
+        requests_before = self.stand_in.request_count
+        self.assertTrue(self.transport.check_health())
+        self.assertEqual(self.stand_in.request_count, requests_before)
+        
+        self.stand_in.stop()
+        self.transport._close()
+        with self.assertLogs('hardware.modbus', 'ERROR'):
+            self.assertIsNone(self.transport.get_relay_state('1_01'))
+            self.assertIsNone(self.transport.get_relay_state('1_01'))
+        self.assertFalse(self.transport.check_health())
+        self.assertTrue(self.transport.get_last_error().startswith('Modbus unhealthy'))
+    
+    def test_shared_transport_is_recreated_after_fork(self):
+        transport = create_transport('modbus')
+        self.assertIs(create_transport('modbus'), transport)
+        with mock.patch('hardware.transport.os.getpid', return_value=os.getpid() + 1):
+            self.assertIsNot(create_transport('modbus'), transport)
+
+class CreateTransportTests(TestCase):
+    """Transport interface and the process-wide transports"""
+    
+    def test_incomplete_transport_cannot_be_instantiated(self):
+        class ReadOnlyTransport(HardwareTransport):
+            def get_temperature(self, circuit_id):
+                return None
+                
+        with self.assertRaises(TypeError):
+            ReadOnlyTransport()
+    
+    def test_onewire_wrapper_follows_recreated_transport(self):
+        with mock.patch.dict(settings.BANDASKAPP_CONFIG, {'TEMPERATURE_SOURCE': 'onewire'}):
+            wrapper = create_transport('modbus')
+            self.addCleanup(wrapper.io._close)
+            self.assertIs(create_transport('modbus'), wrapper)
+            
+            with mock.patch('hardware.transport.os.getpid', return_value=os.getpid() + 1):
+                forked = create_transport('modbus')
+                self.addCleanup(forked.io._close)
+                
+            self.assertIsNot(forked, wrapper)
+            self.assertIsNot(forked.io, wrapper.io)
+            self.assertIs(create_transport('memory'), create_transport('memory'))
+
+class StatusSnapshotTests(TestCase):
+    """Status shared through the mmap'd snapshot file"""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, 'status')
+        self.writer = StatusSnapshot(self.path)
+        self.reader = StatusSnapshot(self.path)
+    
+    def test_publish_and_read(self):
+        self.assertIsNone(self.reader.read())
+        self.assertIsNone(self.reader.current_version())
+        
+        self.writer.publish({'furnace_running': True, 'last_reading': '2026-01-01T12:00:00+00:00'})
+        status = self.reader.read()
+        self.assertTrue(status['furnace_running'])
+        self.assertEqual(status['last_reading'].year, 2026)
+        self.assertEqual(status['snapshot_version'], self.reader.current_version())
+        
+        self.writer.publish({'furnace_running': False})
+        self.assertEqual(self.reader.current_version(), status['snapshot_version'] + 1)
+    
+    def test_read_during_write_returns_previous_version(self):
+        self.writer.publish({'furnace_running': True})
+        version = self.reader.current_version()
+        
+        # Odd sequence: a write is in progress, the payload is not to be trusted
+        magic, layout, epoch, sequence, published, length = HEADER.unpack_from(self.writer._mmap, 0)
+        HEADER.pack_into(self.writer._mmap, 0, magic, layout, epoch, sequence + 1, published, length)
+        self.assertEqual(self.reader.current_version(), version)
+        with mock.patch('hardware.status_snapshot.time.sleep'):
+            self.assertIsNone(self.reader.read())
+    
+    def test_stale_snapshot_is_not_served(self):
+        self.writer.publish({'furnace_running': True})
+        later = time.time() + 31
+        with mock.patch('hardware.status_snapshot.time.time', return_value=later):
+            self.assertIsNone(self.reader.read(max_age=30))
+            self.assertIsNone(self.reader.current_version(max_age=30))
+        self.assertIsNotNone(self.reader.read(max_age=30))
+    
+    def test_versions_keep_increasing_when_the_file_is_recreated(self):
+        self.writer.publish({'furnace_running': True})
+        self.writer.publish({'furnace_running': False})
+        old_version = self.reader.current_version()
+        
+        # Reboot: /dev/shm is empty and a new monitor creates the file again
+        os.remove(self.path)
+        writer = StatusSnapshot(self.path)
+        with mock.patch('hardware.status_snapshot.time.time', return_value=time.time() + 1):
+            writer.publish({'furnace_running': True})
+            
+        status = StatusSnapshot(self.path).read()
+        self.assertGreater(status['snapshot_version'], old_version)
+    
+    def test_reader_maps_a_recreated_file(self):
+        self.writer.publish({'furnace_running': True})
+        self.assertIsNotNone(self.reader.read())
+        
+        os.remove(self.path)
+        StatusSnapshot(self.path).publish({'furnace_running': False})
+        
+        # The old mapping is stale - the reader moves over to the new file
+        self.assertIsNone(self.reader.read(max_age=-1))
+        self.assertFalse(self.reader.read()['furnace_running'])
+
+class TaskSchedulerTests(TestCase):
+    """Multi-rate scheduling on a fake monotonic clock"""
+    
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('hardware.scheduler.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.scheduler = TaskScheduler()
+    
+    def work(self, seconds):
+        """Callback that takes the given time"""
+        def callback():
+            self.now += seconds
+        return callback
+    
+    def test_run_time_does_not_drift_the_timeline(self):
+        task = self.scheduler.add('control', 10, self.work(3))
+        for _ in range(3):
+            self.assertEqual(self.scheduler.run_pending(), ['control'])
+            self.now = task.next_run
+            
+        self.assertEqual(task.next_run, 1030.0)
+        self.assertEqual(task.runs, 3)
+        self.assertEqual(task.overruns, 0)
+    
+    def test_tasks_run_at_their_own_periods(self):
+        self.scheduler.add('fast', 1, self.work(0))
+        self.scheduler.add('slow', 5, self.work(0), delay=5)
+        ran = []
+        for _ in range(10):
+            ran += self.scheduler.run_pending()
+            self.now += 1
+            
+        self.assertEqual(ran.count('fast'), 10)
+        self.assertEqual(ran.count('slow'), 1)
+    
+    def test_overrun_and_skipped_periods_are_counted(self):
+        task = self.scheduler.add('aux', 10, self.work(25), deadline=5)
+        with self.assertLogs('hardware.scheduler', 'WARNING'):
+            self.scheduler.run_pending()
+            
+        self.assertEqual(task.overruns, 1)
+        self.assertEqual(task.skipped, 2)
+        # Back on the original timeline, not run back to back
+        self.assertEqual(task.next_run, 1030.0)
+        self.assertEqual(self.scheduler.next_due_in(), 5.0)
+    
+    def test_failing_task_keeps_its_schedule(self):
+        task = self.scheduler.add('control', 10, mock.Mock(side_effect=RuntimeError('boom')))
+        with self.assertLogs('hardware.scheduler', 'ERROR'):
+            self.assertEqual(self.scheduler.run_pending(), ['control'])
+        self.assertEqual(task.next_run, 1010.0)
+    
+    def test_set_period_and_run_now(self):
+        task = self.scheduler.add('control', 10, self.work(0))
+        self.scheduler.run_pending()
+        self.scheduler.set_period('control', 4)
+        self.assertEqual(task.next_run, 1004.0)
+        
+        self.now = 1001.0
+        self.scheduler.run_now('control')
+        self.assertEqual(self.scheduler.run_pending(), ['control'])
+        self.assertEqual(task.next_run, 1005.0)
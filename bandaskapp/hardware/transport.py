@@ -0,0 +1,217 @@
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional, Dict, Any, Iterable, List
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# EVOK's all-devices listing names some device types differently from the URLs
+DEVICE_ALIASES = {
+    'relay': 'ro',
+    'input': 'di',
+}
+
+def device_key(device: Dict[str, Any]) -> tuple:
+    """Return the (dev, circuit) key of an EVOK device, using URL device names"""
+    dev = device.get('dev')
+    return DEVICE_ALIASES.get(dev, dev), str(device.get('circuit'))
+
+class HardwareTransport(ABC):
+    """
+    Interface between HardwareController and the hardware
+    
+    Every backend returns EVOK-shaped dictionaries (e.g. {'dev': 'temp',
+    'circuit': ..., 'value': ..., 'lost': ...}) and None on error, with the
+    error message available from get_last_error(). A backend missing any of
+    the abstract operations cannot be instantiated.
+    """
+    
+    last_error = None
+    
+    @abstractmethod
+    def get_temperature(self, circuit_id: str) -> Optional[Dict[str, Any]]:
+        """Read temperature from a sensor"""
+        raise NotImplementedError
+    
+    @abstractmethod
+    def get_relay_state(self, circuit_id: str) -> Optional[Dict[str, Any]]:
+        """Read relay state"""
+        raise NotImplementedError
+    
+    @abstractmethod
+    def set_relay_state(self, circuit_id: str, value: bool) -> Optional[Dict[str, Any]]:
+        """Set relay state - result contains 'success'"""
+        raise NotImplementedError
+    
+    @abstractmethod
+    def get_digital_input(self, circuit_id: str) -> Optional[Dict[str, Any]]:
+        """Read digital input state"""
+        raise NotImplementedError
+    
+    @abstractmethod
+    def set_digital_input(self, circuit_id: str, value: bool) -> Optional[Dict[str, Any]]:
+        """Set digital input state (for simulator/testing purposes)"""
+        raise NotImplementedError
+    
+    @abstractmethod
+    def get_all(self) -> Optional[List[Dict[str, Any]]]:
+        """Read every device in one operation"""
+        raise NotImplementedError
+    
+    @abstractmethod
+    def test_connection(self) -> bool:
+        """Check that the hardware is reachable"""
+        raise NotImplementedError
+    
+    def check_health(self) -> bool:
+        """
+        Check that the hardware is reachable, preferably without a request
+        
+        Transports that track the outcome of their real requests answer from
+        that; by default this is an active test_connection().
+        """
+        return self.test_connection()
+    
+    def get_many(self, dev: str, circuits: Iterable[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Read several circuits of one device type with a single bulk read
+        
+        Args:
+            dev: Device type ('temp', 'ro', 'di', ...)
+            circuits: Circuit IDs to return
+            
+        Returns:
+            Dictionary mapping circuit ID to device data (missing circuits are
+            omitted) or None on error
+        """
+        devices = self.get_all()
+        if devices is None:
+            return None
+            
+        wanted = set(circuits)
+        result = {}
+        for device in devices:
+            device_dev, circuit = device_key(device)
+            if device_dev == dev and circuit in wanted:
+                result[circuit] = device
+        return result
+    
+    def get_last_error(self) -> Optional[str]:
+        """Get the last error message"""
+        return self.last_error
+
+class MemoryTransport(HardwareTransport):
+    """
+    In-process transport backed by the EVOK simulator's state model
+    
+    No sockets or background threads are involved; the simulated plant only
+    moves when advance() is called, so controller tests and benchmarks can
+    run many cycles per second.
+    """
+    
+    def __init__(self, simulator=None):
+        if simulator is None:
+            # Imported lazily - the simulator module pulls in Flask
+            from .simulator import EVOKSimulator
+            simulator = EVOKSimulator(background=False)
+            
+        self.simulator = simulator
+        self.last_error = None
+    
+    def advance(self, ticks: int = 1) -> None:
+        """Advance the simulated plant by a number of one-second ticks"""
+        for _ in range(ticks):
+            self.simulator.step()
+    
+    def get_temperature(self, circuit_id: str) -> Optional[Dict[str, Any]]:
+        return self._result(self.simulator.get_temperature(circuit_id), f"Sensor {circuit_id} not found")
+    
+    def get_relay_state(self, circuit_id: str) -> Optional[Dict[str, Any]]:
+        return self._result(self.simulator.get_relay(circuit_id), f"Relay {circuit_id} not found")
+    
+    def set_relay_state(self, circuit_id: str, value: bool) -> Optional[Dict[str, Any]]:
+        result = self.simulator.set_relay(circuit_id, value)
+        return self._result(result if result.get('success') else None, f"Relay {circuit_id} not found")
+    
+    def get_digital_input(self, circuit_id: str) -> Optional[Dict[str, Any]]:
+        return self._result(self.simulator.get_digital_input(circuit_id), f"Digital input {circuit_id} not found")
+    
+    def set_digital_input(self, circuit_id: str, value: bool) -> Optional[Dict[str, Any]]:
+        result = self.simulator.set_digital_input(circuit_id, value)
+        return self._result(result if result.get('success') else None, f"Digital input {circuit_id} not supported")
+    
+    def get_all(self) -> Optional[List[Dict[str, Any]]]:
+        self.last_error = None
+        return self.simulator.get_all()
+    
+    def test_connection(self) -> bool:
+        self.last_error = None
+        return True
+    
+    def _result(self, data: Optional[Dict[str, Any]], error_msg: str) -> Optional[Dict[str, Any]]:
+        """Record the error state of an operation and return its data"""
+        self.last_error = None if data is not None else error_msg
+        return data
+
+# Process-wide memory transport so every controller sees the same simulated plant
+_memory_transport = None
+_memory_transport_lock = threading.Lock()
+
+# Process-wide Modbus transport - one TCP connection per process
+_modbus_transport = None
+_modbus_transport_lock = threading.Lock()
+_modbus_transport_pid = None
+
+# Process-wide 1-Wire wrappers keyed by (transport name, process ID)
+_onewire_transports = {}
+_onewire_transports_lock = threading.Lock()
+
+def create_transport(name: str = None) -> HardwareTransport:
+    """
+    Return the hardware transport selected by HARDWARE_TRANSPORT in settings
+    
+    With TEMPERATURE_SOURCE set to 'onewire' the transport is wrapped so that
+    temperatures are read from 1-Wire sysfs instead.
+    
+    Args:
+        name: Transport name overriding the setting ('evok', 'modbus' or 'memory')
+        
+    Returns:
+        Transport instance (shared per process)
+    """
+    global _memory_transport, _modbus_transport, _modbus_transport_pid
+    
+    if name is None:
+        name = settings.BANDASKAPP_CONFIG.get('HARDWARE_TRANSPORT', 'evok')
+        
+    if name == 'evok':
+        from .client import get_shared_client
+        transport = get_shared_client()
+    elif name == 'modbus':
+        from .modbus import ModbusTransport
+        with _modbus_transport_lock:
+            # Never reuse a Modbus socket inherited from a parent process
+            if _modbus_transport is None or _modbus_transport_pid != os.getpid():
+                _modbus_transport = ModbusTransport()
+                _modbus_transport_pid = os.getpid()
+            transport = _modbus_transport
+    elif name == 'memory':
+        with _memory_transport_lock:
+            if _memory_transport is None:
+                _memory_transport = MemoryTransport()
+            transport = _memory_transport
+    else:
+        raise ValueError(f"Unknown hardware transport: {name}")
+        
+    if settings.BANDASKAPP_CONFIG.get('TEMPERATURE_SOURCE', 'evok') == 'onewire':
+        from .onewire import OneWireTransport
+        with _onewire_transports_lock:
+            key = (name, os.getpid())
+            wrapper = _onewire_transports.get(key)
+            if wrapper is None or wrapper.io is not transport:
+                wrapper = _onewire_transports[key] = OneWireTransport(transport)
+            return wrapper
+            
+    return transport